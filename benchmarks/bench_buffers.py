@@ -0,0 +1,43 @@
+import sys
+sys.path.append('..')
+
+import time
+
+from quickjs import JSRuntime, JSContext
+
+
+def bench_to_js(ctx: JSContext, data: bytes | bytearray, n_calls: int) -> float:
+    f = ctx.eval('(x) => x[x.length - 1]')
+    t = time.perf_counter()
+
+    for _ in range(n_calls):
+        f(data)
+
+    elapsed = time.perf_counter() - t
+    return n_calls * len(data) / elapsed / (1 << 20)
+
+
+def bench_to_python(ctx: JSContext, size: int, n_calls: int) -> float:
+    u = ctx.eval(f'new Uint8Array({size})')
+    t = time.perf_counter()
+
+    for _ in range(n_calls):
+        view = u.to_memoryview()
+        view[-1]
+
+    elapsed = time.perf_counter() - t
+    return n_calls * size / elapsed / (1 << 20)
+
+
+def bench():
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+
+    for size, n_calls in [(1 << 10, 10_000), (1 << 20, 1_000), (1 << 26, 20)]:
+        print(f'{size:9} bytes, bytes to JS (copy):          {bench_to_js(ctx, bytes(size), n_calls):14.1f} MB/s')
+        print(f'{size:9} bytes, bytearray to JS (zero-copy): {bench_to_js(ctx, bytearray(size), n_calls):14.1f} MB/s')
+        print(f'{size:9} bytes, Uint8Array to memoryview:    {bench_to_python(ctx, size, n_calls):14.1f} MB/s')
+
+
+if __name__ == '__main__':
+    bench()
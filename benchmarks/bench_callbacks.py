@@ -0,0 +1,41 @@
+import sys
+sys.path.append('..')
+
+import time
+
+from quickjs import JSRuntime, JSContext, primitive_args
+
+
+# NOTE: each element calls Python predicate once, Array.prototype.filter passes (value, index, array)
+FILTER_CODE = '''
+(function (n, f) {
+    const xs = Array.from({length: n}, (_, i) => i % 2 ? i : `s${i}`);
+    return xs.filter(f).length;
+})
+'''
+
+
+def bench_callback(ctx: JSContext, name: str, func, n: int):
+    filter_ = ctx.eval(FILTER_CODE)
+    t = time.perf_counter()
+    count = filter_(n, func)
+    elapsed = time.perf_counter() - t
+    print(f'{name:32} {n / elapsed:12.1f} callbacks/s ({count} kept)')
+
+
+def bench(n: int=1_000_000):
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+
+    # NOTE: *args receives value, index and array, so array is wrapped on every call
+    bench_callback(ctx, 'lambda x, *args', lambda x, *args: x == x, n)
+
+    # NOTE: arity is known, so index and array are never converted
+    bench_callback(ctx, 'lambda x', lambda x: x == x, n)
+
+    # NOTE: strings are converted to str directly, without JSString wrapper
+    bench_callback(ctx, 'primitive_args lambda x', primitive_args(lambda x: x == x), n)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
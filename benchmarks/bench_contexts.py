@@ -0,0 +1,42 @@
+import sys
+sys.path.append('..')
+
+import time
+
+from quickjs import JSRuntime, JSContext
+from quickjs.quickjs import lib, _JS_EvalBootstrap, _JS_FreeValue
+
+
+def bench_bootstrap(n: int, precompiled: bool) -> float:
+    rt = JSRuntime()
+    t = time.perf_counter()
+
+    for i in range(n):
+        _ctx = lib.JS_NewContext(rt._rt)
+        _val = _JS_EvalBootstrap(_ctx, precompiled=precompiled)
+        _JS_FreeValue(_ctx, _val)
+        lib.JS_FreeContext(_ctx)
+
+    return n / (time.perf_counter() - t)
+
+
+def bench_new_context(n: int) -> float:
+    rt = JSRuntime()
+    t = time.perf_counter()
+
+    for i in range(n):
+        ctx: JSContext = rt.new_context()
+        ctx.free()
+
+    return n / (time.perf_counter() - t)
+
+
+def bench():
+    n = 1_000
+    print(f'bootstrap from source:   {bench_bootstrap(n, precompiled=False):10.1f} contexts/s')
+    print(f'bootstrap from bytecode: {bench_bootstrap(n, precompiled=True):10.1f} contexts/s')
+    print(f'JSRuntime.new_context:   {bench_new_context(n):10.1f} contexts/s')
+
+
+if __name__ == '__main__':
+    bench()
@@ -0,0 +1,69 @@
+import sys
+sys.path.append('..')
+
+import json
+import time
+import random
+
+from quickjs import JSRuntime, JSContext
+
+
+def make_rows(n: int) -> list[dict]:
+    rnd = random.Random(0)
+
+    return [
+        {
+            'id': i,
+            'name': f'user-{i}',
+            'email': f'user-{i}@example.com',
+            'score': rnd.random() * 100,
+            'active': i % 3 == 0,
+            'tags': ['a', 'b', 'c'][:i % 4],
+            'address': {'city': 'Zagreb', 'zip': 10000 + i % 100, 'geo': [45.81, 15.98]},
+            'manager': None,
+        }
+        for i in range(n)
+    ]
+
+
+def bench_convert(ctx: JSContext, rows: list[dict], n_calls: int) -> float:
+    # NOTE: JS side only reads length, so time is dominated by Python to JS conversion
+    f = ctx.eval('(rows) => rows.length')
+    t = time.perf_counter()
+
+    for _ in range(n_calls):
+        assert f(rows) == len(rows)
+
+    elapsed = time.perf_counter() - t
+    return n_calls * len(rows) / elapsed
+
+
+def bench_to_py(ctx: JSContext, rows: list[dict], n_calls: int, use_json: bool) -> float:
+    f = ctx.eval('(rows) => rows.map(n => ({...n}))')
+    stringify = ctx.eval('JSON.stringify')
+    js_rows = f(rows)
+    t = time.perf_counter()
+
+    for _ in range(n_calls):
+        if use_json:
+            assert len(json.loads(str(stringify(js_rows)))) == len(rows)
+        else:
+            assert len(js_rows.to_py()) == len(rows)
+
+    elapsed = time.perf_counter() - t
+    return n_calls * len(rows) / elapsed
+
+
+def bench():
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+
+    for n_rows, n_calls in [(10, 2000), (1_000, 50), (100_000, 1)]:
+        rows = make_rows(n_rows)
+        print(f'{n_rows:7} rows, Python to JS:                   {bench_convert(ctx, rows, n_calls):12.1f} rows/s')
+        print(f'{n_rows:7} rows, JS to Python, to_py:            {bench_to_py(ctx, rows, n_calls, False):12.1f} rows/s')
+        print(f'{n_rows:7} rows, JS to Python, JSON.stringify:   {bench_to_py(ctx, rows, n_calls, True):12.1f} rows/s')
+
+
+if __name__ == '__main__':
+    bench()
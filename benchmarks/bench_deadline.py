@@ -0,0 +1,45 @@
+import sys
+sys.path.append('..')
+
+import time
+
+from quickjs import JSRuntime, JSContext
+
+
+FIB_CODE = '''
+function fib(n) {
+    return n < 2 ? n : fib(n - 1) + fib(n - 2);
+}
+'''
+
+
+def bench_fib(ctx: JSContext, name: str, n_calls: int, **deadline):
+    fib = ctx['fib']
+    t = time.perf_counter()
+
+    if deadline:
+        with ctx.deadline(**deadline):
+            for _ in range(n_calls):
+                fib(22)
+    else:
+        for _ in range(n_calls):
+            fib(22)
+
+    elapsed = time.perf_counter() - t
+    print(f'{name:24} {n_calls / elapsed:10.1f} calls/s')
+
+
+def bench(n_calls: int=200):
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+    ctx.eval(FIB_CODE)
+
+    # NOTE: interrupt handler is installed only inside deadline block
+    bench_fib(ctx, 'no deadline', n_calls)
+    bench_fib(ctx, 'timeout', n_calls, timeout=3600.0)
+    bench_fib(ctx, 'budget', n_calls, budget=1 << 40)
+    bench_fib(ctx, 'no deadline again', n_calls)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,65 @@
+import sys
+sys.path.append('..')
+
+import time
+
+from quickjs import JSRuntime, JSContext, lazy_iter
+
+
+ARRAY_CODE = '(n) => Array.from({length: n}, (_, i) => i)'
+
+GENERATOR_CODE = '''
+(function* (n) {
+    for (let i = 0; i < n; i++) {
+        yield i;
+    }
+})
+'''
+
+JS_SUM_CODE = '''
+(xs) => {
+    let s = 0;
+
+    for (const x of xs) {
+        s += x;
+    }
+
+    return s;
+}
+'''
+
+
+def bench_iter(name: str, func, n: int):
+    t = time.perf_counter()
+    total = func()
+    elapsed = time.perf_counter() - t
+    print(f'{name:24} {n / elapsed:14.1f} items/s (sum {total})')
+
+
+def bench(n: int=1_000_000):
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+    xs = ctx.eval(ARRAY_CODE)(n)
+    get_item = ctx.eval('(xs, i) => xs[i]')
+
+    # NOTE: one JS call per element, as before JSArray implemented Sequence
+    bench_iter('array call per item', lambda: sum(get_item(xs, i) for i in range(xs.length)), n)
+
+    # NOTE: length is read once and elements are fetched in chunks
+    bench_iter('array iter', lambda: sum(xs), n)
+    bench_iter('array index', lambda: sum(xs[i] for i in range(len(xs))), n)
+    bench_iter('array slice', lambda: sum(xs[:]), n)
+    bench_iter('array to_py', lambda: sum(xs.to_py()), n)
+
+    gen = ctx.eval(GENERATOR_CODE)
+    bench_iter('generator', lambda: sum(gen(n)), n)
+
+    # NOTE: Python iterators are pulled by JS in chunks, lists are converted as whole
+    js_sum = ctx.eval(JS_SUM_CODE)
+    bench_iter('py list', lambda: js_sum(list(range(n))), n)
+    bench_iter('py iterator', lambda: js_sum(iter(range(n))), n)
+    bench_iter('py iterator chunk 1', lambda: js_sum(lazy_iter(range(n), chunk_size=1)), n)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,79 @@
+import sys
+sys.path.append('..')
+
+import json
+import time
+
+from quickjs import JSRuntime, JSContext
+
+from bench_convert import make_rows
+
+
+def bench_call(ctx: JSContext, rows: list[dict], min_time: float=0.2) -> float:
+    # NOTE: returns seconds per call, JS side only reads length
+    f = ctx.eval('(rows) => rows.length')
+    n_calls = 0
+    t = time.perf_counter()
+
+    while True:
+        f(rows)
+        n_calls += 1
+        elapsed = time.perf_counter() - t
+
+        if elapsed >= min_time:
+            break
+
+    return elapsed / n_calls
+
+
+def bench_to_python(ctx: JSContext, rows: list[dict], use_json: bool, min_time: float=0.2) -> float:
+    js_rows = ctx.eval('(rows) => rows.map(n => ({...n}))')(rows)
+    n_calls = 0
+    t = time.perf_counter()
+
+    while True:
+        if use_json:
+            json.loads(js_rows.to_json())
+        else:
+            js_rows.to_py()
+
+        n_calls += 1
+        elapsed = time.perf_counter() - t
+
+        if elapsed >= min_time:
+            break
+
+    return elapsed / n_calls
+
+
+def bench():
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+    json_ctx: JSContext = rt.new_context(json_threshold=0)
+    crossover: int | None = None
+    is_json_faster: list[tuple[int, bool]] = []
+
+    print(f'{"rows":>7} {"bulk":>12} {"json":>12} {"to_py":>12} {"to_json":>12}')
+
+    for n_rows in [1, 3, 10, 30, 100, 300, 1_000, 3_000, 10_000, 30_000, 100_000]:
+        rows = make_rows(n_rows)
+        bulk_time = bench_call(ctx, rows)
+        json_time = bench_call(json_ctx, rows)
+        to_py_time = bench_to_python(ctx, rows, False)
+        to_json_time = bench_to_python(ctx, rows, True)
+        print(f'{n_rows:7} {bulk_time * 1e6:10.1f}us {json_time * 1e6:10.1f}us {to_py_time * 1e6:10.1f}us {to_json_time * 1e6:10.1f}us')
+
+        is_json_faster.append((n_rows, json_time < bulk_time))
+
+    # NOTE: smallest size from which JSON lane stays faster, candidate for JSContext.json_threshold
+    for n_rows, faster in reversed(is_json_faster):
+        if not faster:
+            break
+
+        crossover = n_rows
+
+    print(f'Python to JS, JSON is faster from {crossover} rows' if crossover is not None else 'Python to JS, JSON is never faster')
+
+
+if __name__ == '__main__':
+    bench()
@@ -0,0 +1,45 @@
+import sys
+sys.path.append('..')
+
+import time
+
+from quickjs import JSRuntime, JSContext
+from bench_convert import make_rows
+
+
+RENDER_CODE = '''
+(row) => `<li class="${row.active ? 'active' : ''}">${row.name} <${row.email}> ${row.tags.join(',')}</li>`
+'''
+
+
+def bench_render(name: str, render, rows: list[dict]):
+    t = time.perf_counter()
+    html = render(rows)
+    elapsed = time.perf_counter() - t
+    assert len(html) == len(rows)
+    print(f'{name:32} {len(rows) / elapsed:12.1f} rows/s')
+
+
+def bench(n: int=100_000):
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+    f = ctx.eval(RENDER_CODE)
+    rows: list[dict] = make_rows(n)
+
+    # NOTE: every row crosses Python/JS boundary separately
+    bench_render('__call__ loop', lambda rows: [str(f(row)) for row in rows], rows)
+
+    # NOTE: chunk of rows is converted and called in single crossing
+    bench_render('map', lambda rows: [str(r) for r in f.map(rows)], rows)
+    bench_render('map materialize', lambda rows: list(f.map(rows, materialize=True)), rows)
+    bench_render('map materialize chunk_size=64', lambda rows: list(f.map(rows, chunk_size=64, materialize=True)), rows)
+
+    # NOTE: numbers convert cheaply, so crossing overhead dominates
+    g = ctx.eval('(x) => x * 2')
+    xs: list[int] = list(range(n))
+    bench_render('numbers __call__ loop', lambda xs: [g(x) for x in xs], xs)
+    bench_render('numbers map materialize', lambda xs: list(g.map(xs, materialize=True)), xs)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,42 @@
+import sys
+sys.path.append('..')
+
+import json
+import time
+
+from quickjs import JSRuntime, JSContext
+
+
+TRANSFORM_CODE = '(r) => r.level === "error" ? `${r.ts} ${r.msg}` : undefined'
+
+
+def make_lines(n: int) -> list[bytes]:
+    return [
+        json.dumps({'ts': i, 'level': 'error' if i % 10 == 0 else 'info', 'msg': f'message {i}', 'tags': ['a', 'b']}).encode() + b'\n'
+        for i in range(n)
+    ]
+
+
+def bench_run(name: str, func, n: int):
+    t = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - t
+    print(f'{name:24} {n / elapsed:14.1f} records/s ({count} results)')
+
+
+def bench(n: int=200_000):
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context(primitive_results=True)
+    lines: list[bytes] = make_lines(n)
+    transform = ctx.eval(TRANSFORM_CODE)
+
+    # NOTE: record is parsed by json module, converted to JS and passed in one call per record
+    bench_run('call per record', lambda: sum(transform(json.loads(line)) is not None for line in lines), n)
+
+    # NOTE: batches of lines are parsed by JSON.parse and transformed inside engine
+    bench_run('pipeline', lambda: sum(1 for _ in ctx.pipeline(transform, lines)), n)
+    bench_run('pipeline workers=4', lambda: sum(1 for _ in ctx.pipeline(TRANSFORM_CODE, lines, batch_size=4096, workers=4)), n)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,74 @@
+import sys
+sys.path.append('..')
+
+import os
+import time
+import tempfile
+
+from quickjs import JSRuntime, JSContext, JSProcessPool
+
+
+HANDLEBARS_PATH = 'node_modules/handlebars/dist/handlebars.min.js'
+
+SETUP_CODE = '''
+globalThis.render = Handlebars.compile(
+    "<p>Hello, my name is {{name}}. I am from {{hometown}}. I have " +
+    "{{kids.length}} kids:</p>" +
+    "<ul>{{#kids}}<li>{{name}} is {{age}}</li>{{/kids}}</ul>"
+);
+'''
+
+DATA = {
+    'name': 'Alan',
+    'hometown': 'Somewhere, TX',
+    'kids': [
+        {'name': 'Jimmy', 'age': '12'},
+        {'name': 'Sally', 'age': '4'},
+    ],
+}
+
+
+def bench_single_process(n: int, setup_path: str) -> float:
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+    ctx.load(HANDLEBARS_PATH)
+    ctx.load(setup_path)
+    render = ctx['render']
+    t = time.perf_counter()
+
+    for i in range(n):
+        str(render(DATA))
+
+    return n / (time.perf_counter() - t)
+
+
+def bench_process_pool(n: int, setup_path: str, max_workers: int) -> float:
+    with JSProcessPool(preload=[HANDLEBARS_PATH, setup_path], max_workers=max_workers) as pool:
+        # NOTE: warm up worker processes
+        list(pool.map('render', [(DATA,)] * max_workers))
+        t = time.perf_counter()
+        list(pool.map('render', [(DATA,)] * n, chunksize=256))
+        return n / (time.perf_counter() - t)
+
+
+def bench():
+    if not os.path.exists(HANDLEBARS_PATH):
+        print(f'{HANDLEBARS_PATH} not found, run: npm install handlebars')
+        return
+
+    with tempfile.NamedTemporaryFile('w', suffix='.js', delete=False) as f:
+        f.write(SETUP_CODE)
+        setup_path = f.name
+
+    try:
+        n = 20_000
+        print(f'single process:         {bench_single_process(n, setup_path):10.1f} renders/s')
+
+        for max_workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+            print(f'JSProcessPool({max_workers:2} workers): {bench_process_pool(n, setup_path, max_workers):10.1f} renders/s')
+    finally:
+        os.unlink(setup_path)
+
+
+if __name__ == '__main__':
+    bench()
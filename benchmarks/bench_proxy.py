@@ -0,0 +1,53 @@
+import sys
+sys.path.append('..')
+
+import time
+
+from quickjs import JSRuntime, JSContext, lazy_proxy
+from bench_convert import make_rows
+
+
+# NOTE: template reads three fields of large config
+SPARSE_CODE = '(c) => `${c.title} ${c.version} ${c.rows[500].name}`'
+
+# NOTE: every row is read once
+SCAN_CODE = '''
+(c) => {
+    let s = 0;
+
+    for (let i = 0; i < c.rows.length; i++) {
+        s += c.rows[i].id;
+    }
+
+    return s;
+}
+'''
+
+
+def bench_call(name: str, f, arg, n_calls: int):
+    t = time.perf_counter()
+
+    for _ in range(n_calls):
+        f(arg)
+
+    elapsed = time.perf_counter() - t
+    print(f'{name:24} {elapsed / n_calls * 1000:12.3f} ms/call')
+
+
+def bench(n_rows: int=100_000, n_calls: int=5):
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+    config: dict = {'title': 'config', 'version': 3, 'rows': make_rows(n_rows)}
+
+    sparse = ctx.eval(SPARSE_CODE)
+    bench_call('sparse deep copy', sparse, config, n_calls)
+    bench_call('sparse lazy_proxy', sparse, lazy_proxy(config), n_calls)
+
+    # NOTE: proxies pay Python call on first access of every property, so dense reads favor deep copy
+    scan = ctx.eval(SCAN_CODE)
+    bench_call('scan deep copy', scan, config, n_calls)
+    bench_call('scan lazy_proxy', scan, lazy_proxy(config), n_calls)
+
+
+if __name__ == '__main__':
+    bench(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
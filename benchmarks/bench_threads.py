@@ -0,0 +1,59 @@
+import sys
+sys.path.append('..')
+
+import os
+import time
+import threading
+
+from quickjs import JSRuntime, JSContext
+
+
+FIB_CODE = '''
+function fib(n) {
+    return n < 2 ? n : fib(n - 1) + fib(n - 2);
+}
+'''
+
+
+def bench_threads(n_threads: int, n_calls: int, shared_runtime: bool) -> float:
+    shared_rt = JSRuntime() if shared_runtime else None
+    barrier = threading.Barrier(n_threads + 1)
+
+    def worker():
+        rt = shared_rt if shared_rt is not None else JSRuntime()
+        ctx: JSContext = rt.new_context()
+        ctx.eval(FIB_CODE)
+        fib = ctx['fib']
+        barrier.wait()
+
+        for i in range(n_calls):
+            fib(20)
+
+        barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+
+    for t in threads:
+        t.start()
+
+    barrier.wait()
+    t = time.perf_counter()
+    barrier.wait()
+    elapsed = time.perf_counter() - t
+
+    for t in threads:
+        t.join()
+
+    return n_threads * n_calls / elapsed
+
+
+def bench():
+    n_calls = 200
+
+    for n_threads in sorted({1, 2, 4, os.cpu_count() or 1}):
+        print(f'{n_threads:2} threads, runtime per thread: {bench_threads(n_threads, n_calls, False):10.1f} calls/s')
+        print(f'{n_threads:2} threads, shared runtime:     {bench_threads(n_threads, n_calls, True):10.1f} calls/s')
+
+
+if __name__ == '__main__':
+    bench()
@@ -0,0 +1,36 @@
+import sys
+sys.path.append('..')
+
+import os
+import time
+import resource
+
+from quickjs import JSRuntime, JSContext
+
+
+def get_rss() -> int:
+    # NOTE: current RSS on Linux, peak RSS elsewhere
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def stress(n: int=1_000_000, report_every: int=100_000):
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+    filter_ = ctx.eval('(xs, f) => xs.filter(f).length')
+    xs = ctx.eval('[10, 20, 30, 40, 50, 60, 70, 80, 90]')
+    t = time.perf_counter()
+
+    for i in range(1, n + 1):
+        # NOTE: new Python callable per call, like lambda per request in lodash demo
+        assert filter_(xs, lambda x, *args: x >= 50) == 5
+
+        if i % report_every == 0:
+            print(f'{i:9} callbacks, {(time.perf_counter() - t):8.1f}s, RSS {get_rss() / (1 << 20):8.1f} MB')
+
+
+if __name__ == '__main__':
+    stress(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
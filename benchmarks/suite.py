@@ -0,0 +1,299 @@
+import sys
+sys.path.append('..')
+
+import os
+import gc
+import json
+import time
+import argparse
+import platform
+import statistics
+from typing import Any, Callable
+
+from quickjs import JSRuntime, JSContext, lazy_proxy
+from bench_convert import make_rows
+
+
+# NOTE: setup function returns (op, n), where op runs n operations of benchmarked path,
+#   or None if benchmark cannot run (e.g. missing local file)
+_Setup = Callable[[argparse.Namespace], tuple[Callable[[], Any], int] | None]
+
+CASES: dict[str, _Setup] = {}
+
+FIB_CODE = '''
+function fib(n) {
+    return n < 2 ? n : fib(n - 1) + fib(n - 2);
+}
+'''
+
+
+def case(name: str) -> Callable[[_Setup], _Setup]:
+    def decorator(setup: _Setup) -> _Setup:
+        CASES[name] = setup
+        return setup
+
+    return decorator
+
+
+@case('new_context')
+def setup_new_context(args: argparse.Namespace):
+    rt = JSRuntime()
+
+    def op():
+        ctx: JSContext = rt.new_context()
+        ctx.free()
+
+    return op, 1
+
+
+@case('eval_small')
+def setup_eval_small(args: argparse.Namespace):
+    ctx: JSContext = JSRuntime().new_context()
+    return lambda: ctx.eval('1 + 2'), 1
+
+
+@case('call_0_args')
+def setup_call_0_args(args: argparse.Namespace):
+    f = JSRuntime().new_context().eval('() => 0')
+    return lambda: f(), 1
+
+
+@case('call_1_arg')
+def setup_call_1_arg(args: argparse.Namespace):
+    f = JSRuntime().new_context().eval('(a) => a')
+    return lambda: f(1), 1
+
+
+@case('call_8_args')
+def setup_call_8_args(args: argparse.Namespace):
+    f = JSRuntime().new_context().eval('(a, b, c, d, e, f, g, h) => a')
+    return lambda: f(1, 2.5, 'c', True, None, 6, 7, 'h'), 1
+
+
+@case('py_callback')
+def setup_py_callback(args: argparse.Namespace):
+    n = 1000
+    f = JSRuntime().new_context().eval('(f, n) => { for (let i = 0; i < n; i++) f(i); }')
+    callback = lambda x: x # noqa
+    return lambda: f(callback, n), n
+
+
+@case('convert_nested')
+def setup_convert_nested(args: argparse.Namespace):
+    rows: list[dict] = make_rows(100)
+    f = JSRuntime().new_context().eval('(rows) => rows.length')
+    return lambda: f(rows), len(rows)
+
+
+@case('function_map')
+def setup_function_map(args: argparse.Namespace):
+    rows: list[dict] = make_rows(100)
+    f = JSRuntime().new_context().eval('(row) => row.id')
+    return lambda: list(f.map(rows, materialize=True)), len(rows)
+
+
+@case('lazy_proxy_sparse')
+def setup_lazy_proxy_sparse(args: argparse.Namespace):
+    config: dict = {'rows': make_rows(1000)}
+    f = JSRuntime().new_context().eval('(c) => c.rows[500].name')
+    return lambda: f(lazy_proxy(config)), 1
+
+
+@case('array_iter')
+def setup_array_iter(args: argparse.Namespace):
+    n = 1000
+    xs = JSRuntime().new_context().eval(f'Array.from({{length: {n}}}, (_, i) => i)')
+    return lambda: sum(xs), n
+
+
+@case('pipeline_ndjson')
+def setup_pipeline_ndjson(args: argparse.Namespace):
+    lines: list[bytes] = [json.dumps(row).encode() + b'\n' for row in make_rows(1000)]
+    ctx: JSContext = JSRuntime().new_context()
+    transform = ctx.eval('(row) => row.id')
+    return lambda: sum(1 for _ in ctx.pipeline(transform, lines)), len(lines)
+
+
+@case('jsstring_str')
+def setup_jsstring_str(args: argparse.Namespace):
+    s = JSRuntime().new_context().eval('"abcdefgh".repeat(1 << 17)')
+    return lambda: str(s), 1
+
+
+@case('getattr')
+def setup_getattr(args: argparse.Namespace):
+    obj = JSRuntime().new_context().eval('({x: 1, y: 2})')
+    return lambda: obj.x, 1
+
+
+@case('call_fib')
+def setup_call_fib(args: argparse.Namespace):
+    ctx: JSContext = JSRuntime().new_context()
+    ctx.eval(FIB_CODE)
+    fib = ctx['fib']
+    return lambda: fib(15), 1
+
+
+@case('call_fib_deadline')
+def setup_call_fib_deadline(args: argparse.Namespace):
+    ctx: JSContext = JSRuntime().new_context()
+    ctx.eval(FIB_CODE)
+    fib = ctx['fib']
+    return lambda: fib.call_with_timeout(15, timeout=3600.0), 1
+
+
+def setup_load(path: str):
+    def setup(args: argparse.Namespace):
+        p: str = os.path.join(args.node_modules, path)
+
+        if not os.path.exists(p):
+            return None
+
+        rt = JSRuntime()
+
+        def op():
+            ctx: JSContext = rt.new_context()
+            ctx.load(p)
+            ctx.free()
+
+        return op, 1
+
+    return setup
+
+
+case('load_lodash')(setup_load('lodash/lodash.min.js'))
+case('load_handlebars')(setup_load('handlebars/dist/handlebars.min.js'))
+
+
+def run_case(setup: _Setup, args: argparse.Namespace) -> dict[str, Any] | None:
+    ret = setup(args)
+
+    if ret is None:
+        return None
+
+    op, n = ret
+
+    # NOTE: calibrate number of loops, so single sample takes at least min_time
+    loops: int = 1
+
+    while True:
+        t = time.perf_counter()
+
+        for _ in range(loops):
+            op()
+
+        elapsed: float = time.perf_counter() - t
+
+        if elapsed >= args.min_time:
+            break
+
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(args.min_time / elapsed * 1.2)))
+
+    samples: list[float] = []
+    gc.collect()
+
+    for _ in range(args.repeat):
+        t = time.perf_counter()
+
+        for _ in range(loops):
+            op()
+
+        samples.append((time.perf_counter() - t) / (loops * n))
+
+    median: float = statistics.median(samples)
+
+    return {
+        'ops_per_sec': 1 / median,
+        'median_ns': median * 1e9,
+        'min_ns': min(samples) * 1e9,
+        'stdev_ns': statistics.stdev(samples) * 1e9 if len(samples) > 1 else 0.0,
+        'loops': loops,
+        'ops_per_loop': n,
+        'repeat': len(samples),
+    }
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], threshold: float) -> list[str]:
+    regressions: list[str] = []
+
+    for name, result in results.items():
+        base: dict | None = baseline.get(name)
+
+        if base is None:
+            continue
+
+        change: float = result['median_ns'] / base['median_ns'] - 1
+        result['baseline_median_ns'] = base['median_ns']
+        result['change'] = change
+
+        if change > threshold:
+            regressions.append(name)
+
+    return regressions
+
+
+def main(argv: list[str] | None=None) -> int:
+    parser = argparse.ArgumentParser(description='Microbenchmarks of Python/JS boundary')
+    parser.add_argument('-o', '--output', help='write results as JSON to file')
+    parser.add_argument('-b', '--baseline', help='compare with results JSON saved by previous run')
+    parser.add_argument('-t', '--threshold', type=float, default=0.10, help='allowed slowdown against baseline, 0.10 is 10%% (default)')
+    parser.add_argument('-k', '--filter', default='', help='run only benchmarks containing substring')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='number of timed samples (default 5)')
+    parser.add_argument('--min-time', type=float, default=0.1, help='minimal duration of single sample in seconds (default 0.1)')
+    parser.add_argument('--node-modules', default='node_modules', help='directory with lodash and handlebars packages')
+    args = parser.parse_args(argv)
+
+    results: dict[str, dict] = {}
+
+    for name, setup in CASES.items():
+        if args.filter not in name:
+            continue
+
+        result = run_case(setup, args)
+
+        if result is None:
+            print(f'{name:20} skipped')
+            continue
+
+        results[name] = result
+        print(f'{name:20} {result["ops_per_sec"]:14.1f} ops/s {result["median_ns"]:12.1f} ns/op ±{result["stdev_ns"]:.1f}')
+
+    regressions: list[str] = []
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline: dict[str, dict] = json.load(f)['results']
+
+        regressions = compare(results, baseline, args.threshold)
+        print()
+
+        for name, result in results.items():
+            if 'change' in result:
+                mark: str = ' REGRESSION' if name in regressions else ''
+                print(f'{name:20} {result["change"] * 100:+8.1f}%{mark}')
+
+    if args.output:
+        data: dict[str, Any] = {
+            'meta': {
+                'timestamp': time.time(),
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'threshold': args.threshold,
+            },
+            'results': results,
+        }
+
+        with open(args.output, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    if regressions:
+        print(f'\n{len(regressions)} benchmark(s) regressed more than {args.threshold * 100:.1f}%: {", ".join(regressions)}')
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import sys
+sys.path.append('..')
+
+import time
+import asyncio
+
+from quickjs import JSRuntime, JSContext, JSError
+
+
+async def demo_async():
+    rt = JSRuntime()
+    ctx: JSContext = rt.new_context()
+
+    # top-level await, timers are backed by asyncio event loop
+    val = await ctx.eval_async('await new Promise(resolve => setTimeout(() => resolve(42), 100))')
+    print(val)
+
+    ctx.eval('''
+        async function sleep(ms, value) {
+            await new Promise(resolve => setTimeout(resolve, ms));
+            return value;
+        }
+
+        async function fail(message) {
+            throw new Error(message);
+        }
+    ''')
+
+    sleep = ctx['sleep']
+    fail = ctx['fail']
+
+    # hundreds of concurrent JS tasks on single event loop
+    t = time.perf_counter()
+    values = await asyncio.gather(*[sleep.call_async(100, i) for i in range(500)])
+    print(sum(values), f'{time.perf_counter() - t:.3f}s')
+
+    try:
+        await fail.call_async('rejected')
+    except JSError as e:
+        print(f'{e = }')
+
+
+if __name__ == '__main__':
+    asyncio.run(demo_async())
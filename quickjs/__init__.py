@@ -1 +1,7 @@
 from .quickjs import * # noqa
+from .cache import * # noqa
+from .instrument import * # noqa
+from .resolver import * # noqa
+from .pool import * # noqa
+from .process_pool import * # noqa
+from .pipeline import * # noqa
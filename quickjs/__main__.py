@@ -0,0 +1,34 @@
+import sys
+import argparse
+
+from .cache import JSModuleCache
+
+
+def main(argv: list[str] | None=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m quickjs', description='Manage module cache')
+    parser.add_argument('--cache-dir', help='module cache directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    warm_parser = subparsers.add_parser('warm', help='download URLs into module cache')
+    warm_parser.add_argument('urls', nargs='+')
+    subparsers.add_parser('stats', help='print module cache stats')
+    subparsers.add_parser('clear', help='remove all cached modules')
+    args = parser.parse_args(argv)
+
+    cache = JSModuleCache(args.cache_dir)
+
+    if args.command == 'warm':
+        fetched: list[str] = cache.warm(args.urls)
+
+        for url in args.urls:
+            print(f'{"fetched" if url in fetched else "cached ":8} {url}')
+    elif args.command == 'stats':
+        for k, v in cache.stats().items():
+            print(f'{k}: {v}')
+    elif args.command == 'clear':
+        cache.clear()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,294 @@
+__all__ = [
+    'JSBytecodeCache',
+    'JSModuleCache',
+]
+
+import os
+import hashlib
+import tempfile
+import urllib.request
+from typing import Any
+
+from . import _quickjs
+
+
+def get_default_cache_dir(name: str) -> str:
+    cache_home: str = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'quickjs-cffi', name)
+
+
+_build_id: str | None = None
+
+
+def get_build_id() -> str:
+    # NOTE: hash of compiled QuickJS extension, so cached bytecode is invalidated on every rebuild
+    global _build_id
+
+    if _build_id is None:
+        h = hashlib.sha256()
+
+        with open(_quickjs.__file__, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+
+        _build_id = h.hexdigest()
+
+    return _build_id
+
+
+def download_file(url: str) -> bytes:
+    with urllib.request.urlopen(url) as response:
+        return response.read()
+
+
+def _write_file(path: str, data: bytes):
+    dirpath = os.path.dirname(path)
+    os.makedirs(dirpath, exist_ok=True)
+
+    # NOTE: write and rename, so concurrent readers never see partial entry
+    fd, temp_path = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class _DiskCache:
+    suffix: str = ''
+
+
+    def __init__(self, cache_dir: str, max_size: int):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size: int | None = None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+
+    def _iter_entries(self) -> list[tuple[str, os.stat_result]]:
+        entries = []
+
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if not filename.endswith(self.suffix):
+                    continue
+
+                path = os.path.join(dirpath, filename)
+
+                try:
+                    entries.append((path, os.stat(path)))
+                except FileNotFoundError:
+                    # NOTE: removed by another process sharing cache dir
+                    pass
+
+        return entries
+
+
+    def get(self, key: str) -> bytes | None:
+        path = self._get_path(key)
+
+        try:
+            with open(path, 'rb') as f:
+                data: bytes = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        # NOTE: touch entry, so eviction drops least recently used entries first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return data
+
+
+    def put(self, key: str, data: bytes):
+        path = self._get_path(key)
+
+        # NOTE: rewritten entry replaces its old file, so only size difference is added
+        try:
+            old_size: int = os.stat(path).st_size
+        except FileNotFoundError:
+            old_size = 0
+
+        _write_file(path, data)
+
+        if self._size is None:
+            self._size = sum(st.st_size for _, st in self._iter_entries())
+        else:
+            self._size += len(data) - old_size
+
+        if self._size > self.max_size:
+            self.evict()
+
+
+    def discard(self, key: str):
+        path = self._get_path(key)
+
+        try:
+            size: int = os.stat(path).st_size
+            os.unlink(path)
+        except FileNotFoundError:
+            return
+
+        if self._size is not None:
+            self._size -= size
+
+
+    def evict(self):
+        entries = self._iter_entries()
+        entries.sort(key=lambda n: n[1].st_mtime)
+        size: int = sum(st.st_size for _, st in entries)
+
+        for path, st in entries:
+            if size <= self.max_size:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+            size -= st.st_size
+
+        self._size = size
+
+
+    def clear(self):
+        for path, _ in self._iter_entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+        self._size = 0
+
+
+    def stats(self) -> dict[str, Any]:
+        entries = self._iter_entries()
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'size': sum(st.st_size for _, st in entries),
+            'max_size': self.max_size,
+        }
+
+
+class JSBytecodeCache(_DiskCache):
+    suffix: str = '.qjsc'
+
+
+    def __init__(self, cache_dir: str | None=None, max_size: int=256 * 1024 * 1024):
+        if cache_dir is None:
+            cache_dir = get_default_cache_dir('bytecode')
+
+        super().__init__(cache_dir, max_size)
+
+
+    def make_key(self, buf: str, filename: str, eval_flags: int) -> str:
+        h = hashlib.sha256()
+        h.update(get_build_id().encode())
+        h.update(f'\0{eval_flags}\0{filename}\0'.encode())
+        h.update(buf.encode())
+        return h.hexdigest()
+
+
+# Remote module sources stored by content hash, with index of URLs pointing to content hashes.
+# Cached URLs are never fetched again, so URLs should be immutable (e.g. versioned CDN URLs).
+# In offline mode only cached URLs can be loaded.
+# NOTE: max_size limits size of sources, URL index entries of evicted sources are treated as misses
+class JSModuleCache(_DiskCache):
+    suffix: str = '.js'
+
+
+    def __init__(self, cache_dir: str | None=None, max_size: int=256 * 1024 * 1024, offline: bool=False):
+        if cache_dir is None:
+            cache_dir = get_default_cache_dir('modules')
+
+        super().__init__(cache_dir, max_size)
+        self.offline = offline
+
+
+    def make_key(self, data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+
+    def _get_url_path(self, url: str) -> str:
+        key: str = hashlib.sha256(url.encode()).hexdigest()
+        return os.path.join(self.cache_dir, 'urls', key[:2], key)
+
+
+    def get_url(self, url: str) -> bytes | None:
+        try:
+            with open(self._get_url_path(url)) as f:
+                key: str = f.read().strip()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        data: bytes | None = self.get(key)
+
+        # NOTE: evicted or corrupted source
+        if data is None or self.make_key(data) != key:
+            return None
+
+        return data
+
+
+    def put_url(self, url: str, data: bytes) -> str:
+        key: str = self.make_key(data)
+        self.put(key, data)
+        _write_file(self._get_url_path(url), key.encode())
+        return key
+
+
+    def fetch(self, url: str) -> bytes:
+        data: bytes | None = self.get_url(url)
+
+        if data is not None:
+            return data
+
+        if self.offline:
+            raise ValueError(f'{url} is not cached and module cache is offline')
+
+        data = download_file(url)
+        self.put_url(url, data)
+        return data
+
+
+    def warm(self, urls: list[str]) -> list[str]:
+        # NOTE: returns URLs which were not cached yet
+        fetched: list[str] = []
+
+        for url in urls:
+            if self.get_url(url) is None:
+                self.put_url(url, download_file(url))
+                fetched.append(url)
+
+        return fetched
+
+
+    def clear(self):
+        super().clear()
+
+        for dirpath, _, filenames in os.walk(os.path.join(self.cache_dir, 'urls')):
+            for filename in filenames:
+                try:
+                    os.unlink(os.path.join(dirpath, filename))
+                except FileNotFoundError:
+                    pass
+
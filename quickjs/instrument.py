@@ -0,0 +1,162 @@
+__all__ = [
+    'JSInstrumentation',
+    'JSSpan',
+    'instrumentation',
+]
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable
+
+
+# Single crossing of Python/JS boundary, passed to span callback.
+# kind is one of 'eval', 'load', 'module', 'call' and 'callback', name is source file,
+# module name or function name. filename is source file of called JS function or of JS code calling Python callback,
+# empty if QuickJS has no debug info for it. nbytes is size of source code or of converted arguments and results.
+@dataclass(frozen=True)
+class JSSpan:
+    kind: str
+    name: str
+    start_ns: int
+    duration_ns: int
+    nbytes: int
+    error: bool
+    filename: str = ''
+
+
+# NOTE: nesting deeper than this is not counted, same as conversion it fails on cyclic containers
+_SIZEOF_MAX_DEPTH = 256
+
+
+# Size of strings and buffers converted between Python and JS, including ones nested in lists, tuples and dicts.
+# Numbers, booleans and None are not counted, JSValue wrappers are not converted so they are not counted either.
+def _sizeof_value(val: Any, depth: int=0) -> int:
+    t = type(val)
+
+    if t is str or t is bytes or t is bytearray:
+        return len(val)
+    elif t is memoryview:
+        return val.nbytes
+    elif depth >= _SIZEOF_MAX_DEPTH:
+        return 0
+    elif t is list or t is tuple:
+        return _sizeof_args(val, depth + 1)
+    elif t is dict:
+        return _sizeof_args(val.keys(), depth + 1) + _sizeof_args(val.values(), depth + 1)
+
+    return 0
+
+
+def _sizeof_args(args: Any, depth: int=0) -> int:
+    n: int = 0
+
+    for arg in args:
+        n += _sizeof_value(arg, depth)
+
+    return n
+
+
+# Opt-in counters of eval, load, module loading, JS function calls and Python callbacks.
+# Counters are aggregated per kind, source file and name. When disabled, instrumented paths only check enabled flag.
+class JSInstrumentation:
+    def __init__(self):
+        self.enabled: bool = False
+        self.span_callback: Callable[[JSSpan], Any] | None = None
+        self._lock = threading.Lock()
+
+        # (kind, filename, name) -> [count, total_ns, max_ns, errors, nbytes]
+        self._stats: dict[tuple[str, str, str], list[int]] = {}
+
+
+    def enable(self, span_callback: Callable[[JSSpan], Any] | None=None):
+        self.span_callback = span_callback
+        self.enabled = True
+
+
+    def disable(self):
+        self.enabled = False
+        self.span_callback = None
+
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+    def record(self, kind: str, name: str, start_ns: int, nbytes: int=0, error: bool=False, filename: str=''):
+        duration_ns: int = time.perf_counter_ns() - start_ns
+        key: tuple[str, str, str] = (kind, filename, name)
+
+        with self._lock:
+            stats: list[int] | None = self._stats.get(key)
+
+            if stats is None:
+                stats = self._stats[key] = [0, 0, 0, 0, 0]
+
+            stats[0] += 1
+            stats[1] += duration_ns
+
+            if duration_ns > stats[2]:
+                stats[2] = duration_ns
+
+            stats[3] += error
+            stats[4] += nbytes
+
+        span_callback = self.span_callback
+
+        if span_callback is not None:
+            span_callback(JSSpan(kind, name, start_ns, duration_ns, nbytes, error, filename))
+
+
+    def trace(self, kind: str, name: str, nbytes: int, func: Callable, *args) -> Any:
+        start_ns: int = time.perf_counter_ns()
+        error: bool = True
+
+        try:
+            ret: Any = func(*args)
+            error = False
+        finally:
+            self.record(kind, name, start_ns, nbytes, error)
+
+        return ret
+
+
+    def trace_call(self, kind: str, name: str, func: Callable, args: tuple | list, filename: str='') -> Any:
+        start_ns: int = time.perf_counter_ns()
+        error: bool = True
+        nbytes: int = _sizeof_args(args)
+
+        try:
+            ret: Any = func(args)
+            nbytes += _sizeof_value(ret)
+            error = False
+        finally:
+            self.record(kind, name, start_ns, nbytes, error, filename)
+
+        return ret
+
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, int | float | str]]]:
+        snapshot: dict[str, dict[str, dict[str, int | float | str]]] = {}
+
+        with self._lock:
+            items = list(self._stats.items())
+
+        # NOTE: calls and callbacks with known source file are keyed as 'filename:name'
+        for (kind, filename, name), (count, total_ns, max_ns, errors, nbytes) in items:
+            snapshot.setdefault(kind, {})[f'{filename}:{name}' if filename else name] = {
+                'filename': filename,
+                'name': name,
+                'count': count,
+                'total_ns': total_ns,
+                'mean_ns': total_ns / count,
+                'max_ns': max_ns,
+                'errors': errors,
+                'nbytes': nbytes,
+            }
+
+        return snapshot
+
+
+instrumentation = JSInstrumentation()
@@ -0,0 +1,200 @@
+__all__ = [
+    'JSPipeline',
+    'JSPipelineStats',
+]
+
+import os
+import time
+from mmap import mmap
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from concurrent.futures import Future
+from typing import Any, Iterable, Iterator
+
+from .quickjs import JSContext, JSFunction
+from .process_pool import JSProcessPool
+
+
+# Throughput counters of JSPipeline. elapsed is time spent reading, parsing and transforming batches,
+# time spent by consumer of results is not included.
+@dataclass
+class JSPipelineStats:
+    batches: int = 0
+    lines: int = 0
+    records: int = 0
+    results: int = 0
+    nbytes: int = 0
+    elapsed: float = 0.0
+
+
+    @property
+    def records_per_sec(self) -> float:
+        return self.records / self.elapsed if self.elapsed else 0.0
+
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.nbytes / self.elapsed if self.elapsed else 0.0
+
+
+def _iter_lines(source: Any) -> Iterator[bytes | str]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from f
+    elif isinstance(source, mmap):
+        yield from iter(source.readline, b'')
+    else:
+        # NOTE: files and iterables of lines, with or without line breaks
+        yield from source
+
+
+def _iter_batches(lines: Iterator[bytes | str], batch_size: int) -> Iterator[tuple[bytes, int]]:
+    while True:
+        batch: list[bytes | str] = list(islice(lines, batch_size))
+
+        if not batch:
+            break
+
+        # NOTE: line break is added to lines without it, so lines with and without it can be mixed
+        if isinstance(batch[0], str):
+            data: bytes = ''.join([line if line.endswith('\n') else line + '\n' for line in batch]).encode()
+        else:
+            data = b''.join([line if line.endswith(b'\n') else line + b'\n' for line in batch])
+
+        yield data, len(batch)
+
+
+# Streams NDJSON lines from source through JS transform, see JSContext.pipeline.
+# Lines are read in batches of batch_size, each batch is parsed and transformed inside engine in single call.
+# Results are yielded in order and next batch is read only when results of previous batch are consumed,
+# with workers at most two batches per worker are in flight.
+class JSPipeline:
+    def __init__(self,
+                 ctx: JSContext,
+                 transform: JSFunction | str,
+                 source: Any,
+                 batch_size: int=1024,
+                 workers: int | JSProcessPool | None=None):
+        if batch_size < 1:
+            raise ValueError('batch_size must be at least 1')
+
+        self.ctx = ctx
+        self.source = source
+        self.batch_size = batch_size
+        self.stats = JSPipelineStats()
+
+        if isinstance(transform, str):
+            self.transform_source: str = transform
+            self.transform: JSFunction = ctx.eval(f'({transform})', '<pipeline>')
+        else:
+            self.transform_source = str(transform.toString())
+            self.transform = transform
+
+        if not isinstance(self.transform, JSFunction):
+            raise TypeError('transform must be JS function')
+
+        if workers is None:
+            self._results: Iterator[Any] = self._run()
+        else:
+            # NOTE: workers compile transform from its source, so it cannot use closures or native code
+            if '[native code]' in self.transform_source:
+                raise ValueError('transform of pipeline with workers must be JS function with source code')
+
+            self._results = self._run_workers(workers)
+
+
+    def __iter__(self) -> 'JSPipeline':
+        return self
+
+
+    def __next__(self) -> Any:
+        return next(self._results)
+
+
+    def __enter__(self) -> 'JSPipeline':
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def close(self):
+        # NOTE: closes source opened by pipeline and shuts down owned process pool
+        self._results.close()
+
+
+    def _run(self) -> Iterator[Any]:
+        stats: JSPipelineStats = self.stats
+        batches: Iterator[tuple[bytes, int]] = _iter_batches(_iter_lines(self.source), self.batch_size)
+        line: int = 0
+
+        try:
+            while True:
+                t: float = time.perf_counter()
+                batch: tuple[bytes, int] | None = next(batches, None)
+
+                if batch is None:
+                    stats.elapsed += time.perf_counter() - t
+                    break
+
+                data, n_lines = batch
+                records, results = self.ctx._run_pipeline_batch(self.transform, data, line)
+                line += n_lines
+                self._update_stats(len(data), n_lines, records, results)
+                stats.elapsed += time.perf_counter() - t
+                yield from results
+        finally:
+            batches.close()
+
+
+    def _run_workers(self, workers: int | JSProcessPool) -> Iterator[Any]:
+        stats: JSPipelineStats = self.stats
+        pool: JSProcessPool = workers if isinstance(workers, JSProcessPool) else JSProcessPool(max_workers=workers)
+        max_pending: int = 2 * pool.max_workers
+        batches: Iterator[tuple[bytes, int]] = _iter_batches(_iter_lines(self.source), self.batch_size)
+        pending: deque[tuple[Future, int, int]] = deque()
+        line: int = 0
+
+        try:
+            while True:
+                t: float = time.perf_counter()
+
+                # NOTE: keeps workers busy, while memory is bounded by number of pending batches
+                while len(pending) < max_pending:
+                    batch: tuple[bytes, int] | None = next(batches, None)
+
+                    if batch is None:
+                        break
+
+                    data, n_lines = batch
+                    pending.append((pool._submit_pipeline_batch(self.transform_source, data, line), len(data), n_lines))
+                    line += n_lines
+
+                if not pending:
+                    stats.elapsed += time.perf_counter() - t
+                    break
+
+                future, nbytes, n_lines = pending.popleft()
+                records, results = future.result()
+                self._update_stats(nbytes, n_lines, records, results)
+                stats.elapsed += time.perf_counter() - t
+                yield from results
+        finally:
+            for future, _, _ in pending:
+                future.cancel()
+
+            batches.close()
+
+            if pool is not workers:
+                pool.shutdown(cancel_futures=True)
+
+
+    def _update_stats(self, nbytes: int, n_lines: int, records: int, results: list[Any]):
+        stats: JSPipelineStats = self.stats
+        stats.batches += 1
+        stats.lines += n_lines
+        stats.records += records
+        stats.results += len(results)
+        stats.nbytes += nbytes
@@ -0,0 +1,233 @@
+__all__ = [
+    'JSContextPool',
+]
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from .quickjs import JSRuntime, JSContext, JSFunction
+
+
+# NOTE: snapshot of global names taken after preload, returned function deletes everything added later
+#   and returns number of names which could not be deleted (e.g. declared with var)
+_JS_RESET_CODE = '''
+(function () {
+    const names = new Set(Object.getOwnPropertyNames(globalThis));
+
+    return function __resetGlobals() {
+        let n = 0;
+
+        for (const name of Object.getOwnPropertyNames(globalThis)) {
+            if (!names.has(name) && !delete globalThis[name]) {
+                n++;
+            }
+        }
+
+        return n;
+    };
+})()
+'''
+
+
+class _PooledContext:
+    def __init__(self, ctx: JSContext, reset: JSFunction, malloc_size: int):
+        self.ctx = ctx
+        self.reset = reset
+        self.malloc_size = malloc_size
+        self.uses = 0
+
+
+# Pool of pre-warmed contexts sharing single runtime.
+# On return, globals added during lease are deleted. Context is discarded and replaced
+# if some of them cannot be deleted, after max_uses leases, or if runtime memory grew
+# more than max_runtime_memory_growth bytes since context was created. If replacement cannot be created,
+# e.g. on memory limit, slot is kept and next lease which gets it retries and raises error.
+# NOTE: QuickJS reports memory of whole runtime only, so growth caused by other contexts of runtime,
+#   pooled or not, recycles whichever context is returned next, use runtime dedicated to pool
+# NOTE: top-level let/const/class declarations and changes of preexisting globals
+#   (e.g. Array.prototype) are not reset, use max_uses=1 for such scripts.
+class JSContextPool:
+    def __init__(self,
+                 rt: JSRuntime | None=None,
+                 size: int=4,
+                 preload: list[str] | None=None,
+                 max_uses: int | None=None,
+                 max_runtime_memory_growth: int | None=None):
+        self.rt = rt if rt is not None else JSRuntime()
+        self.size = size
+        self.preload = list(preload or [])
+        self.max_uses = max_uses
+        self.max_runtime_memory_growth = max_runtime_memory_growth
+
+        self._cond = threading.Condition()
+        self._idle: list[_PooledContext] = []
+        self._in_use: int = 0
+        self._closed = False
+
+        # NOTE: slots whose replacement context could not be created, they are created again on lease
+        self._missing: int = 0
+
+        # stats
+        self.created: int = 0
+        self.recycled: int = 0
+        self.leases: int = 0
+        self.waits: int = 0
+        self.wait_time_total: float = 0.0
+        self.wait_time_max: float = 0.0
+
+        for _ in range(size):
+            self._idle.append(self._new_pooled_context())
+
+
+    def __enter__(self) -> 'JSContextPool':
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def _new_pooled_context(self) -> _PooledContext:
+        ctx: JSContext = self.rt.new_context()
+
+        for path_or_url in self.preload:
+            ctx.load(path_or_url)
+
+        reset: JSFunction = ctx.eval(_JS_RESET_CODE, '<pool>')
+        self.created += 1
+        return _PooledContext(ctx, reset, self.rt.memory_usage().malloc_size)
+
+
+    def _is_reusable(self, item: _PooledContext) -> bool:
+        n_dirty: int = item.reset()
+
+        if n_dirty:
+            return False
+
+        if self.max_uses is not None and item.uses >= self.max_uses:
+            return False
+
+        if self.max_runtime_memory_growth is not None and self.rt.memory_usage().malloc_size - item.malloc_size > self.max_runtime_memory_growth:
+            return False
+
+        return True
+
+
+    def _acquire(self, timeout: float | None=None) -> _PooledContext:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('JSContextPool is closed')
+
+            if not self._idle and not self._missing:
+                self.waits += 1
+                t = time.perf_counter()
+
+                if not self._cond.wait_for(lambda: self._idle or self._missing or self._closed, timeout):
+                    raise TimeoutError('No context available in JSContextPool')
+
+                if self._closed:
+                    raise RuntimeError('JSContextPool is closed')
+
+                wait_time: float = time.perf_counter() - t
+                self.wait_time_total += wait_time
+                self.wait_time_max = max(self.wait_time_max, wait_time)
+
+            self._in_use += 1
+
+            if self._idle:
+                item: _PooledContext = self._idle.pop()
+                item.uses += 1
+                self.leases += 1
+                return item
+
+            self._missing -= 1
+
+        # NOTE: context of missing slot is created outside of lock, slot stays missing if it fails again
+        try:
+            item = self._new_pooled_context()
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._missing += 1
+                self._cond.notify()
+
+            raise
+
+        with self._cond:
+            item.uses += 1
+            self.leases += 1
+
+        return item
+
+
+    def _release(self, item: _PooledContext):
+        try:
+            is_reusable: bool = self._is_reusable(item)
+        except Exception:
+            is_reusable = False
+
+        new_item: _PooledContext | None = item
+        recycled: bool = False
+
+        try:
+            if not is_reusable:
+                item.ctx.free()
+                recycled = True
+                new_item = None
+                new_item = self._new_pooled_context()
+        except Exception:
+            # NOTE: replacement failed, e.g. on memory limit or failing preload,
+            #   next lease retries it and raises error to its caller
+            pass
+        finally:
+            # NOTE: counters are updated under lock, so concurrent releases do not lose increments
+            with self._cond:
+                self._in_use -= 1
+                self.recycled += recycled
+
+                if new_item is None:
+                    self._missing += 1
+                    self._cond.notify()
+                elif self._closed:
+                    new_item.ctx.free()
+                else:
+                    self._idle.append(new_item)
+                    self._cond.notify()
+
+
+    @contextmanager
+    def lease(self, timeout: float | None=None) -> Iterator[JSContext]:
+        item: _PooledContext = self._acquire(timeout)
+
+        try:
+            yield item.ctx
+        finally:
+            self._release(item)
+
+
+    def stats(self) -> dict[str, Any]:
+        with self._cond:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'in_use': self._in_use,
+                'missing': self._missing,
+                'created': self.created,
+                'recycled': self.recycled,
+                'leases': self.leases,
+                'waits': self.waits,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max,
+            }
+
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for item in idle:
+            item.ctx.free()
@@ -0,0 +1,132 @@
+__all__ = [
+    'JSProcessPool',
+    'JSRemoteError',
+]
+
+import json
+from itertools import repeat
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Iterable, Iterator
+
+from .quickjs import JSEval, JSRuntime, JSContext, JSFunction, JSError
+
+
+# NOTE: resolves dotted function path from globalThis, calls it with JSON encoded arguments
+#   and returns JSON encoded result, so each job crosses FFI boundary once
+_JS_CALL_CODE = '''
+(function (path, args) {
+    let thisArg = globalThis;
+    let func = globalThis;
+
+    for (const name of path.split('.')) {
+        thisArg = func;
+        func = func[name];
+    }
+
+    if (typeof func !== 'function') {
+        throw new TypeError(`${path} is not a function`);
+    }
+
+    const result = func.apply(thisArg, JSON.parse(args));
+    return result === undefined ? 'null' : JSON.stringify(result);
+})
+'''
+
+# per worker process state
+_worker_rt: JSRuntime | None = None
+_worker_ctx: JSContext | None = None
+_worker_call: JSFunction | None = None
+
+# pipeline transforms compiled in worker, by source code
+_worker_transforms: dict[str, JSFunction] = {}
+
+
+def _init_worker(preload: list[str]):
+    global _worker_rt, _worker_ctx, _worker_call
+
+    _worker_rt = JSRuntime()
+    _worker_ctx = _worker_rt.new_context()
+
+    for path_or_url in preload:
+        if path_or_url.endswith('.mjs'):
+            _worker_ctx.load(path_or_url, eval_flags=JSEval.TYPE_MODULE)
+        else:
+            _worker_ctx.load(path_or_url)
+
+    _worker_call = _worker_ctx.eval(_JS_CALL_CODE, '<process_pool>')
+
+
+# NOTE: JSError holds pointers into worker runtime, so it cannot be sent back to parent process
+class JSRemoteError(Exception):
+    pass
+
+
+def _get_error_message(e: JSError) -> str:
+    # NOTE: String() also converts thrown values without toString method, e.g. null or undefined
+    try:
+        return str(_worker_ctx.eval('String')(e))
+    except JSError:
+        return 'uncaught exception'
+
+
+def _call_job(function_path: str, args: tuple | list) -> Any:
+    try:
+        ret: str = str(_worker_call(function_path, json.dumps(args)))
+    except JSError as e:
+        raise JSRemoteError(_get_error_message(e)) from None
+
+    return json.loads(ret)
+
+
+def _pipeline_job(transform_source: str, data: bytes, line: int) -> tuple[int, list[Any]]:
+    try:
+        transform: JSFunction | None = _worker_transforms.get(transform_source)
+
+        if transform is None:
+            transform = _worker_transforms[transform_source] = _worker_ctx.eval(f'({transform_source})', '<pipeline>')
+
+        ret: tuple[int, list[Any]] = _worker_ctx._run_pipeline_batch(transform, data, line)
+    except JSError as e:
+        raise JSRemoteError(_get_error_message(e)) from None
+
+    return ret
+
+
+# Executor running JS functions in worker processes, each owning its own runtime and context.
+# Arguments and results must be JSON serializable, they are passed to JS with JSON.parse
+# and returned with JSON.stringify.
+class JSProcessPool:
+    def __init__(self, preload: list[str] | None=None, max_workers: int | None=None):
+        self.preload = list(preload or [])
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(self.preload,),
+        )
+
+        self.max_workers: int = self._executor._max_workers
+
+
+    def __enter__(self) -> 'JSProcessPool':
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+
+    def submit(self, function_path: str, *args) -> Future:
+        return self._executor.submit(_call_job, function_path, args)
+
+
+    def map(self, function_path: str, iterable_of_args: Iterable[tuple | list], chunksize: int=1) -> Iterator[Any]:
+        return self._executor.map(_call_job, repeat(function_path), iterable_of_args, chunksize=chunksize)
+
+
+    def _submit_pipeline_batch(self, transform_source: str, data: bytes, line: int) -> Future:
+        return self._executor.submit(_pipeline_job, transform_source, data, line)
+
+
+    def shutdown(self, wait: bool=True, cancel_futures: bool=False):
+        self._executor.shutdown(wait=wait, cancel_futures=cancel_futures)
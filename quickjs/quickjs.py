@@ -5,18 +5,37 @@ __all__ = [
     'JSContext',
     'JSValue',
     'JSError',
+    'JSTimeoutError',
+    'JSMemoryUsage',
+    'primitive_args',
+    'lazy_proxy',
+    'lazy_iter',
 ]
 
 import os
 import re
+import sys
+import json
+import time
+import asyncio
 import inspect
-import tempfile
-import urllib.request
+import operator
+import threading
+from array import array
+from itertools import islice
+from functools import partial
 from enum import Enum
-from weakref import WeakSet
-from typing import Any, NewType
+from contextlib import contextmanager
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, fields
+from weakref import WeakSet, WeakKeyDictionary
+from typing import Any, Callable, Iterable, Iterator, NewType
 
 from ._quickjs import ffi, lib
+from .cache import JSBytecodeCache, JSModuleCache, download_file
+from .instrument import instrumentation as _instrumentation, _sizeof_args, _sizeof_value
+from .resolver import JSModuleResolver
 
 
 _void_p = NewType('void*', ffi.typeof('void*'))
@@ -34,7 +53,14 @@ _JSModuleDef = NewType('JSModuleDef', ffi.typeof('JSModuleDef'))
 _JSModuleDef_P = NewType('JSModuleDef*', ffi.typeof('JSModuleDef*'))
 
 
-_c_temp: set[Any] = set()
+# handles of Python callables referenced by JS functions, released by JS class finalizer
+_py_func_handles: set[Any] = set()
+
+# handles of Python objects referenced by lazy JS proxies, released by JS class finalizer
+_py_proxy_handles: set[Any] = set()
+
+# handles of Python buffers wrapped by JS ArrayBuffers, released by ArrayBuffer free function
+_array_buffer_handles: set[Any] = set()
 
 # Regular expression pattern to match URLs
 url_pattern = re.compile(r'^(?:http|ftp|https)://')
@@ -123,6 +149,32 @@ class JSEval(Enum):
     FLAG_ASYNC = JS_EVAL_FLAG_ASYNC
 
 
+# /* Object Writer/Reader (currently only used to handle precompiled code) */
+#define JS_WRITE_OBJ_BYTECODE  (1 << 0) /* allow function/module */
+JS_WRITE_OBJ_BYTECODE = 1 << 0
+#define JS_READ_OBJ_BYTECODE  (1 << 0) /* allow function/module */
+JS_READ_OBJ_BYTECODE = 1 << 0
+
+#define JS_ATOM_NULL 0
+JS_ATOM_NULL = 0
+
+# /* flags for object properties */
+#define JS_PROP_CONFIGURABLE  (1 << 0)
+JS_PROP_CONFIGURABLE = 1 << 0
+#define JS_PROP_WRITABLE      (1 << 1)
+JS_PROP_WRITABLE = 1 << 1
+#define JS_PROP_ENUMERABLE    (1 << 2)
+JS_PROP_ENUMERABLE = 1 << 2
+#define JS_PROP_GETSET        (1 << 4)
+JS_PROP_GETSET = 1 << 4
+
+# /* flags for JS_GetOwnPropertyNames */
+#define JS_GPN_STRING_MASK  (1 << 0)
+JS_GPN_STRING_MASK = 1 << 0
+#define JS_GPN_ENUM_ONLY    (1 << 4)
+JS_GPN_ENUM_ONLY = 1 << 4
+
+
 # special values
 JS_NULL: _JSValue = lib._macro_JS_MKVAL(JSTag.NULL.value, 0)
 JS_UNDEFINED: _JSValue = lib._macro_JS_MKVAL(JSTag.UNDEFINED.value, 0)
@@ -154,9 +206,76 @@ def _JS_Eval(_ctx: _JSContext_P, buf: str, filename: str='<inupt>', eval_flags:
     return _val
 
 
+def _JS_WriteBytecode(_ctx: _JSContext_P, _obj: _JSValue) -> bytes | None:
+    _size_p = ffi.new('size_t*')
+    _buf = lib.JS_WriteObject(_ctx, _size_p, _obj, JS_WRITE_OBJ_BYTECODE)
+
+    if _buf == ffi.NULL:
+        return None
+
+    data: bytes = ffi.unpack(ffi.cast('char*', _buf), _size_p[0])
+    lib.js_free(_ctx, _buf)
+    return data
+
+
+def _JS_ReadBytecode(_ctx: _JSContext_P, data: bytes) -> _JSValue:
+    _buf = ffi.from_buffer('uint8_t[]', data)
+    _val: _JSValue = lib.JS_ReadObject(_ctx, _buf, len(data), JS_READ_OBJ_BYTECODE)
+    return _val
+
+
+def _JS_Compile(_ctx: _JSContext_P, buf: str, filename: str, eval_flags: int, cache: JSBytecodeCache | None=None) -> _JSValue:
+    # returns object with JS_TAG_FUNCTION_BYTECODE or JS_TAG_MODULE tag, or exception
+    eval_flags |= JS_EVAL_FLAG_COMPILE_ONLY
+
+    if cache is None:
+        return _JS_Eval(_ctx, buf, filename, eval_flags)
+
+    key: str = cache.make_key(buf, filename, eval_flags)
+    data: bytes | None = cache.get(key)
+
+    if data is not None:
+        _obj: _JSValue = _JS_ReadBytecode(_ctx, data)
+
+        if not lib._inline_JS_IsException(_obj):
+            return _obj
+
+        # NOTE: unreadable entry (e.g. truncated file), drop it and compile from source
+        _JS_FreeValue(_ctx, lib.JS_GetException(_ctx))
+        cache.discard(key)
+
+    _obj: _JSValue = _JS_Eval(_ctx, buf, filename, eval_flags)
+
+    if lib._inline_JS_IsException(_obj):
+        return _obj
+
+    data = _JS_WriteBytecode(_ctx, _obj)
+
+    if data is not None:
+        cache.put(key, data)
+    else:
+        _JS_FreeValue(_ctx, lib.JS_GetException(_ctx))
+
+    return _obj
+
+
+def _JS_EvalCompiled(_ctx: _JSContext_P, _obj: _JSValue) -> _JSValue:
+    if lib._inline_JS_IsException(_obj):
+        return _obj
+
+    if _obj.tag == lib.JS_TAG_MODULE:
+        if lib.JS_ResolveModule(_ctx, _obj) < 0:
+            _JS_FreeValue(_ctx, _obj)
+            return JS_EXCEPTION
+
+    # NOTE: JS_EvalFunction frees _obj
+    _val: _JSValue = lib.JS_EvalFunction(_ctx, _obj)
+    return _val
+
+
 def stringify_object(_ctx: _JSContext_P, _obj: _JSValue) -> str:
     _this: _JSValue = lib.JS_GetGlobalObject(_ctx)
-    _func = lib.JS_GetPropertyStr(_ctx, _this, b'__stringifyObject')
+    _func = lib._inline_JS_GetProperty(_ctx, _this, JSContext.get_qjscontext(_ctx).atom_cache.get('__stringifyObject'))
     jsargs_len = 1
     _jsargs: _JSValue_P = ffi.new('JSValue[]', [_obj])
 
@@ -174,607 +293,2833 @@ def stringify_object(_ctx: _JSContext_P, _obj: _JSValue) -> str:
 
 
 def convert_jsvalue_to_pyvalue(_ctx: _JSContext_P, _val: _JSValue, _this: _JSValue=JS_UNDEFINED) -> Any:
-    is_exception: bool = lib._inline_JS_IsException(_val)
-
-    if is_exception:
-        # NOTE: use to debug internal JS errors
-        #   lib.js_std_dump_error(_ctx)
-        _e_val = lib.JS_GetException(_ctx)
-        e = JSError(_ctx, _e_val)
-        _JS_FreeValue(_ctx, _val)
-        raise e
-
-    if _val.tag == lib.JS_TAG_FIRST:
-        raise NotImplementedError('JS_TAG_FIRST')
-    elif _val.tag == lib.JS_TAG_BIG_DECIMAL:
-        raise NotImplementedError('JS_TAG_BIG_DECIMAL')
-    elif _val.tag == lib.JS_TAG_BIG_INT:
-        val = JSBigInt(_ctx, _val)
-    elif _val.tag == lib.JS_TAG_BIG_FLOAT:
-        raise NotImplementedError('JS_TAG_BIG_FLOAT')
-    elif _val.tag == lib.JS_TAG_SYMBOL:
-        val = JSSymbol(_ctx, _val)
-    elif _val.tag == lib.JS_TAG_STRING:
-        val = JSString(_ctx, _val)
-    elif _val.tag == lib.JS_TAG_MODULE:
-        raise NotImplementedError('JS_TAG_MODULE')
-    elif _val.tag == lib.JS_TAG_FUNCTION_BYTECODE:
-        raise NotImplementedError('JS_TAG_FUNCTION_BYTECODE')
-    elif _val.tag == lib.JS_TAG_OBJECT:
-        if lib.JS_IsFunction(_ctx, _val):
-            val = JSFunction(_ctx, _val, _this)
-        elif lib.JS_IsArray(_ctx, _val):
-            val = JSArray(_ctx, _val)
-        else:
-            val = JSObject(_ctx, _val) # Object, Map, Set, etc
-    elif _val.tag == lib.JS_TAG_INT:
-        val = lib._macro_JS_VALUE_GET_INT(_val)
-    elif _val.tag == lib.JS_TAG_BOOL:
-        val: int = lib._macro_JS_VALUE_GET_BOOL(_val)
-        val: bool = bool(val)
-    elif _val.tag == lib.JS_TAG_NULL:
-        val = None
-    elif _val.tag == lib.JS_TAG_UNDEFINED:
-        val = JSUndefined(_ctx, _val)
-    elif _val.tag == lib.JS_TAG_UNINITIALIZED:
-        raise NotImplementedError('JS_TAG_CATCH_OFFSET')
-    elif _val.tag == lib.JS_TAG_CATCH_OFFSET:
-        raise NotImplementedError('JS_TAG_CATCH_OFFSET')
-    elif _val.tag == lib.JS_TAG_EXCEPTION:
-        # FIXME: handle exception
-        raise NotImplementedError('JS_TAG_EXCEPTION')
-    elif _val.tag == lib.JS_TAG_FLOAT64:
-        val = lib._macro_JS_VALUE_GET_FLOAT64(_val)
-    else:
-        _JS_FreeValue(_ctx, _val)
-        raise NotImplementedError('JS_NAN_BOXING')
+    return _JS_ToPyValue(JSContext.get_qjscontext(_ctx), _val, _this)
 
-    return val
 
+def _JS_ToPyValue(ctx: 'JSContext', _val: _JSValue, _this: _JSValue=JS_UNDEFINED) -> Any:
+    # NOTE: converter takes ownership of _val, table depends on primitive_results of context
+    convert = ctx._to_py_converters.get(_val.tag, _JS_ToPyUnsupported)
+    return convert(ctx, _val, _this)
 
-def convert_pyvalue_to_jsvalue(_ctx: _JSContext_P, val: Any) -> _JSValue:
-    if val is None:
-        _val = JS_NULL
-    elif isinstance(val, JSValue):
-        _val = val._val
-    elif isinstance(val, bool):
-        _val = JS_TRUE if val else JS_FALSE
-    elif isinstance(val, int):
-        assert -2 ** 31 <= val < 2 ** 31
-        _val = lib._macro_JS_MKVAL(JSTag.INT.value, val)
-        # _val = _JS_Eval(_ctx, f'{val}')
-    elif isinstance(val, float):
-        _val = lib._inline___JS_NewFloat64(_ctx, val)
-    elif isinstance(val, str):
-        _val = lib.JS_NewString(_ctx, val.encode())
-    elif isinstance(val, (list, tuple)):
-        _val = lib.JS_NewArray(_ctx)
-        _Array_push_atom = lib.JS_NewAtom(_ctx, b'push')
 
-        for n in val:
-            _n: _JSValue = convert_pyvalue_to_jsvalue(_ctx, n)
-            _n_p: _JSValue_P = ffi.new('JSValue[]', [_n])
+def _JS_ToPyException(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> Any:
+    # NOTE: use to debug internal JS errors
+    #   lib.js_std_dump_error(_ctx)
+    _e_val = lib.JS_GetException(ctx._ctx)
+    raise JSError(ctx._ctx, _e_val)
 
-            lib.JS_Invoke(_ctx, _val, _Array_push_atom, 1, _n_p)
 
-            ffi.release(_n_p)
-            _JS_FreeValue(_ctx, _n)
+def _JS_ToPyUnsupported(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> Any:
+    tag: int = _val.tag
+    _JS_FreeValue(ctx._ctx, _val)
 
-        lib.JS_FreeAtom(_ctx, _Array_push_atom)
-    elif isinstance(val, dict):
-        _val = lib.JS_NewObject(_ctx)
+    try:
+        name: str = f'JS_TAG_{JSTag(tag).name}'
+    except ValueError:
+        name = 'JS_NAN_BOXING'
 
-        for k, v in val.items():
-            assert isinstance(k, str)
-            _k: bytes = k.encode()
-            _v: _JSValue = convert_pyvalue_to_jsvalue(_ctx, v)
+    raise NotImplementedError(name)
 
-            lib.JS_SetPropertyStr(_ctx, _val, _k, _v)
 
-            # NOTE: line below is not required based on JS_SetPropertyStr logic
-            #   _JS_FreeValue(_ctx, _v)
-    elif callable(val):
-        val_handler: _void_p = ffi.new_handle(val)
-        _c_temp.add(val_handler)
-        _val_handler: _JSValue = lib._macro_JS_MKPTR(lib.JS_TAG_OBJECT, val_handler)
-        # _c_temp.add(_val_handler)
-
-        # val2 = JSValue(_ctx, _val_handler)
-
-        _func = lib._quikcjs_cffi_py_func_wrap
-        _length = len(inspect.signature(val).parameters)
-        _magic = 0
-        _data_len = 1
-        _data = ffi.addressof(_val_handler)
-        # _data = ffi.new('JSValue[]', [_val_handler])
-        _val = lib.JS_NewCFunctionData(_ctx, _func, _length, _magic, _data_len, _data)
-
-        # val2 = JSValue(_ctx, _val)
-    else:
-        raise ValueError(f'Unsupported Python value {type(val)}')
+def _JS_ToPyInt(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> int:
+    return _val.u.int32
 
-    # _c_temp.add(_val) # ???
-    return _val
 
+def _JS_ToPyFloat(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> float:
+    return _val.u.float64
 
-# typedef JSValue JSCFunctionData(JSContext *ctx, JSValueConst this_val, int argc, JSValueConst *argv, int magic, JSValue *func_data);
-@ffi.def_extern()
-def _quikcjs_cffi_py_func_wrap(_ctx: _JSContext_P, _this_val: _JSValueConst, _argc: int, _argv: _JSValueConst_P, _magic: int, _func_data: _JSValue_P):
-    _val_handler: _JSValue = _func_data[0]
-    _val_p: _void_p = lib._macro_JS_VALUE_GET_PTR(_val_handler)
-    val_handler = ffi.from_handle(_val_p)
-    py_func = val_handler
 
-    _jsargs = [_argv[i] for i in range(_argc)]
+def _JS_ToPyBool(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> bool:
+    return _val.u.int32 != 0
 
-    # NOTE: this is necessary to inc ref_count, so GC does not clean JS objects during function call
-    for _jsarg in _jsargs:
-        _JS_DupValue(_ctx, _jsarg)
 
-    # pyargs = [_argv[i] for i in range(_argc)]
-    # pyargs = [convert_jsvalue_to_pyvalue(_ctx, n) for n in pyargs]
-    pyargs = [convert_jsvalue_to_pyvalue(_ctx, _jsarg) for _jsarg in _jsargs]
-    ret = py_func(*pyargs)
-    _ret = convert_pyvalue_to_jsvalue(_ctx, ret)
+def _JS_ToPyNone(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> None:
+    return None
 
-    _c_temp.discard(_val_p)
-    return _ret
 
+def _JS_ToPyString(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> 'JSString':
+    return JSString(ctx._ctx, _val, ctx)
 
-def download_file_to_tempfile(url: str) -> str:
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-        with urllib.request.urlopen(url) as response:
-            temp_file.write(response.read())
-            temp_file.seek(0)
 
-        # print(f'download_file_to_tempfile {temp_file.name=}')
-        return temp_file.name
+def _JS_ToPyStringUnwrapped(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> str:
+    val: str = _JS_ToPyStr(ctx._ctx, _val)
+    _JS_FreeValue(ctx._ctx, _val)
+    return val
 
 
-def read_script(path_or_url: str, is_remote_file: bool=False) -> tuple[str, str]:
-    if is_remote_file:
-        path = download_file_to_tempfile(path_or_url)
-    elif path_or_url.startswith('http://') or path_or_url.startswith('https://'):
-        path = download_file_to_tempfile(path_or_url)
-    elif os.path.exists(path_or_url):
-        path = path_or_url
+def _JS_ToPyUndefined(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> 'JSUndefined':
+    return JSUndefined(ctx._ctx, _val, ctx)
+
+
+def _JS_ToPyBigInt(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> 'JSBigInt':
+    return JSBigInt(ctx._ctx, _val, ctx)
+
+
+def _JS_ToPySymbol(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> 'JSSymbol':
+    return JSSymbol(ctx._ctx, _val, ctx)
+
+
+def _JS_ToPyObject(ctx: 'JSContext', _val: _JSValue, _this: _JSValue) -> 'JSValue':
+    _iterator_ctor: _JSValue | None = ctx._iterator_ctor
+
+    if _iterator_ctor is None:
+        _iterator_ctor = ctx._get_iterator_ctor()
+
+    # NOTE: single native call instead of JS_IsFunction, JS_IsArray and JS_IsInstanceOf
+    kind: int = lib._quikcjs_cffi_get_object_kind(ctx._ctx, _val, _iterator_ctor)
+
+    if kind == 1:
+        return JSFunction(ctx._ctx, _val, _this, ctx)
+    elif kind == 2:
+        return JSArray(ctx._ctx, _val, ctx)
+    elif kind == 3:
+        return JSIterator(ctx._ctx, _val, ctx) # Generator, Array Iterator, Map Iterator, etc
     else:
-        for ext in ['', '.js', '.mjs']:
-            p = os.path.join('node_modules', path_or_url + ext)
+        return JSObject(ctx._ctx, _val, ctx) # Object, Map, Set, etc
+
+
+# tag -> converter of owned JS value to Python value, tags not in table are not supported
+_JSToPyConverter = Callable[['JSContext', _JSValue, _JSValue], Any]
+
+_JS_TO_PY_CONVERTERS: dict[int, _JSToPyConverter] = {
+    JS_TAG_INT: _JS_ToPyInt,
+    JS_TAG_FLOAT64: _JS_ToPyFloat,
+    JS_TAG_BOOL: _JS_ToPyBool,
+    JS_TAG_NULL: _JS_ToPyNone,
+    JS_TAG_STRING: _JS_ToPyString,
+    JS_TAG_OBJECT: _JS_ToPyObject,
+    JS_TAG_UNDEFINED: _JS_ToPyUndefined,
+    JS_TAG_BIG_INT: _JS_ToPyBigInt,
+    JS_TAG_SYMBOL: _JS_ToPySymbol,
+    JS_TAG_EXCEPTION: _JS_ToPyException,
+}
+
+# strings are returned as str and undefined as None, used by contexts with primitive_results
+_JS_TO_PY_PRIMITIVE_CONVERTERS: dict[int, _JSToPyConverter] = {
+    **_JS_TO_PY_CONVERTERS,
+    JS_TAG_STRING: _JS_ToPyStringUnwrapped,
+    JS_TAG_UNDEFINED: _JS_ToPyNone,
+}
+
+
+# ops of bulk conversion, must match enum in scripts/build.py
+_BULK_NULL = 0
+_BULK_FALSE = 1
+_BULK_TRUE = 2
+_BULK_INT = 3
+_BULK_FLOAT = 4
+_BULK_STRING = 5
+_BULK_ARRAY = 6
+_BULK_OBJECT = 7
+_BULK_VALUE = 8
+
+
+# Flattens nested lists/tuples/dicts into op, number and string buffers,
+# which are converted to JS values in single native call.
+# Dict keys are interned as atoms of context atom cache.
+class _JSBulkEncoder:
+    def __init__(self, _ctx: _JSContext_P):
+        self._ctx = _ctx
+        self.ops = array('i')
+        self.nums = array('d')
+        self.strs: list[bytes] = []
+        self.keys: dict[str, int] = {}
+        self.vals: list[_JSValue] = []
+        self._owned_vals: list[_JSValue] = []
+
+
+    def encode(self, val: Any):
+        ops_append = self.ops.append
+        nums_append = self.nums.append
+        strs_append = self.strs.append
+        keys = self.keys
+
+        def encode(val: Any):
+            t = type(val)
+
+            if t is str:
+                b: bytes = val.encode()
+                ops_append(_BULK_STRING)
+                ops_append(len(b))
+                strs_append(b)
+            elif t is int:
+                if -2 ** 31 <= val < 2 ** 31:
+                    ops_append(_BULK_INT)
+                    ops_append(val)
+                else:
+                    # NOTE: JS numbers represent integers exactly up to 2 ** 53
+                    assert -2 ** 53 <= val <= 2 ** 53
+                    ops_append(_BULK_FLOAT)
+                    nums_append(val)
+            elif t is float:
+                ops_append(_BULK_FLOAT)
+                nums_append(val)
+            elif val is None:
+                ops_append(_BULK_NULL)
+            elif t is bool:
+                ops_append(_BULK_TRUE if val else _BULK_FALSE)
+            elif t is list or t is tuple:
+                ops_append(_BULK_ARRAY)
+                ops_append(len(val))
+
+                for n in val:
+                    encode(n)
+            elif t is dict:
+                ops_append(_BULK_OBJECT)
+                ops_append(len(val))
+
+                for k, v in val.items():
+                    assert isinstance(k, str)
+                    key_index: int | None = keys.get(k)
+
+                    if key_index is None:
+                        key_index = keys[k] = len(keys)
+
+                    ops_append(key_index)
+                    encode(v)
+            elif isinstance(val, JSValue):
+                self.encode_value(val._val)
+            # NOTE: subclasses of builtin types, e.g. IntEnum or OrderedDict
+            elif isinstance(val, bool):
+                encode(bool(val))
+            elif isinstance(val, int):
+                encode(int(val))
+            elif isinstance(val, float):
+                encode(float(val))
+            elif isinstance(val, str):
+                encode(str.__str__(val))
+            elif isinstance(val, (list, tuple)):
+                encode(list(val))
+            elif isinstance(val, dict):
+                encode(dict(val))
+            else:
+                _val: _JSValue = convert_pyvalue_to_jsvalue(self._ctx, val)
+                self._owned_vals.append(_val)
+                self.encode_value(_val)
 
-            if os.path.exists(p):
-                path = p
-                break
-        else:
-            raise ValueError(path_or_url)
+        encode(val)
 
-    with open(path) as f:
-        data: str = f.read()
 
-    return path, data
+    def encode_value(self, _val: _JSValue):
 
+        self.ops.append(_BULK_VALUE)
+        self.ops.append(len(self.vals))
+        self.vals.append(_val)
 
-# JSModuleDef *js_module_loader(JSContext *ctx, const char *module_name, void *opaque);
-@ffi.def_extern()
-def _quikcjs_cffi_js_module_loader(_ctx: _JSContext_P, _module_name: _const_char_p, _opaque: _void_p) -> _JSModuleDef_P:
-    # print(f'!!! _quikcjs_cffi_js_module_loader {_ctx=} {ffi.string(_module_name)=} {_opaque=}')
-    module_name: bytes = ffi.string(_module_name)
-    module_name: str = module_name.decode()
-    is_remote_file: bool = module_name.startswith('http://') or module_name.startswith('https://')
-    # print(f'_quikcjs_cffi_js_module_loader [0] {module_name=} {is_remote_file=}')
 
-    path: str
-    data: str
-    path, data = read_script(module_name, is_remote_file)
-    _path: bytes = path.encode()
+    def to_jsvalue(self) -> _JSValue:
+        _ctx: _JSContext_P = self._ctx
+        atom_cache: _JSAtomCache = JSContext.get_qjscontext(_ctx).atom_cache
 
-    _module_def: _JSModuleDef_P = lib.js_module_loader(_ctx, _path, _opaque)
-    # print(f'_quikcjs_cffi_js_module_loader [1] {path=} {_module_def=}')
-    return _module_def
+        # NOTE: keys are interned in context atom cache, dup protects them from eviction during conversion
+        _atoms = array('I', [lib.JS_DupAtom(_ctx, atom_cache.get(k)) for k in self.keys])
+        _vals = ffi.new('JSValue[]', self.vals) if self.vals else ffi.NULL
 
+        try:
+            _val: _JSValue = lib._quikcjs_cffi_bulk_to_jsvalue(
+                _ctx,
+                ffi.from_buffer('int32_t[]', self.ops),
+                ffi.from_buffer('double[]', self.nums),
+                b''.join(self.strs),
+                ffi.from_buffer('JSAtom[]', _atoms),
+                _vals,
+            )
+        finally:
+            for _atom in _atoms:
+                lib.JS_FreeAtom(_ctx, _atom)
 
-class JSRuntime:
-    def __init__(self):
-        self._rt = lib.JS_NewRuntime()
-        self.ctxs: WeakSet['JSContext'] = WeakSet()
-        lib.js_std_init_handlers(self._rt)
+            self.free()
 
-        lib.JS_SetModuleLoaderFunc(
-            self._rt,
-            ffi.cast('JSModuleNormalizeFunc*', 0),
-            # lib.js_module_loader,
-            lib._quikcjs_cffi_js_module_loader,
-            ffi.cast('void*', 0),
-        )
+        if lib._inline_JS_IsException(_val):
+            _e_val: _JSValue = lib.JS_GetException(_ctx)
+            raise JSError(_ctx, _e_val)
 
+        return _val
 
-    def __del__(self):
-        for ctx in self.ctxs:
-            ctx.free()
 
-        self.ctxs = None
-        lib.js_std_free_handlers(self._rt)
-        lib.JS_FreeRuntime(self._rt)
+    def free(self):
+        for _owned_val in self._owned_vals:
+            _JS_FreeValue(self._ctx, _owned_val)
 
+        self._owned_vals = []
 
-    free = __del__
 
+# Reads flattened JS value written by native walker into dicts, lists, str, int, float, bool and None.
+# Functions, symbols and big numbers are returned as JSValue objects.
+class _JSBulkDecoder:
+    def __init__(self, _ctx: _JSContext_P, ops: array, nums: array, strs: str, vals: list[Any]):
+        self._ctx = _ctx
+        self.ops = ops
+        self.nums = nums
+        self.strs = strs
+        self.vals = vals
+
+
+    def decode(self) -> Any:
+        next_op = iter(self.ops).__next__
+        next_num = iter(self.nums).__next__
+        strs: str = self.strs
+        strs_pos: int = 0
+        vals: list[Any] = self.vals
+        keys: dict[str, str] = {}
+        intern_key = keys.setdefault
+
+        # NOTE: strings and numbers are read inline in array and object loops, only nested values recurse
+        def decode(op: int) -> Any:
+            nonlocal strs_pos
+
+            if op == _BULK_ARRAY:
+                val: list[Any] = []
+                append = val.append
+
+                for _ in range(next_op()):
+                    op = next_op()
+
+                    if op == _BULK_STRING:
+                        n: int = next_op()
+                        append(strs[strs_pos:strs_pos + n])
+                        strs_pos += n
+                    elif op == _BULK_INT:
+                        append(next_op())
+                    elif op == _BULK_FLOAT:
+                        append(next_num())
+                    else:
+                        append(decode(op))
+
+                return val
+            elif op == _BULK_OBJECT:
+                val: dict[str, Any] = {}
+
+                for _ in range(next_op()):
+                    n: int = next_op()
+                    key: str = strs[strs_pos:strs_pos + n]
+                    key = intern_key(key, key)
+                    strs_pos += n
+                    op = next_op()
+
+                    if op == _BULK_STRING:
+                        n = next_op()
+                        val[key] = strs[strs_pos:strs_pos + n]
+                        strs_pos += n
+                    elif op == _BULK_INT:
+                        val[key] = next_op()
+                    elif op == _BULK_FLOAT:
+                        val[key] = next_num()
+                    else:
+                        val[key] = decode(op)
+
+                return val
+            elif op == _BULK_STRING:
+                n: int = next_op()
+                val: str = strs[strs_pos:strs_pos + n]
+                strs_pos += n
+                return val
+            elif op == _BULK_INT:
+                return next_op()
+            elif op == _BULK_FLOAT:
+                return next_num()
+            elif op == _BULK_NULL:
+                return None
+            elif op == _BULK_TRUE:
+                return True
+            elif op == _BULK_FALSE:
+                return False
+            elif op == _BULK_VALUE:
+                return vals[next_op()]
+            else:
+                raise ValueError(f'Invalid bulk conversion op {op}')
 
-    def new_context(self) -> 'JSContext':
-        ctx = JSContext(self)
-        return ctx
+        return decode(next_op())
 
 
-    def add_qjscontext(self, ctx: 'JSContext'):
-        self.ctxs.add(ctx)
+_BULK_ERRORS: dict[int, str] = {
+    -2: 'Cyclic JS value',
+    -3: 'JS value exceeds max_depth',
+    -4: 'JS value exceeds max_size',
+}
 
 
-    def del_qjscontext(self, ctx: 'JSContext'):
-        self.ctxs.discard(ctx)
+def _JS_ToPyValueBulk(_ctx: _JSContext_P, _val: _JSValue, max_depth: int=256, max_size: int | None=None) -> Any:
+    _w = ffi.new('_quikcjs_cffi_bulk_writer*')
+    _w.max_depth = max_depth
+    _w.max_count = -1 if max_size is None else max_size
 
+    try:
+        ret: int = lib._quikcjs_cffi_bulk_from_jsvalue(_ctx, _val, _w)
 
-class JSContext:
-    c_to_py_context_map: dict[_JSContext_P, 'JSContext'] = {}
+        # NOTE: values passed by reference are owned by returned JSValue objects
+        _vals: list[_JSValue] = [ffi.new('JSValue*', _w.vals[i])[0] for i in range(_w.vals_len)]
 
+        if ret != 0:
+            for _v in _vals:
+                _JS_FreeValue(_ctx, _v)
 
-    def __init__(self, rt: JSRuntime):
-        self.rt = rt
-        self._ctx = _ctx = lib.JS_NewContext(self.rt._rt)
-        rt.add_qjscontext(self)
-        JSContext.set_qjscontext(_ctx, self)
-        self.qjsvalues: WeakSet[JSValue] = WeakSet()
-        self.cffi_handle_rc: dict[_void_p, int] = {}
-        lib.JS_AddIntrinsicBigFloat(_ctx)
-        lib.JS_AddIntrinsicBigDecimal(_ctx)
-        lib.JS_AddIntrinsicOperators(_ctx)
-        lib.JS_EnableBignumExt(_ctx, True)
-        lib.js_init_module_std(_ctx, b'std')
-        lib.js_init_module_os(_ctx, b'os')
-
-        # stringify object
-        code = '''
-        /*
-         * crypto - minimal polyfill for Yjs
-         */
-        if (!globalThis.crypto) {
-            globalThis.crypto = {
-                getRandomValues: function(array) {
-                    for (let i = 0; i < array.length; i++) {
-                        array[i] = Math.floor(Math.random() * 256);
-                    }
-
-                    return array;
-                }
-            };
-        }
+            if ret == -1:
+                _e_val: _JSValue = lib.JS_GetException(_ctx)
+                raise JSError(_ctx, _e_val)
 
-        /*
-         * browser console.log/toString like polyfill
-         */
-        function stringifyObject(obj) {
-            // Use a WeakSet for tracking seen objects to allow garbage collection
-            const seen = new WeakSet();
-
-            function stringifyHelper(obj) {
-                // If we've already seen this object, return a placeholder to avoid circular reference
-                if (typeof obj === 'object' && obj !== null) {
-                    if (seen.has(obj)) {
-                        return '[Circular]';
-                    }
-                    seen.add(obj);
-                }
+            raise ValueError(_BULK_ERRORS[ret])
 
-                // Handle Symbol type
-                if (typeof obj === 'symbol') {
-                    return `"${obj.description || obj.toString()}"`;
-                }
+        vals: list[Any] = [convert_jsvalue_to_pyvalue(_ctx, _v) for _v in _vals]
+        ops = array('i')
+        ops.frombytes(ffi.buffer(_w.ops, _w.ops_len * ops.itemsize))
+        nums = array('d')
+        nums.frombytes(ffi.buffer(_w.nums, _w.nums_len * nums.itemsize))
+        strs: str = ffi.buffer(_w.strs, _w.strs_len)[:].decode('utf-8', 'surrogatepass')
+    finally:
+        lib._quikcjs_cffi_bulk_writer_free(_ctx, _w)
 
-                // Handle BigInt
-                if (typeof obj === 'bigint') {
-                    return obj.toString(); // NOTE: 'n' at the end is not returned
-                }
+    decoder = _JSBulkDecoder(_ctx, ops, nums, strs, vals)
+    return decoder.decode()
 
-                // Handle non-object types
-                if (typeof obj !== 'object' || obj === null) {
-                    return JSON.stringify(obj);
-                }
 
-                // Handle arrays
-                if (Array.isArray(obj)) {
-                    return '[' + obj.map(stringifyHelper).join(',') + ']';
-                }
+def _JS_NewValueBulk(_ctx: _JSContext_P, val: list | tuple | dict) -> _JSValue:
+    encoder = _JSBulkEncoder(_ctx)
 
-                // Handle Date objects
-                if (obj instanceof Date) {
-                    return `"${obj.toISOString()}"`;
-                }
+    try:
+        encoder.encode(val)
+    except BaseException:
+        encoder.free()
+        raise
 
-                // Handle general objects
-                let result = '{';
-                let first = true;
-                for (let key in obj) {
-                    if (obj.hasOwnProperty(key)) {
-                        if (!first) result += ',';
-                        result += `"${key}":${stringifyHelper(obj[key])}`;
-                        first = false;
-                    }
-                }
-                result += '}';
-                return result;
-            }
+    return encoder.to_jsvalue()
 
-            return stringifyHelper(obj);
-        }
 
-        if (!globalThis.__stringifyObject) {
-            globalThis.__stringifyObject = stringifyObject;
-        }
-        '''
+def _JS_ParseJSON(_ctx: _JSContext_P, data: bytes | str, filename: str='<json>') -> _JSValue:
+    # NOTE: JS_ParseJSON requires zero terminated buffer, bytes objects are always zero terminated
+    _data: bytes = data.encode() if isinstance(data, str) else bytes(data)
+    _filename: bytes = filename.encode()
+    _val: _JSValue = lib.JS_ParseJSON(_ctx, _data, len(_data), _filename)
+    return _val
 
-        _val: _JSValue = _JS_Eval(_ctx, code)
-        _JS_FreeValue(_ctx, _val)
 
+def _JS_NewValueJSON(_ctx: _JSContext_P, val: list | tuple | dict) -> _JSValue | None:
+    # NOTE: values which cannot be represented in JSON (e.g. callables, JS values, NaN) are not converted
+    try:
+        data: str = json.dumps(val, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return None
 
-    def __del__(self):
-        _ctx = self._ctx
+    _val: _JSValue = _JS_ParseJSON(_ctx, data)
 
-        for js_val in self.qjsvalues:
-            js_val.free()
+    if lib._inline_JS_IsException(_val):
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
 
-        self.qjsvalues = None
-        self._ctx = None
-        self.rt.del_qjscontext(self)
-        JSContext.del_qjscontext(_ctx)
-        lib.JS_FreeContext(_ctx)
+    return _val
 
 
-    free = __del__
+def _JS_JSONStringify(_ctx: _JSContext_P, _val: _JSValue, indent: int | str | None=None) -> str | None:
+    _space: _JSValue = JS_UNDEFINED if indent is None else convert_pyvalue_to_jsvalue(_ctx, indent)
+    _ret: _JSValue = lib.JS_JSONStringify(_ctx, _val, JS_UNDEFINED, _space)
+    _JS_FreeValue(_ctx, _space)
 
+    if lib._inline_JS_IsException(_ret):
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
 
-    def __getitem__(self, key: str) -> Any:
-        return self.get(key)
+    # NOTE: undefined, functions and symbols have no JSON representation
+    if _ret.tag == JS_TAG_UNDEFINED:
+        return None
 
+    _len_p = ffi.new('size_t*')
+    _c_str: _char_p = lib._inline_JS_ToCStringLen(_ctx, _len_p, _ret)
+    ret: str = ffi.unpack(_c_str, _len_p[0]).decode('utf-8', 'surrogatepass')
+    lib.JS_FreeCString(_ctx, _c_str)
+    _JS_FreeValue(_ctx, _ret)
+    return ret
 
-    def __setitem__(self, key: str, value: Any):
-        self.set(key, value)
 
+_TYPED_ARRAY_FORMATS: dict[str, str] = {
+    'Int8Array': 'b',
+    'Uint8Array': 'B',
+    'Uint8ClampedArray': 'B',
+    'Int16Array': 'h',
+    'Uint16Array': 'H',
+    'Int32Array': 'i',
+    'Uint32Array': 'I',
+    'BigInt64Array': 'q',
+    'BigUint64Array': 'Q',
+    'Float32Array': 'f',
+    'Float64Array': 'd',
+}
 
-    def add_qjsvalue(self, js_value: 'JSValue'):
-        self.qjsvalues.add(js_value)
+_SIGNED_TYPED_ARRAYS: dict[int, str] = {1: 'Int8Array', 2: 'Int16Array', 4: 'Int32Array', 8: 'BigInt64Array'}
+_UNSIGNED_TYPED_ARRAYS: dict[int, str] = {1: 'Uint8Array', 2: 'Uint16Array', 4: 'Uint32Array', 8: 'BigUint64Array'}
+# NOTE: this QuickJS has no Float16Array, so half floats are exposed as bytes
+_FLOAT_TYPED_ARRAYS: dict[int, str] = {4: 'Float32Array', 8: 'Float64Array'}
 
 
-    @classmethod
-    def get_qjscontext(cls, _ctx: _JSContext_P) -> 'JSContext':
-        ctx = cls.c_to_py_context_map[_ctx]
-        return ctx
+def _get_typed_array_name(format: str, itemsize: int) -> str:
+    # NOTE: only native byte order can be viewed by TypedArray, everything else is exposed as bytes
+    native_order: str = '<' if sys.byteorder == 'little' else '>'
 
+    if format[:1] in ('@', '=', native_order):
+        format = format[1:]
 
-    @classmethod
-    def set_qjscontext(cls, _ctx: _JSContext_P, ctx: 'JSContext'):
-        cls.c_to_py_context_map[_ctx] = ctx
+    if format in ('b', 'h', 'i', 'l', 'q', 'n'):
+        return _SIGNED_TYPED_ARRAYS.get(itemsize, 'Uint8Array')
+    elif format in ('B', 'H', 'I', 'L', 'Q', 'N'):
+        return _UNSIGNED_TYPED_ARRAYS.get(itemsize, 'Uint8Array')
+    elif format in ('e', 'f', 'd'):
+        return _FLOAT_TYPED_ARRAYS.get(itemsize, 'Uint8Array')
 
+    return 'Uint8Array'
 
-    @classmethod
-    def del_qjscontext(cls, _ctx: _JSContext_P):
-        del cls.c_to_py_context_map[_ctx]
 
+# void JSFreeArrayBufferDataFunc(JSRuntime *rt, void *opaque, void *ptr);
+@ffi.def_extern()
+def _quikcjs_cffi_free_array_buffer(_rt: Any, _opaque: _void_p, _ptr: _void_p):
+    _data = ffi.from_handle(_opaque)
+    _array_buffer_handles.discard(_opaque)
 
-    def get(self, key: str) -> Any:
-        _ctx = self._ctx
-        _this: _JSValue = lib.JS_GetGlobalObject(_ctx)
-        _key = key.encode()
-        _key_atom = lib.JS_NewAtom(_ctx, _key)
+    # NOTE: release Python buffer, e.g. bytearray can be resized again
+    ffi.release(_data)
 
-        _val = lib._inline_JS_GetProperty(_ctx, _this, _key_atom)
-        val = convert_jsvalue_to_pyvalue(_ctx, _val)
 
-        if isinstance(val, JSValue):
-            self.add_qjsvalue(val)
+def _JS_NewTypedArray(_ctx: _JSContext_P, val: Any) -> _JSValue:
+    view = memoryview(val)
+    name: str = _get_typed_array_name(view.format, view.itemsize)
 
-        lib.JS_FreeAtom(_ctx, _key_atom)
-        _JS_FreeValue(_ctx, _this)
-        return val
+    if not view.c_contiguous:
+        view = memoryview(view.tobytes())
 
+    if view.readonly:
+        # NOTE: JS cannot respect read-only memory, so immutable buffers (e.g. bytes) are copied
+        _data = ffi.from_buffer('uint8_t[]', view)
+        _buf: _JSValue = lib.JS_NewArrayBufferCopy(_ctx, _data, view.nbytes)
+        ffi.release(_data)
+    else:
+        # NOTE: ArrayBuffer wraps Python memory, which is exported until ArrayBuffer is freed
+        _data = ffi.from_buffer('uint8_t[]', view, require_writable=True)
+        _opaque: _void_p = ffi.new_handle(_data)
+        _array_buffer_handles.add(_opaque)
+        _buf = lib.JS_NewArrayBuffer(_ctx, _data, view.nbytes, lib._quikcjs_cffi_free_array_buffer, _opaque, False)
+
+    if lib._inline_JS_IsException(_buf):
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
+
+    _global: _JSValue = lib.JS_GetGlobalObject(_ctx)
+    _ctor: _JSValue = lib._inline_JS_GetProperty(_ctx, _global, JSContext.get_qjscontext(_ctx).atom_cache.get(name))
+    _args: _JSValue_P = ffi.new('JSValue[]', [_buf])
+    _val: _JSValue = lib.JS_CallConstructor(_ctx, _ctor, 1, _args)
+    _JS_FreeValue(_ctx, _ctor)
+    _JS_FreeValue(_ctx, _global)
+    _JS_FreeValue(_ctx, _buf)
+
+    if lib._inline_JS_IsException(_val):
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
 
-    def set(self, key: str, val: Any):
-        _ctx = self._ctx
-        _this: _JSValue = lib.JS_GetGlobalObject(_ctx)
-        _key = key.encode()
-        _key_atom = lib.JS_NewAtom(_ctx, _key)
-        _val = convert_pyvalue_to_jsvalue(_ctx, val)
+    return _val
 
-        lib._inline_JS_SetProperty(_ctx, _this, _key_atom, _val)
 
-        # NOTE: do not free _val because set does not increase ref count
-        # _JS_FreeValue(_ctx, _val)
-        lib.JS_FreeAtom(_ctx, _key_atom)
-        _JS_FreeValue(_ctx, _this)
+def _JS_GetMemoryView(val: 'JSValue') -> memoryview:
+    _ctx: _JSContext_P = val._ctx
+    _val: _JSValue = val._val
+    _sizes_p = ffi.new('size_t[3]')
+    _buf: _JSValue = lib.JS_GetTypedArrayBuffer(_ctx, _val, _sizes_p, _sizes_p + 1, _sizes_p + 2)
 
+    if lib._inline_JS_IsException(_buf):
+        # NOTE: not TypedArray, try ArrayBuffer
+        _JS_FreeValue(_ctx, lib.JS_GetException(_ctx))
+        _JS_DupValue(_ctx, _val)
+        _buf = _val
+        offset: int = 0
+        length: int | None = None
+        format: str = 'B'
+    else:
+        offset = _sizes_p[0]
+        length = _sizes_p[1]
+        format = _TYPED_ARRAY_FORMATS.get(str(val._context._get_to_string_tag(val)), 'B')
 
-    def eval(self, buf: str, filename: str='<inupt>', eval_flags: JSEval | int=JSEval.TYPE_GLOBAL) -> Any:
-        eval_flags = eval_flags if isinstance(eval_flags, int) else eval_flags.value
-        _ctx = self._ctx
+    # NOTE: view keeps ArrayBuffer alive, ArrayBuffer is freed when view is garbage collected
+    buf = JSValue(_ctx, _buf)
+    _size_p = ffi.new('size_t*')
+    _ptr = lib.JS_GetArrayBuffer(_ctx, _size_p, _buf)
 
-        _val: _JSValue = _JS_Eval(_ctx, buf, filename, eval_flags)
-        # lib.js_std_dump_error(_ctx)
+    if _ptr == ffi.NULL:
+        buf.free()
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
 
-        val: Any = convert_jsvalue_to_pyvalue(_ctx, _val)
+    if length is None:
+        length = _size_p[0]
 
-        if isinstance(val, JSValue):
-            self.add_qjsvalue(val)
+    _data = ffi.gc(_ptr + offset, lambda _data: buf.free())
+    view = memoryview(ffi.buffer(_data, length)).cast(format)
+    return view
 
-        return val
 
+_JS_INT32_MIN: int = -2 ** 31
+_JS_INT32_MAX: int = 2 ** 31 - 1
 
-    def load(self, path_or_url: str, eval_flags: JSEval | int=JSEval.TYPE_GLOBAL) -> Any:
-        path: str
-        data: str
-        path, data = read_script(path_or_url)
-        val: Any = self.eval(data, path, eval_flags)
-        return val
+# Python types converted to JS values without ref_count, so they are never freed
+_JS_UNBOXED_TYPES: tuple[type, ...] = (type(None), bool, int, float)
 
 
-class JSValue:
-    def __init__(self, _ctx: _JSContext_P, _val: _JSValue=None):
-        self._ctx = _ctx
-        self._val = _val
+def convert_pyvalue_to_jsvalue(_ctx: _JSContext_P, val: Any, json_threshold: int | None=None) -> _JSValue:
+    if val is None:
+        _val = JS_NULL
+    elif isinstance(val, JSValue):
+        _val = val._val
+    elif isinstance(val, bool):
+        _val = JS_TRUE if val else JS_FALSE
+    elif isinstance(val, int):
+        assert _JS_INT32_MIN <= val <= _JS_INT32_MAX
+        _val = lib._macro_JS_MKVAL(JS_TAG_INT, val)
+        # _val = _JS_Eval(_ctx, f'{val}')
+    elif isinstance(val, float):
+        _val = lib._inline___JS_NewFloat64(_ctx, val)
+    elif isinstance(val, str):
+        _val = lib.JS_NewString(_ctx, val.encode())
+    elif isinstance(val, _LazyProxy):
+        _val = _JS_NewPyProxy(_ctx, val.obj, val.methods)
+    elif isinstance(val, _LazyIter):
+        _val = _JS_NewPyIterator(_ctx, val.obj, val.chunk_size)
+    elif isinstance(val, (list, tuple, dict)):
+        _val = None
+
+        # NOTE: large values are encoded with json module and parsed with JS_ParseJSON
+        if json_threshold is not None and len(val) >= json_threshold:
+            _val = _JS_NewValueJSON(_ctx, val)
+
+        if _val is None:
+            _val = _JS_NewValueBulk(_ctx, val)
+    elif isinstance(val, (bytes, bytearray, memoryview)):
+        _val = _JS_NewTypedArray(_ctx, val)
+    elif callable(val):
+        _val = _JS_NewPyFunction(_ctx, val)
+    elif isinstance(val, Iterator):
+        # NOTE: generators and other iterators are not materialized, JS pulls items lazily
+        _val = _JS_NewPyIterator(_ctx, val, _JS_PY_ITER_CHUNK_SIZE)
+    else:
+        # NOTE: other objects supporting buffer protocol, e.g. numpy arrays
+        try:
+            memoryview(val)
+        except TypeError:
+            raise ValueError(f'Unsupported Python value {type(val)}') from None
 
-        ctx = JSContext.get_qjscontext(_ctx)
-        ctx.add_qjsvalue(self)
+        _val = _JS_NewTypedArray(_ctx, val)
 
+    return _val
 
-    def __del__(self):
-        # print('JSValue.__del__', self)
-        _ctx = self._ctx
-        _val = self._val
-        _rt = lib.JS_GetRuntime(_ctx)
 
-        if lib.JS_IsLiveObject(_rt, _val):
-            _JS_FreeValue(_ctx, _val)
+# per callable cache of (length, max_args) for callables without code object
+_py_func_signatures: 'WeakKeyDictionary[Any, tuple[int, int | None]]' = WeakKeyDictionary()
 
+_CO_VARARGS = inspect.CO_VARARGS
 
-    free = __del__
 
+# Marks Python callable so its JS arguments are converted to plain Python values only:
+# strings become str and undefined becomes None instead of JSValue wrappers.
+def primitive_args(func: Any) -> Any:
+    try:
+        func.__quickjs_primitive_args__ = True
+    except (AttributeError, TypeError):
+        # NOTE: builtins and bound methods do not accept attributes, so they are wrapped in partial,
+        #   which keeps signature of wrapped callable, so JS passes only arguments it accepts
+        wrapper = partial(func)
+        wrapper.__name__ = getattr(func, '__name__', '')
+        wrapper.__quickjs_primitive_args__ = True
+        return wrapper
 
-    def __repr__(self) -> str:
-        _ctx = self._ctx
-        _val = self._val
-        tag = JSTag(_val.tag)
-        val: str = stringify_object(_ctx, _val)
+    return func
 
-        if lib._macro_JS_VALUE_HAS_REF_COUNT(_val):
-            ref_count: int = lib._macro_JS_VALUE_GET_REF_COUNT(_val)
 
-            if lib.JS_IsFunction(_ctx, _val):
-                return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} ptr={_val.u.ptr} {ref_count=}>'
-            else:
-                return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} ptr={_val.u.ptr} {ref_count=} val={val}>'
-        else:
-            return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} val={val}>'
+def _get_function_signature(func: Any) -> tuple[int, int | None]:
+    # NOTE: returns (length, max_args), length is same as Function.length in JS,
+    #   number of parameters before first one with default value,
+    #   max_args is number of accepted positional arguments or None for *args
+    offset: int = 0
 
+    if inspect.ismethod(func):
+        func = func.__func__
+        offset = 1
 
-    def __getattr__(self, attr: str) -> Any:
-        _ctx = self._ctx
-        _val = self._val
-        _attr: bytes = attr.encode()
-        _ret = lib.JS_GetPropertyStr(_ctx, _val, _attr)
-        ret: Any = convert_jsvalue_to_pyvalue(_ctx, _ret, _val)
-        return ret
+    code = getattr(func, '__code__', None)
 
+    if code is not None and inspect.isfunction(func):
+        # NOTE: fast path, read arity directly from code object instead of inspect.signature
+        n_args: int = code.co_argcount - offset
+        n_defaults: int = len(func.__defaults__ or ())
+        length: int = max(0, n_args - n_defaults)
+        max_args: int | None = None if code.co_flags & _CO_VARARGS else n_args
+        return length, max_args
 
+    try:
+        return _py_func_signatures[func]
+    except (KeyError, TypeError):
+        pass
 
-class JSUndefined(JSValue):
-    pass
+    try:
+        params = inspect.signature(func).parameters.values()
+    except (TypeError, ValueError):
+        return 0, None
 
+    length = 0
+    max_args = 0
+    defaults: bool = False
 
-class JSBigInt(JSValue):
-    pass
+    for param in params:
+        if param.kind == param.VAR_POSITIONAL:
+            max_args = None
+            break
+        elif param.kind not in (param.POSITIONAL_ONLY, param.POSITIONAL_OR_KEYWORD):
+            break
 
+        if param.default is not param.empty:
+            defaults = True
 
-class JSString(JSValue):
-    def __str__(self) -> str:
-        _ctx = self._ctx
-        _val = self._val
-        _c_val: _char_p = lib._inline_JS_ToCStringLen(_ctx, ffi.NULL, _val)
-        val: bytes = ffi.string(_c_val)
-        val: str = val.decode()
-        # NOTE: _c_val is (probably) owned by QuickJS, so no need to free it
-        return val
+        if not defaults:
+            length += 1
 
+        max_args += 1
 
-class JSSymbol(JSValue):
-    pass
+    try:
+        _py_func_signatures[func] = (length, max_args)
+    except TypeError:
+        pass
 
+    return length, max_args
 
-class JSArray(JSValue):
-    pass
 
+# Dispatch record of Python callable referenced by JS function.
+class _PyFunction:
+    __slots__ = ('func', 'name', 'length', 'max_args', 'primitive_args')
 
-class JSObject(JSValue):
-    pass
 
+    def __init__(self, func: Any, name: str, length: int, max_args: int | None, primitive_args: bool):
+        self.func = func
+        self.name = name
+        self.length = length
+        self.max_args = max_args
+        self.primitive_args = primitive_args
 
-class JSFunction(JSValue):
-    def __init__(self, _ctx: _JSContext_P, _val: _JSValue=None, _this: _JSValue=JS_UNDEFINED):
-        self._ctx = _ctx
-        self._val = _val
-        self._this = _this # NOTE: this might be useful lib.JS_GetGlobalObject(_ctx)
 
-        # NOTE: required so GC does not collect it
-        _JS_DupValue(_ctx, _this)
+def _JS_NewPyFunction(_ctx: _JSContext_P, func: Any) -> _JSValue:
+    length, max_args = _get_function_signature(func)
+    name: str = getattr(func, '__name__', '')
+    record = _PyFunction(func, name, length, max_args, getattr(func, '__quickjs_primitive_args__', False))
+    _opaque: _void_p = ffi.new_handle(record)
+    _val: _JSValue = lib._quikcjs_cffi_py_func_new(_ctx, _opaque, name.encode(), length)
 
-        ctx = JSContext.get_qjscontext(_ctx)
-        ctx.add_qjsvalue(self)
+    if lib._inline_JS_IsException(_val):
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
 
+    # NOTE: handle is kept alive until JS function is garbage collected
+    _py_func_handles.add(_opaque)
+    return _val
 
-    def __call__(self, *pyargs) -> Any:
-        _ctx = self._ctx
-        _val = self._val
-        _this = self._this
-        # print(f'JSFunction.__call__ {_val=} {_val.tag=} {lib.JS_IsFunction(_ctx, _val)=} {lib._macro_JS_VALUE_GET_REF_COUNT(_val)=}')
 
-        _jsargs_len: int = len(pyargs)
-        _jsargs = [convert_pyvalue_to_jsvalue(_ctx, n) for n in pyargs]
-        # print(f'{_jsargs_len=} {_jsargs=}', [n.tag for n in _jsargs], [n.u.int32 for n in _jsargs])
+def _JS_ToPyStr(_ctx: _JSContext_P, _val: _JSValueConst) -> str:
+    _len_p = ffi.new('size_t*')
+    _c_str: _char_p = lib._inline_JS_ToCStringLen(_ctx, _len_p, _val)
+    val: str = ffi.unpack(_c_str, _len_p[0]).decode('utf-8', 'surrogatepass')
+    lib.JS_FreeCString(_ctx, _c_str)
+    return val
 
-        # NOTE: this is necessary to inc ref_count, so GC does not clean JS objects during function call
-        _JS_DupValue(_ctx, _val)
-        _JS_DupValue(_ctx, _this)
 
-        for _jsarg in _jsargs:
-            _JS_DupValue(_ctx, _jsarg)
+# typedef JSValue JSClassCall(JSContext *ctx, JSValueConst func_obj, JSValueConst this_val, int argc, JSValueConst *argv, int flags);
+@ffi.def_extern()
+def _quikcjs_cffi_py_func_call(_ctx: _JSContext_P, _func_obj: _JSValueConst, _this_val: _JSValueConst, _argc: int, _argv: _JSValueConst_P, _flags: int) -> _JSValue:
+    _opaque: _void_p = lib._quikcjs_cffi_py_func_get_opaque(_func_obj)
+    record: _PyFunction = ffi.from_handle(_opaque)
+
+    if _instrumentation.enabled:
+        start_ns: int = time.perf_counter_ns()
+        sizes: list[int] = []
+        _ret: _JSValue = _JS_CallPyFunction(_ctx, record, _argc, _argv, sizes)
+        error: bool = bool(lib._inline_JS_IsException(_ret))
+
+        # NOTE: Python function pushes no stack frame, so level 0 is JS function or script calling it
+        _atom: int = lib.JS_GetScriptOrModuleName(_ctx, 0)
+        filename: str = ''
+
+        if _atom != JS_ATOM_NULL:
+            filename = _JS_AtomToPyStr(_ctx, _atom)
+            lib.JS_FreeAtom(_ctx, _atom)
+
+        _instrumentation.record('callback', record.name or '<anonymous>', start_ns, sum(sizes), error, filename)
+        return _ret
+
+    return _JS_CallPyFunction(_ctx, record, _argc, _argv)
+
+
+def _JS_CallPyFunction(_ctx: _JSContext_P, record: _PyFunction, _argc: int, _argv: _JSValueConst_P, sizes: list[int] | None=None) -> _JSValue:
+    primitive: bool = record.primitive_args
+
+    # NOTE: arguments not accepted by Python callable are never converted
+    n_args: int = _argc
+
+    if record.max_args is not None and record.max_args < n_args:
+        n_args = record.max_args
+
+    try:
+        pyargs: list[Any] = []
+
+        for i in range(n_args):
+            _arg: _JSValueConst = _argv[i]
+            tag: int = _arg.tag
+
+            # NOTE: primitives are read directly from argv without JSValue wrappers
+            if tag == JS_TAG_INT:
+                pyargs.append(_arg.u.int32)
+            elif tag == JS_TAG_FLOAT64:
+                pyargs.append(_arg.u.float64)
+            elif tag == JS_TAG_BOOL:
+                pyargs.append(_arg.u.int32 != 0)
+            elif tag == JS_TAG_NULL:
+                pyargs.append(None)
+            elif primitive and tag == JS_TAG_STRING:
+                pyargs.append(_JS_ToPyStr(_ctx, _arg))
+            elif primitive and tag == JS_TAG_UNDEFINED:
+                pyargs.append(None)
+            else:
+                # NOTE: argv is owned by caller, so value is copied and its ref_count increased,
+                #   so it outlives this call and GC does not clean it during function call
+                _jsarg: _JSValue = ffi.new('JSValue*', _arg)[0]
+                _JS_DupValue(_ctx, _jsarg)
+                pyargs.append(convert_jsvalue_to_pyvalue(_ctx, _jsarg))
+
+        # NOTE: missing required arguments are undefined, same as arguments JS passes to its own functions
+        for i in range(n_args, record.length):
+            pyargs.append(None if primitive else convert_jsvalue_to_pyvalue(_ctx, JS_UNDEFINED))
+
+        ret = record.func(*pyargs)
+        ret_type = type(ret)
+
+        # NOTE: only collected by instrumentation, JSValue arguments are wrappers and are not counted
+        if sizes is not None:
+            sizes.append(_sizeof_args(pyargs) + _sizeof_value(ret))
+
+        if ret is None:
+            return JS_NULL
+        elif ret_type is bool:
+            return JS_TRUE if ret else JS_FALSE
+
+        _ret = convert_pyvalue_to_jsvalue(_ctx, ret)
+    except JSError as e:
+        # NOTE: rethrow JS error raised while Python function called back into JS
+        _JS_DupValue(_ctx, e._val)
+        return lib.JS_Throw(_ctx, e._val)
+    except Exception as e:
+        return lib._quikcjs_cffi_throw_internal_error(_ctx, f'{type(e).__name__}: {e}'.encode())
+
+    # NOTE: returned value is owned by caller
+    if isinstance(ret, JSValue):
+        _JS_DupValue(_ctx, _ret)
 
-        _jsargs_a: _JSValue_P = ffi.new('JSValue[]', _jsargs)
+    return _ret
 
-        _ret: _JSValue = lib.JS_Call(_ctx, _val, _this, _jsargs_len, _jsargs_a)
-        ret = convert_jsvalue_to_pyvalue(_ctx, _ret)
-        # print(f'JSFunction.__call__ {_ret=} {_ret.tag=} {lib.JS_IsArray(_ctx, _ret)=} {lib._macro_JS_VALUE_GET_REF_COUNT(_ret)=}')
-        # print(f'JSFunction.__call__ {ret=}')
 
-        ffi.release(_jsargs_a)
-        _JS_FreeValue(_ctx, _this)
-        _JS_FreeValue(_ctx, _val)
-        return ret
+# typedef void JSClassFinalizer(JSRuntime *rt, JSValue val);
+@ffi.def_extern()
+def _quikcjs_cffi_py_func_finalizer(_rt: Any, _opaque: _void_p):
+    _py_func_handles.discard(_opaque)
 
 
-    def __del__(self):
-        # print('JSFunction.__del__', self)
-        _ctx = self._ctx
-        _val = self._val
-        _this = self._this
-        _rt = lib.JS_GetRuntime(_ctx)
+# Marker of Python object passed to JS as lazy read-only proxy, see lazy_proxy.
+class _LazyProxy:
+    __slots__ = ('obj', 'methods')
 
-        if lib.JS_IsLiveObject(_rt, _val):
-            _JS_FreeValue(_ctx, _val)
 
-        if lib._inline_JS_IsObject(_this) and lib.JS_IsLiveObject(_rt, _this):
-            _JS_FreeValue(_ctx, _this)
+    def __init__(self, obj: Any, methods: bool):
+        self.obj = obj
+        self.methods = methods
 
 
-    free = __del__
+# Marks Python mapping, sequence or object to be passed to JS as lazy read-only proxy instead of deep copy.
+# Properties are converted on first access and cached by proxy, nested containers become proxies too.
+# Callable attributes of objects, e.g. methods which could modify them, are hidden unless methods is True.
+def lazy_proxy(obj: Any, methods: bool=False) -> _LazyProxy:
+    return _LazyProxy(obj, methods)
 
 
-class JSError(JSValue, Exception):
-    def __init__(self, _ctx: _JSContext_P, _val: _JSValue):
-        super().__init__(_ctx, _val)
+# kinds of Python objects behind lazy proxies
+_PY_PROXY_MAPPING = 0
+_PY_PROXY_SEQUENCE = 1
+_PY_PROXY_ATTRS = 2
 
 
-    def __str__(self) -> str:
-        return repr(self)
+# Python object referenced by lazy JS proxy.
+class _PyProxy:
+    __slots__ = ('obj', 'kind', 'methods')
 
 
-    def __repr__(self) -> str:
-        _ctx = self._ctx
-        _val: _JSValue = self._val
-        tag = JSTag(_val.tag)
+    def __init__(self, obj: Any, methods: bool):
+        self.obj = obj
+        self.methods = methods
 
-        # ???
-        # is_error = lib.JS_IsError(_ctx, _val)
+        if isinstance(obj, Mapping):
+            self.kind = _PY_PROXY_MAPPING
+        elif isinstance(obj, Sequence) and not isinstance(obj, (str, bytes, bytearray)):
+            self.kind = _PY_PROXY_SEQUENCE
+        else:
+            self.kind = _PY_PROXY_ATTRS
+
+
+    def get(self, key: str) -> tuple[bool, Any, bool]:
+        # returns (found, value, enumerable)
+        obj: Any = self.obj
+
+        if self.kind == _PY_PROXY_MAPPING:
+            try:
+                return True, obj[key], True
+            except KeyError:
+                pass
+
+            # NOTE: JS converts integer keys to strings
+            if key.isdigit() and str(int(key)) == key:
+                try:
+                    return True, obj[int(key)], True
+                except KeyError:
+                    pass
+        elif self.kind == _PY_PROXY_SEQUENCE:
+            if key == 'length':
+                return True, len(obj), False
+
+            if key.isdigit() and str(int(key)) == key and int(key) < len(obj):
+                return True, obj[int(key)], True
+        elif not key.startswith('_'):
+            # NOTE: private and dunder attributes are never exposed, methods only when enabled
+            try:
+                val: Any = getattr(obj, key)
+            except AttributeError:
+                pass
+            else:
+                if self.methods or not callable(val):
+                    return True, val, True
 
-        _c_str = _JS_ToCString(_ctx, _val)
-        val = ffi.string(_c_str) # ???
-        val = val.decode()
-        lib.JS_FreeCString(_ctx, _c_str)
+        return False, None, False
 
-        ref_count: int = lib._macro_JS_VALUE_GET_REF_COUNT(_val)
-        return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} ptr={_val.u.ptr} {ref_count=} val={val!r}>'
+
+    def keys(self) -> list[str]:
+        obj: Any = self.obj
+
+        if self.kind == _PY_PROXY_MAPPING:
+            return [str(k) for k in obj if isinstance(k, (str, int))]
+        elif self.kind == _PY_PROXY_SEQUENCE:
+            return [str(i) for i in range(len(obj))] + ['length']
+
+        keys: list[str] = list(getattr(obj, '__dict__', ()))
+
+        for cls in type(obj).__mro__:
+            slots: Any = cls.__dict__.get('__slots__', ())
+            keys.extend([slots] if isinstance(slots, str) else slots)
+
+        methods: bool = self.methods
+        return [k for k in dict.fromkeys(keys) if not k.startswith('_') and hasattr(obj, k) and (methods or not callable(getattr(obj, k)))]
+
+
+def _JS_NewPyProxy(_ctx: _JSContext_P, obj: Any, methods: bool) -> _JSValue:
+    record = _PyProxy(obj, methods)
+
+    if record.kind == _PY_PROXY_SEQUENCE:
+        _proto: _JSValue = JSContext.get_qjscontext(_ctx)._get_py_sequence_proto()._val
+    else:
+        _proto = JS_UNDEFINED
+
+    _opaque: _void_p = ffi.new_handle(record)
+    _val: _JSValue = lib._quikcjs_cffi_py_proxy_new(_ctx, _proto, _opaque)
+
+    if lib._inline_JS_IsException(_val):
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
+
+    # NOTE: handle is kept alive until JS proxy is garbage collected
+    _py_proxy_handles.add(_opaque)
+    return _val
+
+
+def _JS_NewPyProxyValue(_ctx: _JSContext_P, val: Any, methods: bool) -> _JSValue:
+    # returns owned JS value of property of proxied object
+    if val is None or isinstance(val, (bool, float, str, bytes, bytearray, memoryview, _LazyProxy, _LazyIter)) or callable(val):
+        pass
+    elif isinstance(val, int):
+        # NOTE: integers outside of int32 range are converted to JS numbers, same as in bulk conversion
+        if not _JS_INT32_MIN <= val <= _JS_INT32_MAX:
+            return lib._inline___JS_NewFloat64(_ctx, float(val))
+    elif isinstance(val, JSValue):
+        # NOTE: value stays owned by its wrapper
+        _JS_DupValue(_ctx, val._val)
+        return val._val
+    elif isinstance(val, (Mapping, Sequence)) or hasattr(val, '__dict__') or hasattr(type(val), '__slots__'):
+        return _JS_NewPyProxy(_ctx, val, methods)
+
+    return convert_pyvalue_to_jsvalue(_ctx, val)
+
+
+def _JS_AtomToPyStr(_ctx: _JSContext_P, _atom: int) -> str:
+    _c_str: _char_p = lib.JS_AtomToCString(_ctx, _atom)
+    val: str = ffi.string(_c_str).decode('utf-8', 'surrogatepass')
+    lib.JS_FreeCString(_ctx, _c_str)
+    return val
+
+
+# int get(JSContext *ctx, void *opaque, JSAtom prop, JSValue *pval), returns property flags, 0 if missing or -1 on exception
+@ffi.def_extern()
+def _quikcjs_cffi_py_proxy_get(_ctx: _JSContext_P, _opaque: _void_p, _prop: int, _pval: _JSValue_P) -> int:
+    record: _PyProxy = ffi.from_handle(_opaque)
+
+    try:
+        found, val, enumerable = record.get(_JS_AtomToPyStr(_ctx, _prop))
+
+        if not found:
+            return 0
+
+        _pval[0] = _JS_NewPyProxyValue(_ctx, val, record.methods)
+    except JSError as e:
+        _JS_DupValue(_ctx, e._val)
+        lib.JS_Throw(_ctx, e._val)
+        return -1
+    except Exception as e:
+        lib._quikcjs_cffi_throw_internal_error(_ctx, f'{type(e).__name__}: {e}'.encode())
+        return -1
+
+    return JS_PROP_CONFIGURABLE | (JS_PROP_ENUMERABLE if enumerable else 0)
+
+
+# int keys(JSContext *ctx, void *opaque, JSPropertyEnum **ptab, uint32_t *plen), returns 0 or -1 on exception
+@ffi.def_extern()
+def _quikcjs_cffi_py_proxy_keys(_ctx: _JSContext_P, _opaque: _void_p, _ptab: Any, _plen: Any) -> int:
+    record: _PyProxy = ffi.from_handle(_opaque)
+
+    try:
+        keys: list[str] = record.keys()
+    except Exception as e:
+        lib._quikcjs_cffi_throw_internal_error(_ctx, f'{type(e).__name__}: {e}'.encode())
+        return -1
+
+    # NOTE: table and atoms are owned and freed by QuickJS
+    _tab = ffi.cast('JSPropertyEnum*', lib.js_mallocz(_ctx, max(len(keys), 1) * ffi.sizeof('JSPropertyEnum')))
+
+    if _tab == ffi.NULL:
+        return -1
+
+    for i, key in enumerate(keys):
+        _key: bytes = key.encode('utf-8', 'surrogatepass')
+        _tab[i].atom = lib.JS_NewAtomLen(_ctx, _key, len(_key))
+        _tab[i].is_enumerable = 1
+
+    _ptab[0] = _tab
+    _plen[0] = len(keys)
+    return 0
+
+
+@ffi.def_extern()
+def _quikcjs_cffi_py_proxy_finalizer(_rt: Any, _opaque: _void_p):
+    _py_proxy_handles.discard(_opaque)
+
+
+# default number of items pulled from Python iterator by JS in single call
+_JS_PY_ITER_CHUNK_SIZE = 256
+
+
+# Marker of Python iterable passed to JS as lazy iterator, see lazy_iter.
+class _LazyIter:
+    __slots__ = ('obj', 'chunk_size')
+
+
+    def __init__(self, obj: Iterable, chunk_size: int):
+        self.obj = obj
+        self.chunk_size = chunk_size
+
+
+# Marks Python iterable to be passed to JS as lazy iterator instead of array.
+# Items are pulled in chunks of chunk_size, chunk_size=1 pulls single item on every next() in JS.
+def lazy_iter(obj: Iterable, chunk_size: int=_JS_PY_ITER_CHUNK_SIZE) -> _LazyIter:
+    if not 1 <= chunk_size <= _JS_INT32_MAX:
+        raise ValueError(f'chunk_size must be between 1 and {_JS_INT32_MAX}')
+
+    return _LazyIter(obj, chunk_size)
+
+
+# Python iterator referenced by JS iterator.
+class _PyIterator:
+    __slots__ = ('it', 'chunk_size')
+
+
+    def __init__(self, obj: Iterable, chunk_size: int):
+        self.it = iter(obj)
+        self.chunk_size = chunk_size
+
+
+    def pull(self, close: bool=False) -> list[Any]:
+        # NOTE: JS closes iterator when loop over it exits early, e.g. on break
+        if close:
+            close_: Callable | None = getattr(self.it, 'close', None)
+
+            if close_ is not None:
+                close_()
+
+            return []
+
+        # NOTE: chunk shorter than chunk_size means iterator is exhausted
+        return list(islice(self.it, self.chunk_size))
+
+
+def _JS_NewPyIterator(_ctx: _JSContext_P, obj: Iterable, chunk_size: int) -> _JSValue:
+    record = _PyIterator(obj, chunk_size)
+    _factory: _JSValue = JSContext.get_qjscontext(_ctx)._get_py_iterator_factory()._val
+    _pull: _JSValue = _JS_NewPyFunction(_ctx, record.pull)
+    _args: _JSValue_P = ffi.new('JSValue[2]', [_pull, lib._macro_JS_MKVAL(JS_TAG_INT, chunk_size)])
+    _val: _JSValue = lib.JS_Call(_ctx, _factory, JS_UNDEFINED, 2, _args)
+    _JS_FreeValue(_ctx, _pull)
+
+    if lib._inline_JS_IsException(_val):
+        _e_val: _JSValue = lib.JS_GetException(_ctx)
+        raise JSError(_ctx, _e_val)
+
+    return _val
+
+
+def is_remote_path(path_or_url: str) -> bool:
+    return path_or_url.startswith('http://') or path_or_url.startswith('https://')
+
+
+def read_script(path_or_url: str, is_remote_file: bool=False, module_cache: JSModuleCache | None=None) -> tuple[str, str]:
+    # NOTE: remote scripts are read into memory, their path is URL
+    if is_remote_file or is_remote_path(path_or_url):
+        data: bytes = module_cache.fetch(path_or_url) if module_cache is not None else download_file(path_or_url)
+        return path_or_url, data.decode('utf-8')
+    elif os.path.exists(path_or_url):
+        path = path_or_url
+    else:
+        for ext in ['', '.js', '.mjs']:
+            p = os.path.join('node_modules', path_or_url + ext)
+
+            if os.path.exists(p):
+                path = p
+                break
+        else:
+            raise ValueError(path_or_url)
+
+    with open(path) as f:
+        data: str = f.read()
+
+    return path, data
+
+
+# char *JSModuleNormalizeFunc(JSContext *ctx, const char *module_base_name, const char *module_name, void *opaque);
+@ffi.def_extern()
+def _quikcjs_cffi_js_module_normalize(_ctx: _JSContext_P, _module_base_name: _const_char_p, _module_name: _const_char_p, _opaque: _void_p) -> _char_p:
+    module_base_name: str = ffi.string(_module_base_name).decode()
+    module_name: str = ffi.string(_module_name).decode()
+    ctx: JSContext = JSContext.get_qjscontext(_ctx)
+
+    try:
+        path: str = ctx.rt.module_resolver.resolve(module_name, module_base_name)
+    except (OSError, ValueError) as e:
+        lib._quikcjs_cffi_throw_internal_error(_ctx, f'could not resolve module {module_name!r}: {e}'.encode())
+        return ffi.NULL
+
+    # NOTE: returned string is owned and freed by QuickJS
+    return lib.js_strdup(_ctx, path.encode())
+
+
+# JSModuleDef *js_module_loader(JSContext *ctx, const char *module_name, void *opaque);
+@ffi.def_extern()
+def _quikcjs_cffi_js_module_loader(_ctx: _JSContext_P, _module_name: _const_char_p, _opaque: _void_p) -> _JSModuleDef_P:
+    # print(f'!!! _quikcjs_cffi_js_module_loader {_ctx=} {ffi.string(_module_name)=} {_opaque=}')
+    if _instrumentation.enabled:
+        start_ns: int = time.perf_counter_ns()
+        sizes: list[int] = []
+        _module_def: _JSModuleDef_P = ffi.NULL
+
+        try:
+            _module_def = _JS_LoadModule(_ctx, _module_name, _opaque, sizes)
+        finally:
+            module_name: str = ffi.string(_module_name).decode()
+            _instrumentation.record('module', module_name, start_ns, sum(sizes), _module_def == ffi.NULL)
+
+        return _module_def
+
+    return _JS_LoadModule(_ctx, _module_name, _opaque)
+
+
+def _JS_LoadModule(_ctx: _JSContext_P, _module_name: _const_char_p, _opaque: _void_p, sizes: list[int] | None=None) -> _JSModuleDef_P:
+    module_name: bytes = ffi.string(_module_name)
+
+    # NOTE: std/os modules are registered on first import instead of in every new context
+    if module_name == b'std':
+        return lib.js_init_module_std(_ctx, _module_name)
+    elif module_name == b'os':
+        return lib.js_init_module_os(_ctx, _module_name)
+
+    module_name: str = module_name.decode()
+    is_remote_file: bool = is_remote_path(module_name)
+    # print(f'_quikcjs_cffi_js_module_loader [0] {module_name=} {is_remote_file=}')
+
+    ctx: JSContext = JSContext.get_qjscontext(_ctx)
+    path: str
+    data: str
+
+    try:
+        path, data = ctx.rt.read_script(module_name, is_remote_file)
+    except (OSError, ValueError) as e:
+        lib._quikcjs_cffi_throw_internal_error(_ctx, f'could not load module {module_name!r}: {e}'.encode())
+        return ffi.NULL
+
+    if sizes is not None:
+        sizes.append(len(data))
+
+    # NOTE: same steps as js_module_loader, but source is read by Python
+    #   and compiled module is read from/written to bytecode cache
+    _obj: _JSValue = _JS_Compile(_ctx, data, path, JS_EVAL_TYPE_MODULE, ctx.rt.bytecode_cache)
+
+    if lib._inline_JS_IsException(_obj):
+        return ffi.NULL
+
+    if lib.js_module_set_import_meta(_ctx, _obj, True, False) < 0:
+        _JS_FreeValue(_ctx, _obj)
+        return ffi.NULL
+
+    _module_def: _JSModuleDef_P = ffi.cast('JSModuleDef*', lib._macro_JS_VALUE_GET_PTR(_obj))
+    _JS_FreeValue(_ctx, _obj)
+    # print(f'_quikcjs_cffi_js_module_loader [1] {path=} {_module_def=}')
+    return _module_def
+
+
+# crypto and stringify object polyfills evaluated in every new context
+_JS_BOOTSTRAP_CODE = '''
+/*
+ * crypto - minimal polyfill for Yjs
+ */
+if (!globalThis.crypto) {
+    globalThis.crypto = {
+        getRandomValues: function(array) {
+            for (let i = 0; i < array.length; i++) {
+                array[i] = Math.floor(Math.random() * 256);
+            }
+
+            return array;
+        }
+    };
+}
+
+/*
+ * browser console.log/toString like polyfill
+ */
+function stringifyObject(obj) {
+    // Use a WeakSet for tracking seen objects to allow garbage collection
+    const seen = new WeakSet();
+
+    function stringifyHelper(obj) {
+        // If we've already seen this object, return a placeholder to avoid circular reference
+        if (typeof obj === 'object' && obj !== null) {
+            if (seen.has(obj)) {
+                return '[Circular]';
+            }
+            seen.add(obj);
+        }
+
+        // Handle Symbol type
+        if (typeof obj === 'symbol') {
+            return `"${obj.description || obj.toString()}"`;
+        }
+
+        // Handle BigInt
+        if (typeof obj === 'bigint') {
+            return obj.toString(); // NOTE: 'n' at the end is not returned
+        }
+
+        // Handle non-object types
+        if (typeof obj !== 'object' || obj === null) {
+            return JSON.stringify(obj);
+        }
+
+        // Handle arrays
+        if (Array.isArray(obj)) {
+            return '[' + obj.map(stringifyHelper).join(',') + ']';
+        }
+
+        // Handle Date objects
+        if (obj instanceof Date) {
+            return `"${obj.toISOString()}"`;
+        }
+
+        // Handle general objects
+        let result = '{';
+        let first = true;
+        for (let key in obj) {
+            if (obj.hasOwnProperty(key)) {
+                if (!first) result += ',';
+                result += `"${key}":${stringifyHelper(obj[key])}`;
+                first = false;
+            }
+        }
+        result += '}';
+        return result;
+    }
+
+    return stringifyHelper(obj);
+}
+
+if (!globalThis.__stringifyObject) {
+    globalThis.__stringifyObject = stringifyObject;
+}
+'''
+
+# NOTE: compiled once per process, then replayed into every new context
+_bootstrap_bytecode: bytes | None = None
+
+
+def _JS_EvalBootstrap(_ctx: _JSContext_P, precompiled: bool=True) -> _JSValue:
+    global _bootstrap_bytecode
+
+    if not precompiled:
+        return _JS_Eval(_ctx, _JS_BOOTSTRAP_CODE, '<bootstrap>')
+
+    if _bootstrap_bytecode is None:
+        _obj: _JSValue = _JS_Compile(_ctx, _JS_BOOTSTRAP_CODE, '<bootstrap>', JS_EVAL_TYPE_GLOBAL)
+
+        if lib._inline_JS_IsException(_obj):
+            return _obj
+
+        _bootstrap_bytecode = _JS_WriteBytecode(_ctx, _obj)
+    else:
+        _obj: _JSValue = _JS_ReadBytecode(_ctx, _bootstrap_bytecode)
+
+    _val: _JSValue = _JS_EvalCompiled(_ctx, _obj)
+    return _val
+
+
+# Snapshot of JS_ComputeMemoryUsage, sizes are in bytes.
+# NOTE: snapshots can be subtracted, e.g. to see how much memory preloaded library added
+@dataclass(frozen=True)
+class JSMemoryUsage:
+    malloc_size: int
+    malloc_limit: int
+    memory_used_size: int
+    malloc_count: int
+    memory_used_count: int
+    atom_count: int
+    atom_size: int
+    str_count: int
+    str_size: int
+    obj_count: int
+    obj_size: int
+    prop_count: int
+    prop_size: int
+    shape_count: int
+    shape_size: int
+    js_func_count: int
+    js_func_size: int
+    js_func_code_size: int
+    js_func_pc2line_count: int
+    js_func_pc2line_size: int
+    c_func_count: int
+    array_count: int
+    fast_array_count: int
+    fast_array_elements: int
+    binary_object_count: int
+    binary_object_size: int
+
+
+    def __sub__(self, other: 'JSMemoryUsage') -> 'JSMemoryUsage':
+        return JSMemoryUsage(*[getattr(self, f.name) - getattr(other, f.name) for f in fields(self)])
+
+
+    def to_dict(self) -> dict[str, int]:
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+class JSRuntime:
+    def __init__(self,
+                 bytecode_cache: JSBytecodeCache | None=None,
+                 module_cache: JSModuleCache | None=None,
+                 module_resolver: JSModuleResolver | None=None):
+        self._rt = lib.JS_NewRuntime()
+        lib._quikcjs_cffi_py_func_init_class(self._rt)
+        lib._quikcjs_cffi_py_proxy_init_class(self._rt)
+        self.ctxs: WeakSet['JSContext'] = WeakSet()
+        self.bytecode_cache = bytecode_cache
+        self.module_cache = module_cache
+        self.module_resolver = module_resolver
+
+        # NOTE: sources of remote scripts by URL, so each URL is fetched at most once per runtime
+        self._remote_scripts: dict[str, str] = {}
+
+        # NOTE: cffi releases GIL during every QuickJS call, so runtimes can run in parallel threads,
+        #   but single runtime must never be entered from two threads at the same time
+        self._lock = threading.RLock()
+        self._thread_id: int = threading.get_ident()
+        self._lock_depth: int = 0
+
+        # NOTE: atom caches of contexts with evicted atoms, freed when outermost lock of runtime is released
+        self._evicted_atom_caches: set[_JSAtomCache] = set()
+
+        # NOTE: event loop which runs pending jobs while promises are awaited from asyncio
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._n_futures: int = 0
+        self._jobs_scheduled: bool = False
+
+        # NOTE: state of deadline read by interrupt handler, handler is installed only while deadline is active
+        self._interrupt = ffi.new('_quikcjs_cffi_interrupt*')
+        self._interrupt.budget = -1
+        self._n_deadlines: int = 0
+
+        lib.js_std_init_handlers(self._rt)
+
+        # NOTE: without resolver, QuickJS default normalizer only resolves relative names
+        lib.JS_SetModuleLoaderFunc(
+            self._rt,
+            lib._quikcjs_cffi_js_module_normalize if module_resolver is not None else ffi.cast('JSModuleNormalizeFunc*', 0),
+            # lib.js_module_loader,
+            lib._quikcjs_cffi_js_module_loader,
+            ffi.cast('void*', 0),
+        )
+
+
+    def __del__(self):
+        if self.ctxs is None:
+            return
+
+        with self:
+            for ctx in list(self.ctxs):
+                ctx.free()
+
+            self.ctxs = None
+            self._n_futures = 0
+            lib.js_std_free_handlers(self._rt)
+            lib.JS_FreeRuntime(self._rt)
+
+
+    free = __del__
+
+
+    def __enter__(self) -> 'JSRuntime':
+        self._lock.acquire()
+        self._lock_depth += 1
+        thread_id: int = threading.get_ident()
+
+        if thread_id != self._thread_id:
+            # NOTE: QuickJS checks stack overflow against stack top of thread which entered it last
+            self._thread_id = thread_id
+            lib.JS_UpdateStackTop(self._rt)
+
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._lock_depth == 1 and self._evicted_atom_caches:
+            # NOTE: no property access is in progress in this runtime, so evicted atoms are no longer used
+            for atom_cache in self._evicted_atom_caches:
+                atom_cache.free_evicted()
+
+            self._evicted_atom_caches.clear()
+
+        self._lock_depth -= 1
+        self._lock.release()
+
+        if self._n_futures and not self._jobs_scheduled and lib.JS_IsJobPending(self._rt):
+            self._jobs_scheduled = True
+            self._loop.call_soon_threadsafe(self._run_scheduled_jobs)
+
+
+    def _run_scheduled_jobs(self):
+        self._jobs_scheduled = False
+
+        if self.ctxs is None:
+            return
+
+        self.execute_pending_jobs()
+
+
+    def execute_pending_jobs(self) -> int:
+        _pctx: _JSContext_P = ffi.new('JSContext**')
+        n: int = 0
+
+        with self:
+            while True:
+                ret: int = lib.JS_ExecutePendingJob(self._rt, _pctx)
+
+                if ret == 0:
+                    break
+                elif ret < 0:
+                    _ctx: _JSContext_P = _pctx[0]
+                    _e_val: _JSValue = lib.JS_GetException(_ctx)
+                    raise JSError(_ctx, _e_val)
+
+                n += 1
+
+        return n
+
+
+    # Interrupts JS code running in this runtime after timeout seconds or after budget interrupt checks,
+    # QuickJS checks for interrupt about every 10000 function calls and loop iterations.
+    # Interrupted code raises JSTimeoutError. Nested deadline can only shorten outer one.
+    # NOTE: runtime is locked by current thread until block exits
+    @contextmanager
+    def deadline(self, timeout: float | None=None, budget: int | None=None) -> Iterator['JSRuntime']:
+        _state = self._interrupt
+
+        with self:
+            prev_deadline: float = _state.deadline
+            prev_budget: int = _state.budget
+
+            if timeout is not None:
+                deadline: float = lib._quikcjs_cffi_monotonic() + timeout
+
+                if prev_deadline == 0 or deadline < prev_deadline:
+                    _state.deadline = deadline
+
+            if budget is not None and (prev_budget < 0 or budget < prev_budget):
+                _state.budget = budget
+
+            start_budget: int = _state.budget
+
+            if self._n_deadlines == 0:
+                lib._quikcjs_cffi_set_interrupt(self._rt, _state)
+
+            self._n_deadlines += 1
+
+            try:
+                yield self
+            finally:
+                self._n_deadlines -= 1
+                _state.deadline = prev_deadline
+                _state.interrupted = 0
+
+                # NOTE: interrupt checks used by nested block are charged to outer budget
+                if prev_budget < 0:
+                    _state.budget = -1
+                else:
+                    _state.budget = max(0, prev_budget - (start_budget - _state.budget))
+
+                if self._n_deadlines == 0:
+                    lib._quikcjs_cffi_set_interrupt(self._rt, ffi.NULL)
+
+
+    def set_memory_limit(self, limit: int | None):
+        # NOTE: allocations above limit fail and throw InternalError "out of memory", None removes limit
+        _limit = ffi.cast('size_t', -1) if limit is None else limit
+
+        with self:
+            lib.JS_SetMemoryLimit(self._rt, _limit)
+
+
+    def set_gc_threshold(self, threshold: int | None):
+        # NOTE: cycle collector runs when allocated memory grows over threshold, None disables automatic GC
+        _threshold = ffi.cast('size_t', -1) if threshold is None else threshold
+
+        with self:
+            lib.JS_SetGCThreshold(self._rt, _threshold)
+
+
+    def set_max_stack_size(self, stack_size: int | None):
+        # NOTE: None disables stack overflow check
+        with self:
+            lib.JS_SetMaxStackSize(self._rt, 0 if stack_size is None else stack_size)
+
+
+    def run_gc(self):
+        with self:
+            lib.JS_RunGC(self._rt)
+
+
+    def memory_usage(self) -> JSMemoryUsage:
+        _usage = ffi.new('JSMemoryUsage*')
+
+        with self:
+            lib.JS_ComputeMemoryUsage(self._rt, _usage)
+
+        return JSMemoryUsage(*[getattr(_usage, f.name) for f in fields(JSMemoryUsage)])
+
+
+    def read_script(self, path_or_url: str, is_remote_file: bool=False) -> tuple[str, str]:
+        if not is_remote_file and not is_remote_path(path_or_url):
+            return read_script(path_or_url)
+
+        data: str | None = self._remote_scripts.get(path_or_url)
+
+        if data is None:
+            _, data = read_script(path_or_url, True, self.module_cache)
+            self._remote_scripts[path_or_url] = data
+
+        return path_or_url, data
+
+
+    def new_context(self,
+                    json_threshold: int | None=None,
+                    atom_cache_size: int=1024,
+                    primitive_results: bool=False,
+                    timeout: float | None=None,
+                    budget: int | None=None) -> 'JSContext':
+        ctx = JSContext(self, json_threshold, atom_cache_size, primitive_results, timeout, budget)
+        return ctx
+
+
+    def add_qjscontext(self, ctx: 'JSContext'):
+        self.ctxs.add(ctx)
+
+
+    def del_qjscontext(self, ctx: 'JSContext'):
+        self.ctxs.discard(ctx)
+
+
+# Interned atoms of Python str keys, bounded by max_size with least recently used atoms evicted first.
+# NOTE: returned atom is owned by cache and valid until runtime lock is released,
+#   use JS_DupAtom if it has to outlive it
+class _JSAtomCache:
+    def __init__(self, rt: 'JSRuntime', _ctx: _JSContext_P, max_size: int=1024):
+        self.rt = rt
+        self._ctx = _ctx
+        self.max_size = max_size
+        self._atoms: OrderedDict[str, int] = OrderedDict()
+        self._evicted: list[int] = []
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+
+    def get(self, key: str) -> int:
+        atoms = self._atoms
+        _atom: int | None = atoms.get(key)
+
+        if _atom is not None:
+            atoms.move_to_end(key)
+            self.hits += 1
+            return _atom
+
+        self.misses += 1
+        _key: bytes = key.encode()
+        _atom = lib.JS_NewAtomLen(self._ctx, _key, len(_key))
+
+        if _atom == JS_ATOM_NULL:
+            _e_val: _JSValue = lib.JS_GetException(self._ctx)
+            raise JSError(self._ctx, _e_val)
+
+        if len(atoms) >= self.max_size:
+            # NOTE: evicted atom can still be used by caller of previous get, e.g. when getter,
+            #   proxy trap or Python callback called back into this cache, so it is freed later
+            _, _old_atom = atoms.popitem(last=False)
+            self._evicted.append(_old_atom)
+            self.rt._evicted_atom_caches.add(self)
+            self.evictions += 1
+
+        atoms[key] = _atom
+        return _atom
+
+
+    def free_evicted(self):
+        for _atom in self._evicted:
+            lib.JS_FreeAtom(self._ctx, _atom)
+
+        self._evicted.clear()
+
+
+    def clear(self):
+        for _atom in self._atoms.values():
+            lib.JS_FreeAtom(self._ctx, _atom)
+
+        self._atoms.clear()
+        self.free_evicted()
+        self.rt._evicted_atom_caches.discard(self)
+
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._atoms),
+            'max_size': self.max_size,
+        }
+
+
+_JS_PY_SEQUENCE_PROTO_CODE = '''
+(function () {
+    const proto = Object.create(Array.prototype);
+
+    Object.defineProperty(proto, 'toJSON', {
+        value() {
+            return Array.prototype.slice.call(this);
+        },
+    });
+
+    return proto;
+})()
+'''
+
+
+# NOTE: iterators inherit %IteratorPrototype%, so they are iterable in JS and returned to Python as JSIterator
+_JS_PY_ITERATOR_CODE = '''
+(function () {
+    const IteratorPrototype = Object.getPrototypeOf(Object.getPrototypeOf([][Symbol.iterator]()));
+
+    class PythonIterator {
+        #pull;
+        #chunkSize;
+        #chunk = [];
+        #index = 0;
+        #done = false;
+
+        constructor(pull, chunkSize) {
+            this.#pull = pull;
+            this.#chunkSize = chunkSize;
+        }
+
+        next() {
+            while (this.#index >= this.#chunk.length) {
+                if (this.#done) {
+                    return {value: undefined, done: true};
+                }
+
+                this.#chunk = this.#pull();
+                this.#index = 0;
+                this.#done = this.#chunk.length < this.#chunkSize;
+            }
+
+            // NOTE: consumed items are released, so only current chunk is kept alive
+            const value = this.#chunk[this.#index];
+            this.#chunk[this.#index++] = undefined;
+            return {value, done: false};
+        }
+
+        return(value) {
+            if (!this.#done) {
+                this.#done = true;
+                this.#pull(true);
+            }
+
+            this.#chunk = [];
+            this.#index = 0;
+            return {value, done: true};
+        }
+    }
+
+    Object.setPrototypeOf(PythonIterator.prototype, IteratorPrototype);
+    Object.defineProperty(PythonIterator.prototype, Symbol.toStringTag, {value: 'Python Iterator'});
+    return (pull, chunkSize) => new PythonIterator(pull, chunkSize);
+})()
+'''
+
+
+# number of arguments of JSFunction calls which use reusable argument buffers
+_JS_ARG_BUFFER_SIZE = 16
+
+
+# NOTE: function with %IteratorPrototype% as prototype, so instanceof detects built-in iterators and generators
+_JS_ITERATOR_CTOR_CODE = '''
+(function () {
+    function Iterator() {}
+    Iterator.prototype = Object.getPrototypeOf(Object.getPrototypeOf([][Symbol.iterator]()));
+    return Iterator;
+})()
+'''
+
+
+_JS_MAP_CODE = '''
+(function (f, thisArg, chunk, star) {
+    const n = chunk.length;
+    const results = new Array(n);
+
+    if (star) {
+        for (let i = 0; i < n; i++) {
+            results[i] = f.apply(thisArg, chunk[i]);
+        }
+    } else {
+        for (let i = 0; i < n; i++) {
+            results[i] = f.call(thisArg, chunk[i]);
+        }
+    }
+
+    return results;
+})
+'''
+
+
+# NOTE: parses batch of NDJSON lines and calls transform once per record, returns [records, results],
+#   line is number of lines before batch, used in parse errors
+_JS_PIPELINE_CODE = '''
+(function (transform, text, line) {
+    const lines = text.split('\\n');
+    const results = [];
+    let records = 0;
+
+    for (let i = 0; i < lines.length; i++) {
+        const s = lines[i];
+
+        // NOTE: blank lines are skipped, trim is needed only for lines starting with whitespace
+        if (s.length === 0 || (s.charCodeAt(0) <= 32 && !s.trim())) {
+            continue;
+        }
+
+        let record;
+
+        try {
+            record = JSON.parse(s);
+        } catch (e) {
+            throw new SyntaxError(`line ${line + i + 1}: ${e.message}`);
+        }
+
+        records++;
+        const result = transform(record);
+
+        // NOTE: undefined results are dropped, so transform can filter records
+        if (result !== undefined) {
+            results.push(result);
+        }
+    }
+
+    return [records, results];
+})
+'''
+
+
+class JSContext:
+    c_to_py_context_map: dict[_JSContext_P, 'JSContext'] = {}
+
+
+    def __init__(self,
+                 rt: JSRuntime,
+                 json_threshold: int | None=None,
+                 atom_cache_size: int=1024,
+                 primitive_results: bool=False,
+                 timeout: float | None=None,
+                 budget: int | None=None):
+        # NOTE: set before arguments are checked, so __del__ of rejected context does nothing
+        self._ctx: _JSContext_P | None = None
+
+        if atom_cache_size < 1:
+            raise ValueError('atom_cache_size must be at least 1')
+
+        self.rt = rt
+
+        # NOTE: lists/tuples/dicts with at least json_threshold items are passed through JSON
+        self.json_threshold: int | None = json_threshold
+
+        # NOTE: with primitive_results, JS strings are returned as str and undefined as None
+        self.primitive_results: bool = primitive_results
+        self._to_py_converters: dict[int, _JSToPyConverter] = _JS_TO_PY_PRIMITIVE_CONVERTERS if primitive_results else _JS_TO_PY_CONVERTERS
+
+        # NOTE: default deadline of every eval and JSFunction call of this context, applied to each call separately,
+        #   timeout/budget arguments of eval and call_with_timeout override them
+        self.timeout: float | None = timeout
+        self.budget: int | None = budget
+
+        # NOTE: argument buffers of JSFunction calls, one per nesting depth of calls
+        self._arg_buffers: list[_JSValue_P] = []
+        self._call_depth: int = 0
+
+        with rt:
+            self._ctx = _ctx = lib.JS_NewContext(self.rt._rt)
+            rt.add_qjscontext(self)
+            JSContext.set_qjscontext(_ctx, self)
+            self.qjsvalues: WeakSet[JSValue] = WeakSet()
+            self.cffi_handle_rc: dict[_void_p, int] = {}
+            self._timers: dict[int, asyncio.TimerHandle] | None = None
+            self._timer_id: int = 0
+            self._to_string_tag: JSFunction | None = None
+            self._map_function: JSFunction | None = None
+            self._pipeline_function: JSFunction | None = None
+            self._py_sequence_proto: JSObject | None = None
+            self._iterator_ctor: _JSValue | None = None
+            self._py_iterator_factory: JSFunction | None = None
+            self.atom_cache = _JSAtomCache(rt, _ctx, atom_cache_size)
+            lib._quikcjs_cffi_py_func_init_context(_ctx)
+            lib._quikcjs_cffi_py_proxy_init_context(_ctx)
+            lib.JS_AddIntrinsicBigFloat(_ctx)
+            lib.JS_AddIntrinsicBigDecimal(_ctx)
+            lib.JS_AddIntrinsicOperators(_ctx)
+            lib.JS_EnableBignumExt(_ctx, True)
+
+            _val: _JSValue = _JS_EvalBootstrap(_ctx)
+            _JS_FreeValue(_ctx, _val)
+
+
+    def __del__(self):
+        _ctx = self._ctx
+
+        if _ctx is None:
+            return
+
+        with self.rt:
+            if self._timers:
+                for handle in self._timers.values():
+                    handle.cancel()
+
+                self._timers = None
+
+            for js_val in self.qjsvalues:
+                js_val.free()
+
+            self.qjsvalues = None
+            self.atom_cache.clear()
+
+            if self._iterator_ctor is not None:
+                _JS_FreeValue(_ctx, self._iterator_ctor)
+                self._iterator_ctor = None
+
+            self._ctx = None
+            self.rt.del_qjscontext(self)
+            JSContext.del_qjscontext(_ctx)
+            lib.JS_FreeContext(_ctx)
+
+
+    free = __del__
+
+
+    def __getitem__(self, key: str) -> Any:
+        return self.get(key)
+
+
+    def __setitem__(self, key: str, value: Any):
+        self.set(key, value)
+
+
+    def add_qjsvalue(self, js_value: 'JSValue'):
+        self.qjsvalues.add(js_value)
+
+
+    @classmethod
+    def get_qjscontext(cls, _ctx: _JSContext_P) -> 'JSContext':
+        ctx = cls.c_to_py_context_map[_ctx]
+        return ctx
+
+
+    @classmethod
+    def set_qjscontext(cls, _ctx: _JSContext_P, ctx: 'JSContext'):
+        cls.c_to_py_context_map[_ctx] = ctx
+
+
+    @classmethod
+    def del_qjscontext(cls, _ctx: _JSContext_P):
+        del cls.c_to_py_context_map[_ctx]
+
+
+    def get(self, key: str) -> Any:
+        _ctx = self._ctx
+
+        with self.rt:
+            _this: _JSValue = lib.JS_GetGlobalObject(_ctx)
+            _key_atom = self.atom_cache.get(key)
+
+            _val = lib._inline_JS_GetProperty(_ctx, _this, _key_atom)
+            val = _JS_ToPyValue(self, _val)
+
+            if isinstance(val, JSValue):
+                self.add_qjsvalue(val)
+
+            _JS_FreeValue(_ctx, _this)
+
+        return val
+
+
+    def set(self, key: str, val: Any):
+        _ctx = self._ctx
+
+        with self.rt:
+            _this: _JSValue = lib.JS_GetGlobalObject(_ctx)
+            _val = convert_pyvalue_to_jsvalue(_ctx, val, self.json_threshold)
+            _key_atom = self.atom_cache.get(key)
+
+            # NOTE: JS_SetProperty takes ownership of _val, value of JSValue stays owned by its wrapper
+            if isinstance(val, JSValue):
+                _JS_DupValue(_ctx, _val)
+
+            lib._inline_JS_SetProperty(_ctx, _this, _key_atom, _val)
+            _JS_FreeValue(_ctx, _this)
+
+
+    def eval(self,
+             buf: str,
+             filename: str='<inupt>',
+             eval_flags: JSEval | int=JSEval.TYPE_GLOBAL,
+             materialize: bool=False,
+             timeout: float | None=None,
+             budget: int | None=None) -> Any:
+        if timeout is None:
+            timeout = self.timeout
+
+        if budget is None:
+            budget = self.budget
+
+        if timeout is not None or budget is not None:
+            with self.rt.deadline(timeout, budget):
+                return self._trace_eval(buf, filename, eval_flags, materialize)
+
+        return self._trace_eval(buf, filename, eval_flags, materialize)
+
+
+    def _trace_eval(self, buf: str, filename: str, eval_flags: JSEval | int, materialize: bool) -> Any:
+        if _instrumentation.enabled:
+            return _instrumentation.trace('eval', filename, len(buf), self._eval, buf, filename, eval_flags, materialize)
+
+        return self._eval(buf, filename, eval_flags, materialize)
+
+
+    def _eval(self, buf: str, filename: str, eval_flags: JSEval | int, materialize: bool) -> Any:
+        eval_flags = eval_flags if isinstance(eval_flags, int) else eval_flags.value
+        _ctx = self._ctx
+
+        with self.rt:
+            _val: _JSValue = _JS_Eval(_ctx, buf, filename, eval_flags)
+            # lib.js_std_dump_error(_ctx)
+
+            val: Any = _JS_ToPyValue(self, _val)
+
+            if isinstance(val, JSValue):
+                self.add_qjsvalue(val)
+
+                if materialize:
+                    py_val: Any = val.to_py()
+                    val.free()
+                    val = py_val
+
+        return val
+
+
+    # NOTE: same as JSRuntime.deadline, block limits JS code of all contexts of runtime running inside it
+    def deadline(self, timeout: float | None=None, budget: int | None=None) -> Iterator['JSRuntime']:
+        return self.rt.deadline(timeout, budget)
+
+
+    def _new_arg_buffer(self, depth: int, n_args: int) -> _JSValue_P:
+        if n_args > _JS_ARG_BUFFER_SIZE:
+            return ffi.new('JSValue[]', n_args)
+
+        _argv: _JSValue_P = ffi.new('JSValue[]', _JS_ARG_BUFFER_SIZE)
+
+        if depth == len(self._arg_buffers):
+            self._arg_buffers.append(_argv)
+
+        return _argv
+
+
+    def _get_py_sequence_proto(self) -> 'JSObject':
+        # NOTE: proxies of Python sequences inherit Array.prototype methods and serialize to JSON as arrays
+        if self._py_sequence_proto is None:
+            self._py_sequence_proto = self.eval(_JS_PY_SEQUENCE_PROTO_CODE, '<py_sequence_proto>')
+
+        return self._py_sequence_proto
+
+
+    def _get_iterator_ctor(self) -> _JSValue:
+        # NOTE: raw value, because it is used while converting objects to Python values,
+        #   undefined if it cannot be evaluated, so objects are never detected as iterators
+        if self._iterator_ctor is None:
+            _val: _JSValue = _JS_Eval(self._ctx, _JS_ITERATOR_CTOR_CODE, '<iterator_ctor>')
+
+            if lib._inline_JS_IsException(_val):
+                _JS_FreeValue(self._ctx, lib.JS_GetException(self._ctx))
+                _val = JS_UNDEFINED
+
+            self._iterator_ctor = _val
+
+        return self._iterator_ctor
+
+
+    def _get_py_iterator_factory(self) -> 'JSFunction':
+        # NOTE: creates JS iterators pulling chunks of items from Python iterators
+        if self._py_iterator_factory is None:
+            self._py_iterator_factory = self.eval(_JS_PY_ITERATOR_CODE, '<py_iterator>')
+
+        return self._py_iterator_factory
+
+
+    def _get_pipeline_function(self) -> 'JSFunction':
+        if self._pipeline_function is None:
+            self._pipeline_function = self.eval(_JS_PIPELINE_CODE, '<pipeline>')
+
+        return self._pipeline_function
+
+
+    def _run_pipeline_batch(self, transform: 'JSFunction', data: bytes, line: int) -> tuple[int, list[Any]]:
+        _ctx = self._ctx
+
+        with self.rt:
+            pipeline_function: JSFunction = self._get_pipeline_function()
+
+            # NOTE: whole batch crosses FFI boundary as single string, records are parsed by JSON.parse
+            _text: _JSValue = lib.JS_NewStringLen(_ctx, data, len(data))
+
+            if lib._inline_JS_IsException(_text):
+                _e_val: _JSValue = lib.JS_GetException(_ctx)
+                raise JSError(_ctx, _e_val)
+
+            _args: _JSValue_P = ffi.new('JSValue[3]', [transform._val, _text, lib._inline___JS_NewFloat64(_ctx, float(line))])
+            _ret: _JSValue = lib.JS_Call(_ctx, pipeline_function._val, JS_UNDEFINED, 3, _args)
+            _JS_FreeValue(_ctx, _text)
+
+            if lib._inline_JS_IsException(_ret):
+                _e_val: _JSValue = lib.JS_GetException(_ctx)
+                raise JSError(_ctx, _e_val)
+
+            try:
+                records, results = _JS_ToPyValueBulk(_ctx, _ret)
+            finally:
+                _JS_FreeValue(_ctx, _ret)
+
+        return records, results
+
+
+    def pipeline(self,
+                 transform: 'JSFunction | str',
+                 source: Any,
+                 batch_size: int=1024,
+                 workers: 'int | JSProcessPool | None'=None) -> 'JSPipeline':
+        from .pipeline import JSPipeline
+        return JSPipeline(self, transform, source, batch_size, workers)
+
+
+    def _get_map_function(self) -> 'JSFunction':
+        # NOTE: calls function once per item of chunk, so whole chunk crosses FFI boundary once
+        if self._map_function is None:
+            self._map_function = self.eval(_JS_MAP_CODE, '<map>')
+
+        return self._map_function
+
+
+    def _get_to_string_tag(self, val: 'JSValue') -> Any:
+        if self._to_string_tag is None:
+            self._to_string_tag = self.eval('(x) => x[Symbol.toStringTag]', '<to_string_tag>')
+
+        return self._to_string_tag(val)
+
+
+    def from_json(self, data: bytes | str, filename: str='<json>') -> Any:
+        _ctx = self._ctx
+
+        with self.rt:
+            _val: _JSValue = _JS_ParseJSON(_ctx, data, filename)
+            val: Any = _JS_ToPyValue(self, _val)
+
+            if isinstance(val, JSValue):
+                self.add_qjsvalue(val)
+
+        return val
+
+
+    def load(self, path_or_url: str, eval_flags: JSEval | int=JSEval.TYPE_GLOBAL) -> Any:
+        path: str
+        data: str
+        path, data = self.rt.read_script(path_or_url)
+
+        if _instrumentation.enabled:
+            return _instrumentation.trace('load', path, len(data), self._load, path, data, eval_flags)
+
+        return self._load(path, data, eval_flags)
+
+
+    def _load(self, path: str, data: str, eval_flags: JSEval | int) -> Any:
+        cache: JSBytecodeCache | None = self.rt.bytecode_cache
+
+        if cache is None:
+            val: Any = self._eval(data, path, eval_flags, False)
+            return val
+
+        eval_flags = eval_flags if isinstance(eval_flags, int) else eval_flags.value
+        _ctx = self._ctx
+
+        with self.rt:
+            _obj: _JSValue = _JS_Compile(_ctx, data, path, eval_flags, cache)
+            _val: _JSValue = _JS_EvalCompiled(_ctx, _obj)
+            val: Any = _JS_ToPyValue(self, _val)
+
+            if isinstance(val, JSValue):
+                self.add_qjsvalue(val)
+
+        return val
+
+
+    async def eval_async(self, buf: str, filename: str='<inupt>', eval_flags: JSEval | int=JSEval.TYPE_GLOBAL) -> Any:
+        eval_flags = eval_flags if isinstance(eval_flags, int) else eval_flags.value
+        is_global: bool = eval_flags & JS_EVAL_TYPE_MASK == JS_EVAL_TYPE_GLOBAL
+
+        # NOTE: allow top-level await in global code
+        if is_global:
+            eval_flags |= JS_EVAL_FLAG_ASYNC
+
+        self.install_timers()
+        val: Any = self.eval(buf, filename, eval_flags)
+        val = await self.to_future(val)
+
+        if is_global:
+            # NOTE: async global code resolves to object with completion value
+            val = val.value
+            val = await self.to_future(val)
+
+        return val
+
+
+    def to_future(self, val: Any) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+
+        if not isinstance(val, JSObject) or lib.JS_PromiseState(self._ctx, val._val) < 0:
+            future.set_result(val)
+            return future
+
+        _ctx = self._ctx
+        rt: JSRuntime = self.rt
+
+        def resolve(value: Any, *args):
+            if not future.done():
+                future.set_result(value)
+
+        def reject(reason: Any, *args):
+            if future.done():
+                return
+
+            # NOTE: JSError takes its own reference to rejection reason
+            _reason: _JSValue = convert_pyvalue_to_jsvalue(_ctx, reason)
+            _JS_DupValue(_ctx, _reason)
+            future.set_exception(JSError(_ctx, _reason))
+
+        def done(future: asyncio.Future):
+            rt._n_futures -= 1
+
+        rt._loop = loop
+        rt._n_futures += 1
+        future.add_done_callback(done)
+
+        # NOTE: reactions are run as pending jobs, scheduled on event loop when runtime lock is released
+        val.then(resolve, reject)
+        return future
+
+
+    def install_timers(self):
+        # NOTE: setTimeout/setInterval backed by running asyncio event loop
+        if self._timers is not None:
+            return
+
+        self._timers = {}
+
+        if str(self.eval('typeof setTimeout')) != 'undefined':
+            return
+
+        self.set('setTimeout', self._set_timeout)
+        self.set('setInterval', self._set_interval)
+        self.set('clearTimeout', self._clear_timer)
+        self.set('clearInterval', self._clear_timer)
+
+
+    def _set_timer(self, callback: 'JSFunction', delay: Any, args: tuple, repeat: bool) -> int:
+        loop = asyncio.get_running_loop()
+        delay = max(delay, 0) / 1000 if isinstance(delay, (int, float)) else 0
+        self._timer_id += 1
+        timer_id: int = self._timer_id
+
+        def fire():
+            if self._timers is None:
+                return
+
+            if repeat:
+                self._timers[timer_id] = loop.call_later(delay, fire)
+            else:
+                self._timers.pop(timer_id, None)
+
+            callback(*args)
+
+        self._timers[timer_id] = loop.call_later(delay, fire)
+        return timer_id
+
+
+    def _set_timeout(self, callback: 'JSFunction', delay: Any=0, *args) -> int:
+        return self._set_timer(callback, delay, args, False)
+
+
+    def _set_interval(self, callback: 'JSFunction', delay: Any=0, *args) -> int:
+        return self._set_timer(callback, delay, args, True)
+
+
+    def _clear_timer(self, timer_id: Any=None, *args):
+        if self._timers is None or not isinstance(timer_id, int):
+            return
+
+        handle: asyncio.TimerHandle | None = self._timers.pop(timer_id, None)
+
+        if handle is not None:
+            handle.cancel()
+
+
+class JSValue:
+    def __init__(self, _ctx: _JSContext_P, _val: _JSValue=None, ctx: 'JSContext | None'=None):
+        self._ctx = _ctx
+        self._val = _val
+
+        # NOTE: context is passed by converters which already know it, so it is not looked up
+        if ctx is None:
+            ctx = JSContext.get_qjscontext(_ctx)
+
+        self._context = ctx
+        ctx.add_qjsvalue(self)
+
+
+    def __del__(self):
+        # print('JSValue.__del__', self)
+        _ctx = self._ctx
+        _val = self._val
+
+        if _ctx is None:
+            return
+
+        with self._context.rt:
+            _rt = lib.JS_GetRuntime(_ctx)
+
+            if lib.JS_IsLiveObject(_rt, _val):
+                _JS_FreeValue(_ctx, _val)
+
+            self._ctx = None
+
+
+    free = __del__
+
+
+    def __repr__(self) -> str:
+        _ctx = self._ctx
+        _val = self._val
+        tag = JSTag(_val.tag)
+
+        with self._context.rt:
+            val: str = stringify_object(_ctx, _val)
+
+            if lib._macro_JS_VALUE_HAS_REF_COUNT(_val):
+                ref_count: int = lib._macro_JS_VALUE_GET_REF_COUNT(_val)
+
+                if lib.JS_IsFunction(_ctx, _val):
+                    return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} ptr={_val.u.ptr} {ref_count=}>'
+                else:
+                    return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} ptr={_val.u.ptr} {ref_count=} val={val}>'
+            else:
+                return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} val={val}>'
+
+
+    def __getattr__(self, attr: str) -> Any:
+        _ctx = self._ctx
+        _val = self._val
+
+        with self._context.rt:
+            _attr_atom: int = self._context.atom_cache.get(attr)
+            _ret = lib._inline_JS_GetProperty(_ctx, _val, _attr_atom)
+            ret: Any = _JS_ToPyValue(self._context, _ret, _val)
+
+        return ret
+
+
+    def to_memoryview(self) -> memoryview:
+        # NOTE: zero-copy view of ArrayBuffer or TypedArray memory, valid while context is alive
+        with self._context.rt:
+            view: memoryview = _JS_GetMemoryView(self)
+
+        return view
+
+
+    def to_numpy(self) -> Any:
+        import numpy as np
+
+        view: memoryview = self.to_memoryview()
+        return np.frombuffer(view, dtype=view.format)
+
+
+    def to_json(self, indent: int | str | None=None) -> str | None:
+        with self._context.rt:
+            val: str | None = _JS_JSONStringify(self._ctx, self._val, indent)
+
+        return val
+
+
+    def to_py(self, max_depth: int=256, max_size: int | None=None) -> Any:
+        # NOTE: arrays and objects are copied, shared objects are copied each time they are reached
+        with self._context.rt:
+            val: Any = _JS_ToPyValueBulk(self._ctx, self._val, max_depth, max_size)
+
+        return val
+
+
+
+class JSUndefined(JSValue):
+    pass
+
+
+class JSBigInt(JSValue):
+    pass
+
+
+class JSString(JSValue):
+    def __str__(self) -> str:
+        _ctx = self._ctx
+        _val = self._val
+
+        with self._context.rt:
+            _c_val: _char_p = lib._inline_JS_ToCStringLen(_ctx, ffi.NULL, _val)
+
+        val: bytes = ffi.string(_c_val)
+        val: str = val.decode()
+        # NOTE: _c_val is (probably) owned by QuickJS, so no need to free it
+        return val
+
+
+class JSSymbol(JSValue):
+    pass
+
+
+# number of elements fetched under single lock of runtime while iterating JSArray
+_JS_ARRAY_ITER_CHUNK_SIZE = 256
+
+
+# Python method of JS value wrapper which is shadowed by JS function property with same name,
+# e.g. Map.prototype.get or lodash _.map, so JS methods are still called as before.
+# With any_value, any defined JS property shadows it, e.g. index of RegExp match array.
+class _JSFallbackMethod:
+    def __init__(self, func: Callable, any_value: bool=False):
+        self.func = func
+        self.name: str = func.__name__
+        self.any_value = any_value
+
+
+    def __get__(self, obj: 'JSValue | None', cls: type | None=None) -> Callable:
+        if obj is None:
+            return self.func
+
+        val: Any = JSValue.__getattr__(obj, self.name)
+
+        if isinstance(val, JSFunction):
+            return val
+        elif self.any_value and val is not None and not isinstance(val, JSUndefined):
+            return val
+
+        return self.func.__get__(obj, cls)
+
+
+# Sequence of JS array elements, elements are converted on access and not cached
+class JSArray(JSValue, Sequence):
+    # NOTE: JS properties with same names are returned instead, e.g. index of RegExp match array
+    index = _JSFallbackMethod(Sequence.index, any_value=True)
+    count = _JSFallbackMethod(Sequence.count, any_value=True)
+
+
+    def __len__(self) -> int:
+        with self._context.rt:
+            length: int = self._get_length()
+
+        return length
+
+
+    def __getitem__(self, index: int | slice) -> Any:
+        if isinstance(index, slice):
+            return self._get_items(*index.indices(len(self)))
+
+        index = operator.index(index)
+        ctx: JSContext = self._context
+
+        with ctx.rt:
+            length: int = self._get_length()
+
+            if index < 0:
+                index += length
+
+            if not 0 <= index < length:
+                raise IndexError('JSArray index out of range')
+
+            _ret = lib.JS_GetPropertyUint32(self._ctx, self._val, index)
+            ret: Any = _JS_ToPyValue(ctx, _ret, self._val)
+
+        return ret
+
+
+    def __iter__(self) -> Iterator[Any]:
+        # NOTE: length is read once, so elements appended while iterating are not visited
+        length: int = len(self)
+
+        for start in range(0, length, _JS_ARRAY_ITER_CHUNK_SIZE):
+            yield from self._get_items(start, min(start + _JS_ARRAY_ITER_CHUNK_SIZE, length))
+
+
+    def _get_length(self) -> int:
+        ctx: JSContext = self._context
+        _length = lib._inline_JS_GetProperty(self._ctx, self._val, ctx.atom_cache.get('length'))
+        length: int | float = _JS_ToPyValue(ctx, _length)
+        return int(length)
+
+
+    def _get_items(self, start: int, stop: int, step: int=1) -> list[Any]:
+        ctx: JSContext = self._context
+        _ctx = self._ctx
+        _val = self._val
+        _get = lib.JS_GetPropertyUint32
+
+        with ctx.rt:
+            items: list[Any] = [_JS_ToPyValue(ctx, _get(_ctx, _val, i), _val) for i in range(start, stop, step)]
+
+        return items
+
+
+# Mapping of own enumerable string keys of JS object, values are converted on access and not cached
+class JSObject(JSValue, Mapping):
+    # NOTE: JS objects are compared and hashed by identity and are always truthy, as before, not as mappings
+    __eq__ = JSValue.__eq__
+    __hash__ = JSValue.__hash__
+
+    keys = _JSFallbackMethod(Mapping.keys)
+    items = _JSFallbackMethod(Mapping.items)
+    values = _JSFallbackMethod(Mapping.values)
+    get = _JSFallbackMethod(Mapping.get)
+
+
+    def __bool__(self) -> bool:
+        return True
+
+
+    def __len__(self) -> int:
+        return len(self._get_keys())
+
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._get_keys())
+
+
+    def __contains__(self, key: Any) -> bool:
+        found, _ = self._get_own_value(key, False)
+        return found
+
+
+    def __getitem__(self, key: str | int) -> Any:
+        found, val = self._get_own_value(key, True)
+
+        if not found:
+            raise KeyError(key)
+
+        return val
+
+
+    def _get_keys(self) -> list[str]:
+        ctx: JSContext = self._context
+        _ctx = self._ctx
+        _ptab = ffi.new('JSPropertyEnum**')
+        _plen = ffi.new('uint32_t*')
+
+        with ctx.rt:
+            if lib.JS_GetOwnPropertyNames(_ctx, _ptab, _plen, self._val, JS_GPN_STRING_MASK | JS_GPN_ENUM_ONLY) < 0:
+                _JS_ToPyException(ctx, JS_EXCEPTION, JS_UNDEFINED)
+
+            _tab = _ptab[0]
+            keys: list[str] = [_JS_AtomToPyStr(_ctx, _tab[i].atom) for i in range(_plen[0])]
+
+            # NOTE: table and its atoms are owned by caller
+            for i in range(_plen[0]):
+                lib.JS_FreeAtom(_ctx, _tab[i].atom)
+
+            lib.js_free(_ctx, _tab)
+
+        return keys
+
+
+    def _get_own_value(self, key: Any, convert: bool) -> tuple[bool, Any]:
+        # NOTE: integer keys are property names of array-like objects
+        if isinstance(key, int) and not isinstance(key, bool):
+            key = str(key)
+        elif not isinstance(key, str):
+            return False, None
+
+        ctx: JSContext = self._context
+        _ctx = self._ctx
+        _val = self._val
+        _desc = ffi.new('JSPropertyDescriptor*')
+
+        with ctx.rt:
+            _atom: int = ctx.atom_cache.get(key)
+            ret: int = lib.JS_GetOwnProperty(_ctx, _desc, _val, _atom)
+
+            if ret < 0:
+                _JS_ToPyException(ctx, JS_EXCEPTION, JS_UNDEFINED)
+            elif ret == 0:
+                return False, None
+
+            # NOTE: descriptor values are owned by caller, getter and setter are undefined for data properties
+            _JS_FreeValue(_ctx, _desc.getter)
+            _JS_FreeValue(_ctx, _desc.setter)
+
+            if not _desc.flags & JS_PROP_ENUMERABLE or not convert:
+                _JS_FreeValue(_ctx, _desc.value)
+                return bool(_desc.flags & JS_PROP_ENUMERABLE), None
+
+            if _desc.flags & JS_PROP_GETSET:
+                _ret = lib._inline_JS_GetProperty(_ctx, _val, _atom)
+            else:
+                # NOTE: field of descriptor is view into its memory, so value is copied
+                _ret = ffi.new('JSValue*', _desc.value)[0]
+
+            val: Any = _JS_ToPyValue(ctx, _ret, _val)
+
+        return True, val
+
+
+# Python iterator over JS iterator or generator, next() is called lazily on each step
+class JSIterator(JSValue):
+    def __iter__(self) -> 'JSIterator':
+        return self
+
+
+    def __next__(self) -> Any:
+        ctx: JSContext = self._context
+        _pvalue: _JSValue_P = ffi.new('JSValue*')
+
+        with ctx.rt:
+            ret: int = lib._quikcjs_cffi_iterator_next(self._ctx, self._val, _pvalue)
+
+            if ret < 0:
+                _JS_ToPyException(ctx, JS_EXCEPTION, JS_UNDEFINED)
+            elif ret == 0:
+                raise StopIteration
+
+            val: Any = _JS_ToPyValue(ctx, _pvalue[0])
+
+        return val
+
+
+class JSFunction(JSValue):
+    def __init__(self, _ctx: _JSContext_P, _val: _JSValue=None, _this: _JSValue=JS_UNDEFINED, ctx: 'JSContext | None'=None):
+        self._ctx = _ctx
+        self._val = _val
+        self._this = _this # NOTE: this might be useful lib.JS_GetGlobalObject(_ctx)
+
+        # NOTE: required so GC does not collect it
+        _JS_DupValue(_ctx, _this)
+
+        if ctx is None:
+            ctx = JSContext.get_qjscontext(_ctx)
+
+        self._context = ctx
+        ctx.add_qjsvalue(self)
+
+
+    def __call__(self, *pyargs) -> Any:
+        ctx: JSContext = self._context
+
+        if ctx.timeout is not None or ctx.budget is not None:
+            return self.call_with_timeout(*pyargs)
+
+        if _instrumentation.enabled:
+            name, filename = self._get_name()
+            return _instrumentation.trace_call('call', name, self._call, pyargs, filename)
+
+        return self._call(pyargs)
+
+
+    # NOTE: returns function name and source file from its bytecode debug info,
+    #   file is empty for native and bound functions
+    def _get_name(self) -> tuple[str, str]:
+        _ctx = self._ctx
+
+        with self._context.rt:
+            _name: _JSValue = lib.JS_GetPropertyStr(_ctx, self._val, b'name')
+            name: str = _JS_ToPyStr(_ctx, _name) if _name.tag == JS_TAG_STRING else ''
+            _JS_FreeValue(_ctx, _name)
+
+            _filename: _JSValue = lib.JS_GetPropertyStr(_ctx, self._val, b'fileName')
+            filename: str = _JS_ToPyStr(_ctx, _filename) if _filename.tag == JS_TAG_STRING else ''
+            _JS_FreeValue(_ctx, _filename)
+
+        return name or '<anonymous>', filename
+
+
+    def _call(self, pyargs: tuple) -> Any:
+        _ctx = self._ctx
+        ctx: JSContext = self._context
+        n_args: int = len(pyargs)
+        json_threshold: int | None = ctx.json_threshold
+
+        with ctx.rt:
+            # NOTE: argument buffer is reused by calls at same depth, calls nested in Python callbacks use next one,
+            #   because QuickJS may use argv as arguments of running function
+            depth: int = ctx._call_depth
+            arg_buffers: list[_JSValue_P] = ctx._arg_buffers
+
+            if depth < len(arg_buffers) and n_args <= _JS_ARG_BUFFER_SIZE:
+                _argv: _JSValue_P = arg_buffers[depth]
+            else:
+                _argv = ctx._new_arg_buffer(depth, n_args)
+
+            # NOTE: function, this and JSValue arguments are owned by their wrappers, which outlive this call,
+            #   only arguments converted from Python values are owned by this call
+            _owned: list[_JSValue] = []
+            ctx._call_depth = depth + 1
+
+            try:
+                for i, n in enumerate(pyargs):
+                    _argv[i] = _arg = convert_pyvalue_to_jsvalue(_ctx, n, json_threshold)
+
+                    if type(n) not in _JS_UNBOXED_TYPES and not isinstance(n, JSValue):
+                        _owned.append(_arg)
+
+                _ret: _JSValue = lib.JS_Call(_ctx, self._val, self._this, n_args, _argv)
+            finally:
+                ctx._call_depth = depth
+
+                for _arg in _owned:
+                    _JS_FreeValue(_ctx, _arg)
+
+            ret: Any = _JS_ToPyValue(ctx, _ret)
+
+        return ret
+
+
+    @_JSFallbackMethod
+    def map(self, iterable: Iterable[Any], chunk_size: int=1024, materialize: bool=False) -> Iterator[Any]:
+        # NOTE: calls function with each item as single argument
+        return self._map(iterable, chunk_size, materialize, False)
+
+
+    @_JSFallbackMethod
+    def starmap(self, iterable_of_args: Iterable[tuple | list], chunk_size: int=1024, materialize: bool=False) -> Iterator[Any]:
+        # NOTE: calls function with each item unpacked as arguments
+        return self._map(iterable_of_args, chunk_size, materialize, True)
+
+
+    def _map(self, iterable: Iterable[Any], chunk_size: int, materialize: bool, star: bool) -> Iterator[Any]:
+        # NOTE: checked before iteration starts, since generator would only fail on first item
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be at least 1')
+
+        return self._iter_map(iter(iterable), chunk_size, materialize, star)
+
+
+    def _iter_map(self, it: Iterator[Any], chunk_size: int, materialize: bool, star: bool) -> Iterator[Any]:
+
+        while True:
+            chunk: list[Any] = list(islice(it, chunk_size))
+
+            if not chunk:
+                break
+
+            yield from self._map_chunk(chunk, materialize, star)
+
+
+    def _map_chunk(self, chunk: list[Any], materialize: bool, star: bool) -> list[Any]:
+        _ctx = self._ctx
+        ctx: JSContext = self._context
+
+        with ctx.rt:
+            map_function: JSFunction = ctx._get_map_function()
+
+            # NOTE: whole chunk is converted in single native call
+            _chunk: _JSValue = _JS_NewValueBulk(_ctx, chunk)
+            _args: _JSValue_P = ffi.new('JSValue[4]', [self._val, self._this, _chunk, JS_TRUE if star else JS_FALSE])
+            _ret: _JSValue = lib.JS_Call(_ctx, map_function._val, JS_UNDEFINED, 4, _args)
+            _JS_FreeValue(_ctx, _chunk)
+
+            if lib._inline_JS_IsException(_ret):
+                _e_val: _JSValue = lib.JS_GetException(_ctx)
+                raise JSError(_ctx, _e_val)
+
+            try:
+                if materialize:
+                    results: list[Any] = _JS_ToPyValueBulk(_ctx, _ret)
+                else:
+                    results = [_JS_ToPyValue(ctx, lib.JS_GetPropertyUint32(_ctx, _ret, i)) for i in range(len(chunk))]
+            finally:
+                _JS_FreeValue(_ctx, _ret)
+
+        return results
+
+
+    def call_with_timeout(self, *pyargs, timeout: float | None=None, budget: int | None=None) -> Any:
+        ctx: JSContext = self._context
+
+        if timeout is None:
+            timeout = ctx.timeout
+
+        if budget is None:
+            budget = ctx.budget
+
+        with ctx.rt.deadline(timeout, budget):
+            if _instrumentation.enabled:
+                name, filename = self._get_name()
+                return _instrumentation.trace_call('call', name, self._call, pyargs, filename)
+
+            return self._call(pyargs)
+
+
+    async def call_async(self, *pyargs) -> Any:
+        ctx: JSContext = self._context
+        ctx.install_timers()
+        ret: Any = self(*pyargs)
+        ret = await ctx.to_future(ret)
+        return ret
+
+
+    def __del__(self):
+        # print('JSFunction.__del__', self)
+        _ctx = self._ctx
+        _val = self._val
+        _this = self._this
+
+        if _ctx is None:
+            return
+
+        with self._context.rt:
+            _rt = lib.JS_GetRuntime(_ctx)
+
+            if lib.JS_IsLiveObject(_rt, _val):
+                _JS_FreeValue(_ctx, _val)
+
+            if lib._inline_JS_IsObject(_this) and lib.JS_IsLiveObject(_rt, _this):
+                _JS_FreeValue(_ctx, _this)
+
+            self._ctx = None
+
+
+    free = __del__
+
+
+def _JS_IsInterruptedError(_ctx: _JSContext_P, _val: _JSValue) -> bool:
+    if _val.tag != JS_TAG_OBJECT or not lib.JS_IsError(_ctx, _val):
+        return False
+
+    _message: _JSValue = lib.JS_GetPropertyStr(_ctx, _val, b'message')
+    interrupted: bool = False
+
+    if _message.tag == JS_TAG_STRING:
+        interrupted = _JS_ToPyStr(_ctx, _message) == 'interrupted'
+
+    _JS_FreeValue(_ctx, _message)
+    return interrupted
+
+
+class JSError(JSValue, Exception):
+    def __new__(cls, _ctx: _JSContext_P, _val: _JSValue):
+        # NOTE: error thrown after interrupt handler stopped execution is raised as JSTimeoutError
+        if cls is JSError and JSContext.get_qjscontext(_ctx).rt._interrupt.interrupted and _JS_IsInterruptedError(_ctx, _val):
+            cls = JSTimeoutError
+
+        return super().__new__(cls, _ctx, _val)
+
+
+    def __init__(self, _ctx: _JSContext_P, _val: _JSValue):
+        super().__init__(_ctx, _val)
+
+
+    def __str__(self) -> str:
+        return repr(self)
+
+
+    def __repr__(self) -> str:
+        _ctx = self._ctx
+        _val: _JSValue = self._val
+        tag = JSTag(_val.tag)
+
+        # ???
+        # is_error = lib.JS_IsError(_ctx, _val)
+
+        with self._context.rt:
+            _c_str = _JS_ToCString(_ctx, _val)
+            val = ffi.string(_c_str) # ???
+            val = val.decode()
+            lib.JS_FreeCString(_ctx, _c_str)
+
+        # NOTE: thrown value or promise rejection reason is not necessarily object
+        if not lib._macro_JS_VALUE_HAS_REF_COUNT(_val):
+            return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} val={val!r}>'
+
+        ref_count: int = lib._macro_JS_VALUE_GET_REF_COUNT(_val)
+        return f'<{self.__class__.__name__} at {hex(id(self))} tag={tag.name} ptr={_val.u.ptr} {ref_count=} val={val!r}>'
+
+
+class JSTimeoutError(JSError):
+    pass
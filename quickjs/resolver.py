@@ -0,0 +1,274 @@
+__all__ = [
+    'JSModuleResolver',
+]
+
+import os
+import json
+import tempfile
+import threading
+from urllib.parse import urljoin
+from typing import Any
+
+
+_BUILTIN_MODULES: frozenset[str] = frozenset(['std', 'os'])
+
+
+def _is_url(name: str) -> bool:
+    return name.startswith('http://') or name.startswith('https://')
+
+
+def _is_relative(name: str) -> bool:
+    return name.startswith('./') or name.startswith('../') or name.startswith('/') or name in ('.', '..')
+
+
+# Node-style module resolution used as QuickJS module normalizer.
+# Relative specifiers are resolved against importing module, bare specifiers against node_modules
+# directories of importing module and its parents, using package.json exports, module and main fields.
+# Results are memoized in index, which can be saved to and loaded from index_path.
+class JSModuleResolver:
+    def __init__(self,
+                 index_path: str | None=None,
+                 conditions: tuple[str, ...]=('import', 'module', 'default'),
+                 extensions: tuple[str, ...]=('.js', '.mjs')):
+        self.index_path = index_path
+        self.conditions = tuple(conditions)
+        self.extensions = tuple(extensions)
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._lock = threading.Lock()
+        self._index: dict[str, str] = {}
+        self._packages: dict[str, dict[str, Any] | None] = {}
+
+        if index_path is not None:
+            self.load_index()
+
+
+    def resolve(self, name: str, base_name: str) -> str:
+        if name in _BUILTIN_MODULES or _is_url(name):
+            return name
+
+        if _is_url(base_name) and _is_relative(name):
+            return urljoin(base_name, name)
+
+        # NOTE: base name is importing module path, or eval filename like '<input>' resolved from CWD,
+        #   bare names imported by remote modules are resolved from CWD too
+        base_dir: str = '' if _is_url(base_name) else os.path.dirname(base_name)
+        key: str = f'{base_dir}\0{name}'
+
+        with self._lock:
+            path: str | None = self._index.get(key)
+
+            if path is not None:
+                self.hits += 1
+                return path
+
+            self.misses += 1
+
+        path = self._resolve(name, base_dir)
+
+        if path is None:
+            raise ValueError(f'cannot resolve module {name!r} from {base_name!r}')
+
+        with self._lock:
+            self._index[key] = path
+
+        return path
+
+
+    def _resolve(self, name: str, base_dir: str) -> str | None:
+        if _is_relative(name):
+            return self._resolve_path(os.path.normpath(os.path.join(base_dir, name)))
+
+        parts: list[str] = name.split('/')
+        n: int = 2 if name.startswith('@') else 1
+        package_name: str = '/'.join(parts[:n])
+        subpath: str = '/'.join(parts[n:])
+        dirpath: str = os.path.abspath(base_dir or '.')
+
+        while True:
+            package_dir: str = os.path.join(dirpath, 'node_modules', package_name)
+
+            if os.path.isdir(package_dir):
+                return self._resolve_package(package_dir, subpath)
+
+            parent: str = os.path.dirname(dirpath)
+
+            if parent == dirpath:
+                return None
+
+            dirpath = parent
+
+
+    def _resolve_path(self, path: str) -> str | None:
+        if os.path.isfile(path):
+            return path
+
+        for ext in self.extensions:
+            if os.path.isfile(path + ext):
+                return path + ext
+
+        if os.path.isdir(path):
+            return self._resolve_package_entry(path)
+
+        return None
+
+
+    def _read_package(self, package_dir: str) -> dict[str, Any] | None:
+        try:
+            return self._packages[package_dir]
+        except KeyError:
+            pass
+
+        try:
+            with open(os.path.join(package_dir, 'package.json')) as f:
+                package: dict[str, Any] | None = json.load(f)
+        except (OSError, ValueError):
+            package = None
+
+        self._packages[package_dir] = package
+        return package
+
+
+    def _resolve_package(self, package_dir: str, subpath: str) -> str | None:
+        package: dict[str, Any] | None = self._read_package(package_dir)
+
+        if package is not None and package.get('exports') is not None:
+            target: str | None = self._resolve_exports(package['exports'], './' + subpath if subpath else '.')
+
+            if target is not None:
+                return self._resolve_path(os.path.normpath(os.path.join(package_dir, target)))
+
+        # NOTE: packages without exports, or subpaths not exported, are resolved as files
+        if subpath:
+            return self._resolve_path(os.path.join(package_dir, subpath))
+
+        return self._resolve_package_entry(package_dir)
+
+
+    def _resolve_package_entry(self, package_dir: str) -> str | None:
+        package: dict[str, Any] | None = self._read_package(package_dir)
+
+        if package is not None:
+            # NOTE: ES module entry is preferred over CommonJS main
+            for field in ('module', 'main'):
+                entry: Any = package.get(field)
+
+                if isinstance(entry, str) and entry:
+                    path: str | None = self._resolve_path(os.path.normpath(os.path.join(package_dir, entry)))
+
+                    if path is not None:
+                        return path
+
+        for ext in self.extensions:
+            path = os.path.join(package_dir, 'index' + ext)
+
+            if os.path.isfile(path):
+                return path
+
+        return None
+
+
+    def _resolve_exports(self, exports: Any, subpath: str) -> str | None:
+        # NOTE: exports is either target of '.' or map of subpaths starting with '.'
+        if not isinstance(exports, dict) or not any(k.startswith('.') for k in exports):
+            return self._resolve_target(exports, '') if subpath == '.' else None
+
+        if subpath in exports:
+            return self._resolve_target(exports[subpath], '')
+
+        # NOTE: subpath patterns, longest prefix wins
+        best: tuple[str, Any, str] | None = None
+
+        for key, target in exports.items():
+            prefix, star, suffix = key.partition('*')
+
+            if not star or not subpath.startswith(prefix) or not subpath.endswith(suffix):
+                continue
+
+            if len(subpath) < len(prefix) + len(suffix):
+                continue
+
+            if best is None or len(prefix) > len(best[0]):
+                best = (prefix, target, subpath[len(prefix):len(subpath) - len(suffix)])
+
+        if best is None:
+            return None
+
+        return self._resolve_target(best[1], best[2])
+
+
+    def _resolve_target(self, target: Any, match: str) -> str | None:
+        if isinstance(target, str):
+            return target.replace('*', match)
+        elif isinstance(target, list):
+            for n in target:
+                path: str | None = self._resolve_target(n, match)
+
+                if path is not None:
+                    return path
+        elif isinstance(target, dict):
+            # NOTE: first condition in package order which is in self.conditions wins
+            for condition, n in target.items():
+                if condition in self.conditions:
+                    path = self._resolve_target(n, match)
+
+                    if path is not None:
+                        return path
+
+        return None
+
+
+    def load_index(self):
+        try:
+            with open(self.index_path) as f:
+                data: dict[str, Any] = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        # NOTE: keys with relative base dirs are valid only in same working directory
+        if data.get('cwd') != os.getcwd():
+            return
+
+        index: dict[str, str] = {
+            key: path
+            for key, path in data.get('index', {}).items()
+            if _is_url(path) or os.path.isfile(path)
+        }
+
+        with self._lock:
+            self._index.update(index)
+
+
+    def save_index(self):
+        with self._lock:
+            data: dict[str, Any] = {'cwd': os.getcwd(), 'index': dict(self._index)}
+
+        dirpath: str = os.path.dirname(os.path.abspath(self.index_path))
+        os.makedirs(dirpath, exist_ok=True)
+
+        # NOTE: write and rename, so concurrent readers never see partial index
+        fd, temp_path = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+
+            os.replace(temp_path, self.index_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+    def clear(self):
+        with self._lock:
+            self._index.clear()
+            self._packages.clear()
+
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._index),
+        }
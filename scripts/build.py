@@ -258,8 +258,14 @@ def build_quickjs_repo(*args, **kwargs):
     _source += '\n\n' + '''
     typedef JSValue JSValueConst;
 
-    extern "Python" JSValue _quikcjs_cffi_py_func_wrap(JSContext *ctx, JSValueConst this_val, int argc, JSValueConst *argv, int magic, JSValue *func_data);
+    extern "Python" JSValue _quikcjs_cffi_py_func_call(JSContext *ctx, JSValueConst func_obj, JSValueConst this_val, int argc, JSValueConst *argv, int flags);
+    extern "Python" void _quikcjs_cffi_py_func_finalizer(JSRuntime *rt, void *opaque);
+    extern "Python" char *_quikcjs_cffi_js_module_normalize(JSContext *ctx, const char *module_base_name, const char *module_name, void *opaque);
     extern "Python" JSModuleDef *_quikcjs_cffi_js_module_loader(JSContext *ctx, const char *module_name, void *opaque);
+    extern "Python" void _quikcjs_cffi_free_array_buffer(JSRuntime *rt, void *opaque, void *ptr);
+    extern "Python" int _quikcjs_cffi_py_proxy_get(JSContext *ctx, void *opaque, JSAtom prop, JSValue *pval);
+    extern "Python" int _quikcjs_cffi_py_proxy_keys(JSContext *ctx, void *opaque, JSPropertyEnum **ptab, uint32_t *plen);
+    extern "Python" void _quikcjs_cffi_py_proxy_finalizer(JSRuntime *rt, void *opaque);
 
     int _macro_JS_VALUE_GET_TAG(JSValue v);
     int _macro_JS_VALUE_GET_NORM_TAG(JSValue v);
@@ -275,6 +281,52 @@ def build_quickjs_repo(*args, **kwargs):
     // void *_macro_JS_VALUE_GET_STRING(JSValue v); /* return is JSString* */
     int _macro_JS_VALUE_HAS_REF_COUNT(JSValue v);
     int _macro_JS_VALUE_GET_REF_COUNT(JSValue v);
+
+    int _quikcjs_cffi_py_func_init_class(JSRuntime *rt);
+    void _quikcjs_cffi_py_func_init_context(JSContext *ctx);
+    JSValue _quikcjs_cffi_py_func_new(JSContext *ctx, void *opaque, const char *name, int length);
+    void *_quikcjs_cffi_py_func_get_opaque(JSValue val);
+    JSValue _quikcjs_cffi_throw_internal_error(JSContext *ctx, const char *message);
+
+    int _quikcjs_cffi_py_proxy_init_class(JSRuntime *rt);
+    void _quikcjs_cffi_py_proxy_init_context(JSContext *ctx);
+    JSValue _quikcjs_cffi_py_proxy_new(JSContext *ctx, JSValue proto, void *opaque);
+
+    JSValue _quikcjs_cffi_bulk_to_jsvalue(JSContext *ctx, const int32_t *ops, const double *nums, const char *strs, const JSAtom *atoms, const JSValue *vals);
+
+    typedef struct {
+        int32_t *ops;
+        size_t ops_len;
+        size_t ops_size;
+        double *nums;
+        size_t nums_len;
+        size_t nums_size;
+        char *strs;
+        size_t strs_len;
+        size_t strs_size;
+        JSValue *vals;
+        size_t vals_len;
+        size_t vals_size;
+        int32_t max_depth;
+        int64_t max_count;
+        int64_t count;
+        JSObject **parents;
+    } _quikcjs_cffi_bulk_writer;
+
+    int _quikcjs_cffi_bulk_from_jsvalue(JSContext *ctx, JSValue val, _quikcjs_cffi_bulk_writer *w);
+    void _quikcjs_cffi_bulk_writer_free(JSContext *ctx, _quikcjs_cffi_bulk_writer *w);
+
+    typedef struct {
+        double deadline;
+        int64_t budget;
+        int interrupted;
+    } _quikcjs_cffi_interrupt;
+
+    double _quikcjs_cffi_monotonic(void);
+    void _quikcjs_cffi_set_interrupt(JSRuntime *rt, _quikcjs_cffi_interrupt *state);
+
+    int _quikcjs_cffi_get_object_kind(JSContext *ctx, JSValue val, JSValue iterator_ctor);
+    int _quikcjs_cffi_iterator_next(JSContext *ctx, JSValue iter, JSValue *pvalue);
     '''
 
     # print code
@@ -286,7 +338,8 @@ def build_quickjs_repo(*args, **kwargs):
 
     ffibuilder.set_source(
         '_quickjs',
-        '''#include "../_quickjs_lib.h"
+        '''#include <time.h>
+        #include "../_quickjs_lib.h"
 
         int _macro_JS_VALUE_GET_TAG(JSValue v) { return JS_VALUE_GET_TAG(v); }
         int _macro_JS_VALUE_GET_NORM_TAG(JSValue v) { return JS_VALUE_GET_NORM_TAG(v); }
@@ -303,6 +356,689 @@ def build_quickjs_repo(*args, **kwargs):
         int _macro_JS_VALUE_HAS_REF_COUNT(JSValue v) { return JS_VALUE_HAS_REF_COUNT(v); }
         int _macro_JS_VALUE_GET_REF_COUNT(JSValue v) { return ((JSRefCountHeader*)JS_VALUE_GET_PTR(v))->ref_count; } /* quickjs-cffi */
 
+        /*
+         * JS class of Python callables, opaque is cffi handle released by finalizer
+         */
+        static JSValue _quikcjs_cffi_py_func_call(JSContext *ctx, JSValueConst func_obj, JSValueConst this_val, int argc, JSValueConst *argv, int flags);
+        static void _quikcjs_cffi_py_func_finalizer(JSRuntime *rt, void *opaque);
+
+        static JSClassID _quikcjs_cffi_py_func_class_id;
+
+        static void _quikcjs_cffi_py_func_finalizer_wrap(JSRuntime *rt, JSValue val) {
+            void *opaque = JS_GetOpaque(val, _quikcjs_cffi_py_func_class_id);
+
+            if (opaque)
+                _quikcjs_cffi_py_func_finalizer(rt, opaque);
+        }
+
+        static JSClassDef _quikcjs_cffi_py_func_class = {
+            "PythonFunction",
+            .finalizer = _quikcjs_cffi_py_func_finalizer_wrap,
+            .call = _quikcjs_cffi_py_func_call,
+        };
+
+        int _quikcjs_cffi_py_func_init_class(JSRuntime *rt) {
+            if (!_quikcjs_cffi_py_func_class_id)
+                JS_NewClassID(&_quikcjs_cffi_py_func_class_id);
+
+            return JS_NewClass(rt, _quikcjs_cffi_py_func_class_id, &_quikcjs_cffi_py_func_class);
+        }
+
+        /* instances inherit call, apply, bind from Function.prototype */
+        void _quikcjs_cffi_py_func_init_context(JSContext *ctx) {
+            JSValue global = JS_GetGlobalObject(ctx);
+            JSValue func = JS_GetPropertyStr(ctx, global, "Function");
+            JSValue proto = JS_GetPropertyStr(ctx, func, "prototype");
+            JS_SetClassProto(ctx, _quikcjs_cffi_py_func_class_id, proto);
+            JS_FreeValue(ctx, func);
+            JS_FreeValue(ctx, global);
+        }
+
+        JSValue _quikcjs_cffi_py_func_new(JSContext *ctx, void *opaque, const char *name, int length) {
+            JSValue val = JS_NewObjectClass(ctx, _quikcjs_cffi_py_func_class_id);
+
+            if (JS_IsException(val))
+                return val;
+
+            JS_SetOpaque(val, opaque);
+
+            if (JS_DefinePropertyValueStr(ctx, val, "length", JS_NewInt32(ctx, length), JS_PROP_CONFIGURABLE) < 0 ||
+                JS_DefinePropertyValueStr(ctx, val, "name", JS_NewString(ctx, name), JS_PROP_CONFIGURABLE) < 0) {
+                JS_FreeValue(ctx, val);
+                return JS_EXCEPTION;
+            }
+
+            return val;
+        }
+
+        void *_quikcjs_cffi_py_func_get_opaque(JSValue val) {
+            return JS_GetOpaque(val, _quikcjs_cffi_py_func_class_id);
+        }
+
+        /*
+         * JS class of lazy proxies of Python objects, opaque holds cffi handle and cache of converted properties
+         */
+        static int _quikcjs_cffi_py_proxy_get(JSContext *ctx, void *opaque, JSAtom prop, JSValue *pval);
+        static int _quikcjs_cffi_py_proxy_keys(JSContext *ctx, void *opaque, JSPropertyEnum **ptab, uint32_t *plen);
+        static void _quikcjs_cffi_py_proxy_finalizer(JSRuntime *rt, void *opaque);
+
+        typedef struct {
+            void *handle;
+            JSValue cache; /* object without prototype, property values converted on first access */
+        } _quikcjs_cffi_py_proxy;
+
+        static JSClassID _quikcjs_cffi_py_proxy_class_id;
+
+        static void _quikcjs_cffi_py_proxy_finalizer_wrap(JSRuntime *rt, JSValue val) {
+            _quikcjs_cffi_py_proxy *p = JS_GetOpaque(val, _quikcjs_cffi_py_proxy_class_id);
+
+            if (p) {
+                JS_FreeValueRT(rt, p->cache);
+                _quikcjs_cffi_py_proxy_finalizer(rt, p->handle);
+                js_free_rt(rt, p);
+            }
+        }
+
+        static void _quikcjs_cffi_py_proxy_gc_mark(JSRuntime *rt, JSValueConst val, JS_MarkFunc *mark_func) {
+            _quikcjs_cffi_py_proxy *p = JS_GetOpaque(val, _quikcjs_cffi_py_proxy_class_id);
+
+            if (p)
+                JS_MarkValue(rt, p->cache, mark_func);
+        }
+
+        static int _quikcjs_cffi_py_proxy_get_own_property(JSContext *ctx, JSPropertyDescriptor *desc, JSValueConst obj, JSAtom prop) {
+            _quikcjs_cffi_py_proxy *p = JS_GetOpaque(obj, _quikcjs_cffi_py_proxy_class_id);
+            JSPropertyDescriptor cached;
+            JSValue key, val;
+            int ret, is_symbol;
+
+            if (!p)
+                return 0;
+
+            ret = JS_GetOwnProperty(ctx, &cached, p->cache, prop);
+
+            if (ret < 0)
+                return -1;
+
+            if (!ret) {
+                /* NOTE: Python keys are strings and indexes, symbols are looked up in prototype only */
+                key = JS_AtomToValue(ctx, prop);
+                is_symbol = JS_IsSymbol(key);
+                JS_FreeValue(ctx, key);
+
+                if (is_symbol)
+                    return 0;
+
+                /* NOTE: returns property flags, 0 if property does not exist */
+                ret = _quikcjs_cffi_py_proxy_get(ctx, p->handle, prop, &cached.value);
+
+                if (ret <= 0)
+                    return ret;
+
+                cached.flags = ret & JS_PROP_ENUMERABLE;
+
+                if (JS_DefinePropertyValue(ctx, p->cache, prop, JS_DupValue(ctx, cached.value), JS_PROP_CONFIGURABLE | cached.flags) < 0) {
+                    JS_FreeValue(ctx, cached.value);
+                    return -1;
+                }
+
+                cached.getter = JS_UNDEFINED;
+                cached.setter = JS_UNDEFINED;
+            }
+
+            /* NOTE: properties are read-only */
+            if (desc) {
+                desc->flags = cached.flags & JS_PROP_ENUMERABLE;
+                desc->value = cached.value;
+                desc->getter = JS_UNDEFINED;
+                desc->setter = JS_UNDEFINED;
+            } else {
+                JS_FreeValue(ctx, cached.value);
+            }
+
+            JS_FreeValue(ctx, cached.getter);
+            JS_FreeValue(ctx, cached.setter);
+            return 1;
+        }
+
+        static int _quikcjs_cffi_py_proxy_get_own_property_names(JSContext *ctx, JSPropertyEnum **ptab, uint32_t *plen, JSValueConst obj) {
+            _quikcjs_cffi_py_proxy *p = JS_GetOpaque(obj, _quikcjs_cffi_py_proxy_class_id);
+
+            if (!p) {
+                *ptab = js_mallocz(ctx, sizeof(JSPropertyEnum));
+                *plen = 0;
+                return *ptab ? 0 : -1;
+            }
+
+            return _quikcjs_cffi_py_proxy_keys(ctx, p->handle, ptab, plen);
+        }
+
+        /* existing properties cannot be deleted, deleting missing property succeeds */
+        static int _quikcjs_cffi_py_proxy_delete_property(JSContext *ctx, JSValueConst obj, JSAtom prop) {
+            int ret = _quikcjs_cffi_py_proxy_get_own_property(ctx, NULL, obj, prop);
+            return ret < 0 ? -1 : !ret;
+        }
+
+        static JSClassExoticMethods _quikcjs_cffi_py_proxy_exotic = {
+            .get_own_property = _quikcjs_cffi_py_proxy_get_own_property,
+            .get_own_property_names = _quikcjs_cffi_py_proxy_get_own_property_names,
+            .delete_property = _quikcjs_cffi_py_proxy_delete_property,
+        };
+
+        static JSClassDef _quikcjs_cffi_py_proxy_class = {
+            "PythonObject",
+            .finalizer = _quikcjs_cffi_py_proxy_finalizer_wrap,
+            .gc_mark = _quikcjs_cffi_py_proxy_gc_mark,
+            .exotic = &_quikcjs_cffi_py_proxy_exotic,
+        };
+
+        int _quikcjs_cffi_py_proxy_init_class(JSRuntime *rt) {
+            if (!_quikcjs_cffi_py_proxy_class_id)
+                JS_NewClassID(&_quikcjs_cffi_py_proxy_class_id);
+
+            return JS_NewClass(rt, _quikcjs_cffi_py_proxy_class_id, &_quikcjs_cffi_py_proxy_class);
+        }
+
+        void _quikcjs_cffi_py_proxy_init_context(JSContext *ctx) {
+            JSValue global = JS_GetGlobalObject(ctx);
+            JSValue object = JS_GetPropertyStr(ctx, global, "Object");
+            JSValue proto = JS_GetPropertyStr(ctx, object, "prototype");
+            JS_SetClassProto(ctx, _quikcjs_cffi_py_proxy_class_id, proto);
+            JS_FreeValue(ctx, object);
+            JS_FreeValue(ctx, global);
+        }
+
+        /* undefined proto is Object.prototype, new properties cannot be added to proxy */
+        JSValue _quikcjs_cffi_py_proxy_new(JSContext *ctx, JSValue proto, void *opaque) {
+            _quikcjs_cffi_py_proxy *p;
+            JSValue val;
+
+            if (JS_IsUndefined(proto))
+                val = JS_NewObjectClass(ctx, _quikcjs_cffi_py_proxy_class_id);
+            else
+                val = JS_NewObjectProtoClass(ctx, proto, _quikcjs_cffi_py_proxy_class_id);
+
+            if (JS_IsException(val))
+                return val;
+
+            p = js_mallocz(ctx, sizeof(*p));
+
+            if (!p) {
+                JS_FreeValue(ctx, val);
+                return JS_EXCEPTION;
+            }
+
+            p->cache = JS_NewObjectProto(ctx, JS_NULL);
+
+            if (JS_IsException(p->cache)) {
+                js_free(ctx, p);
+                JS_FreeValue(ctx, val);
+                return JS_EXCEPTION;
+            }
+
+            p->handle = opaque;
+            JS_SetOpaque(val, p);
+            JS_PreventExtensions(ctx, val);
+            return val;
+        }
+
+        /* variadic functions returning JSValue cannot be called through cffi */
+        JSValue _quikcjs_cffi_throw_internal_error(JSContext *ctx, const char *message) {
+            return JS_ThrowInternalError(ctx, "%s", message);
+        }
+
+        /*
+         * bulk conversion of flattened Python values, see _JSBulkEncoder in quickjs.py
+         */
+        enum {
+            _QUIKCJS_CFFI_BULK_NULL,
+            _QUIKCJS_CFFI_BULK_FALSE,
+            _QUIKCJS_CFFI_BULK_TRUE,
+            _QUIKCJS_CFFI_BULK_INT,
+            _QUIKCJS_CFFI_BULK_FLOAT,
+            _QUIKCJS_CFFI_BULK_STRING,
+            _QUIKCJS_CFFI_BULK_ARRAY,
+            _QUIKCJS_CFFI_BULK_OBJECT,
+            _QUIKCJS_CFFI_BULK_VALUE,
+        };
+
+        typedef struct {
+            const int32_t *ops;
+            const double *nums;
+            const char *strs;
+            const JSAtom *atoms;
+            const JSValue *vals;
+        } _quikcjs_cffi_bulk_reader;
+
+        static JSValue _quikcjs_cffi_bulk_read(JSContext *ctx, _quikcjs_cffi_bulk_reader *r) {
+            JSValue val, item;
+            int32_t op = *r->ops++;
+            int32_t i, n;
+
+            switch (op) {
+            case _QUIKCJS_CFFI_BULK_NULL:
+                return JS_NULL;
+            case _QUIKCJS_CFFI_BULK_FALSE:
+                return JS_FALSE;
+            case _QUIKCJS_CFFI_BULK_TRUE:
+                return JS_TRUE;
+            case _QUIKCJS_CFFI_BULK_INT:
+                return JS_NewInt32(ctx, *r->ops++);
+            case _QUIKCJS_CFFI_BULK_FLOAT:
+                return JS_NewFloat64(ctx, *r->nums++);
+            case _QUIKCJS_CFFI_BULK_STRING:
+                n = *r->ops++;
+                val = JS_NewStringLen(ctx, r->strs, n);
+                r->strs += n;
+                return val;
+            case _QUIKCJS_CFFI_BULK_ARRAY:
+                n = *r->ops++;
+                val = JS_NewArray(ctx);
+
+                if (JS_IsException(val))
+                    return val;
+
+                /* elements are defined in index order, so array stays in fast array mode */
+                for (i = 0; i < n; i++) {
+                    item = _quikcjs_cffi_bulk_read(ctx, r);
+
+                    if (JS_IsException(item) || JS_DefinePropertyValueUint32(ctx, val, i, item, JS_PROP_C_W_E) < 0) {
+                        JS_FreeValue(ctx, val);
+                        return JS_EXCEPTION;
+                    }
+                }
+
+                return val;
+            case _QUIKCJS_CFFI_BULK_OBJECT:
+                n = *r->ops++;
+                val = JS_NewObject(ctx);
+
+                if (JS_IsException(val))
+                    return val;
+
+                for (i = 0; i < n; i++) {
+                    JSAtom atom = r->atoms[*r->ops++];
+                    item = _quikcjs_cffi_bulk_read(ctx, r);
+
+                    if (JS_IsException(item) || JS_DefinePropertyValue(ctx, val, atom, item, JS_PROP_C_W_E) < 0) {
+                        JS_FreeValue(ctx, val);
+                        return JS_EXCEPTION;
+                    }
+                }
+
+                return val;
+            case _QUIKCJS_CFFI_BULK_VALUE:
+                return JS_DupValue(ctx, r->vals[*r->ops++]);
+            default:
+                return JS_ThrowInternalError(ctx, "invalid bulk conversion op %d", op);
+            }
+        }
+
+        JSValue _quikcjs_cffi_bulk_to_jsvalue(JSContext *ctx, const int32_t *ops, const double *nums, const char *strs, const JSAtom *atoms, const JSValue *vals) {
+            _quikcjs_cffi_bulk_reader r = {ops, nums, strs, atoms, vals};
+            return _quikcjs_cffi_bulk_read(ctx, &r);
+        }
+
+        /*
+         * bulk conversion of JS values to flattened Python values, see _JSBulkDecoder in quickjs.py
+         */
+        enum {
+            _QUIKCJS_CFFI_BULK_OK = 0,
+            _QUIKCJS_CFFI_BULK_EXCEPTION = -1,
+            _QUIKCJS_CFFI_BULK_CYCLE = -2,
+            _QUIKCJS_CFFI_BULK_MAX_DEPTH = -3,
+            _QUIKCJS_CFFI_BULK_MAX_COUNT = -4,
+        };
+
+        typedef struct {
+            int32_t *ops;
+            size_t ops_len;
+            size_t ops_size;
+            double *nums;
+            size_t nums_len;
+            size_t nums_size;
+            char *strs;
+            size_t strs_len;
+            size_t strs_size;
+            JSValue *vals;
+            size_t vals_len;
+            size_t vals_size;
+            int32_t max_depth;
+            int64_t max_count;
+            int64_t count;
+            JSObject **parents;
+        } _quikcjs_cffi_bulk_writer;
+
+        static int _quikcjs_cffi_bulk_grow(JSContext *ctx, void **pbuf, size_t *psize, size_t len, size_t item_size) {
+            size_t size;
+            void *buf;
+
+            if (len <= *psize)
+                return 0;
+
+            size = *psize ? *psize : 256;
+
+            while (size < len)
+                size *= 2;
+
+            buf = js_realloc(ctx, *pbuf, size * item_size);
+
+            if (!buf)
+                return -1;
+
+            *pbuf = buf;
+            *psize = size;
+            return 0;
+        }
+
+        static int _quikcjs_cffi_bulk_write_op(JSContext *ctx, _quikcjs_cffi_bulk_writer *w, int32_t op) {
+            if (_quikcjs_cffi_bulk_grow(ctx, (void **)&w->ops, &w->ops_size, w->ops_len + 1, sizeof(int32_t)))
+                return -1;
+
+            w->ops[w->ops_len++] = op;
+            return 0;
+        }
+
+        /* writes UTF-8 string, followed by its length in code points, so Python decodes all strings at once */
+        static int _quikcjs_cffi_bulk_write_str(JSContext *ctx, _quikcjs_cffi_bulk_writer *w, const char *str, size_t len) {
+            int32_t n = 0;
+            size_t i;
+
+            if (_quikcjs_cffi_bulk_grow(ctx, (void **)&w->strs, &w->strs_size, w->strs_len + len, 1))
+                return -1;
+
+            memcpy(w->strs + w->strs_len, str, len);
+            w->strs_len += len;
+
+            for (i = 0; i < len; i++)
+                n += ((uint8_t)str[i] & 0xC0) != 0x80;
+
+            return _quikcjs_cffi_bulk_write_op(ctx, w, n);
+        }
+
+        static int _quikcjs_cffi_bulk_write(JSContext *ctx, _quikcjs_cffi_bulk_writer *w, JSValueConst val, int32_t depth) {
+            int tag = JS_VALUE_GET_NORM_TAG(val);
+            JSPropertyEnum *tab;
+            JSObject *p;
+            JSValue item;
+            const char *str;
+            size_t len;
+            uint32_t i, n;
+            int64_t length;
+            int ret;
+
+            if (w->max_count >= 0 && ++w->count > w->max_count)
+                return _QUIKCJS_CFFI_BULK_MAX_COUNT;
+
+            switch (tag) {
+            case JS_TAG_NULL:
+            case JS_TAG_UNDEFINED:
+                return _quikcjs_cffi_bulk_write_op(ctx, w, _QUIKCJS_CFFI_BULK_NULL);
+            case JS_TAG_BOOL:
+                return _quikcjs_cffi_bulk_write_op(ctx, w, JS_VALUE_GET_BOOL(val) ? _QUIKCJS_CFFI_BULK_TRUE : _QUIKCJS_CFFI_BULK_FALSE);
+            case JS_TAG_INT:
+                if (_quikcjs_cffi_bulk_write_op(ctx, w, _QUIKCJS_CFFI_BULK_INT))
+                    return -1;
+
+                return _quikcjs_cffi_bulk_write_op(ctx, w, JS_VALUE_GET_INT(val));
+            case JS_TAG_FLOAT64:
+                if (_quikcjs_cffi_bulk_grow(ctx, (void **)&w->nums, &w->nums_size, w->nums_len + 1, sizeof(double)))
+                    return -1;
+
+                w->nums[w->nums_len++] = JS_VALUE_GET_FLOAT64(val);
+                return _quikcjs_cffi_bulk_write_op(ctx, w, _QUIKCJS_CFFI_BULK_FLOAT);
+            case JS_TAG_STRING:
+                str = JS_ToCStringLen(ctx, &len, val);
+
+                if (!str)
+                    return -1;
+
+                ret = _quikcjs_cffi_bulk_write_op(ctx, w, _QUIKCJS_CFFI_BULK_STRING);
+
+                if (!ret)
+                    ret = _quikcjs_cffi_bulk_write_str(ctx, w, str, len);
+
+                JS_FreeCString(ctx, str);
+                return ret;
+            case JS_TAG_OBJECT:
+                if (!JS_IsFunction(ctx, val))
+                    break;
+                /* fall through */
+            default:
+                /* functions, symbols, big numbers are passed by reference */
+                if (_quikcjs_cffi_bulk_grow(ctx, (void **)&w->vals, &w->vals_size, w->vals_len + 1, sizeof(JSValue)))
+                    return -1;
+
+                w->vals[w->vals_len++] = JS_DupValue(ctx, val);
+
+                if (_quikcjs_cffi_bulk_write_op(ctx, w, _QUIKCJS_CFFI_BULK_VALUE))
+                    return -1;
+
+                return _quikcjs_cffi_bulk_write_op(ctx, w, (int32_t)(w->vals_len - 1));
+            }
+
+            /* objects on path from root, shared objects outside of path are written more than once */
+            p = JS_VALUE_GET_OBJ(val);
+
+            if (depth >= w->max_depth)
+                return _QUIKCJS_CFFI_BULK_MAX_DEPTH;
+
+            for (i = 0; i < (uint32_t)depth; i++) {
+                if (w->parents[i] == p)
+                    return _QUIKCJS_CFFI_BULK_CYCLE;
+            }
+
+            w->parents[depth] = p;
+            ret = JS_IsArray(ctx, val);
+
+            if (ret < 0)
+                return -1;
+
+            if (ret) {
+                item = JS_GetPropertyStr(ctx, val, "length");
+
+                if (JS_IsException(item) || JS_ToInt64(ctx, &length, item)) {
+                    JS_FreeValue(ctx, item);
+                    return -1;
+                }
+
+                JS_FreeValue(ctx, item);
+
+                if (_quikcjs_cffi_bulk_write_op(ctx, w, _QUIKCJS_CFFI_BULK_ARRAY) || _quikcjs_cffi_bulk_write_op(ctx, w, (int32_t)length))
+                    return -1;
+
+                for (i = 0; i < (uint32_t)length; i++) {
+                    item = JS_GetPropertyUint32(ctx, val, i);
+
+                    if (JS_IsException(item))
+                        return -1;
+
+                    ret = _quikcjs_cffi_bulk_write(ctx, w, item, depth + 1);
+                    JS_FreeValue(ctx, item);
+
+                    if (ret)
+                        return ret;
+                }
+
+                return 0;
+            }
+
+            if (JS_GetOwnPropertyNames(ctx, &tab, &n, val, JS_GPN_STRING_MASK | JS_GPN_ENUM_ONLY))
+                return -1;
+
+            ret = _quikcjs_cffi_bulk_write_op(ctx, w, _QUIKCJS_CFFI_BULK_OBJECT);
+
+            if (!ret)
+                ret = _quikcjs_cffi_bulk_write_op(ctx, w, (int32_t)n);
+
+            for (i = 0; i < n && !ret; i++) {
+                item = JS_AtomToString(ctx, tab[i].atom);
+                str = JS_IsException(item) ? NULL : JS_ToCStringLen(ctx, &len, item);
+                JS_FreeValue(ctx, item);
+
+                if (!str) {
+                    ret = -1;
+                    break;
+                }
+
+                ret = _quikcjs_cffi_bulk_write_str(ctx, w, str, len);
+                JS_FreeCString(ctx, str);
+
+                if (ret)
+                    break;
+
+                item = JS_GetProperty(ctx, val, tab[i].atom);
+
+                if (JS_IsException(item)) {
+                    ret = -1;
+                    break;
+                }
+
+                ret = _quikcjs_cffi_bulk_write(ctx, w, item, depth + 1);
+                JS_FreeValue(ctx, item);
+            }
+
+            for (i = 0; i < n; i++)
+                JS_FreeAtom(ctx, tab[i].atom);
+
+            js_free(ctx, tab);
+            return ret;
+        }
+
+        int _quikcjs_cffi_bulk_from_jsvalue(JSContext *ctx, JSValue val, _quikcjs_cffi_bulk_writer *w) {
+            w->parents = js_malloc(ctx, sizeof(JSObject *) * (w->max_depth ? w->max_depth : 1));
+
+            if (!w->parents)
+                return _QUIKCJS_CFFI_BULK_EXCEPTION;
+
+            return _quikcjs_cffi_bulk_write(ctx, w, val, 0);
+        }
+
+        /* values passed by reference are owned by caller */
+        void _quikcjs_cffi_bulk_writer_free(JSContext *ctx, _quikcjs_cffi_bulk_writer *w) {
+            js_free(ctx, w->ops);
+            js_free(ctx, w->nums);
+            js_free(ctx, w->strs);
+            js_free(ctx, w->vals);
+            js_free(ctx, w->parents);
+            memset(w, 0, sizeof(*w));
+        }
+
+        /*
+         * deadlines, deadline is monotonic time in seconds or 0, budget is number of interrupt checks left or -1
+         */
+        typedef struct {
+            double deadline;
+            int64_t budget;
+            int interrupted;
+        } _quikcjs_cffi_interrupt;
+
+        enum {
+            _QUIKCJS_CFFI_INTERRUPT_NONE,
+            _QUIKCJS_CFFI_INTERRUPT_DEADLINE,
+            _QUIKCJS_CFFI_INTERRUPT_BUDGET,
+        };
+
+        double _quikcjs_cffi_monotonic(void) {
+            struct timespec ts;
+            clock_gettime(CLOCK_MONOTONIC, &ts);
+            return (double)ts.tv_sec + (double)ts.tv_nsec / 1e9;
+        }
+
+        /* called by QuickJS about every 10000 function calls and loop iterations */
+        static int _quikcjs_cffi_interrupt_handler(JSRuntime *rt, void *opaque) {
+            _quikcjs_cffi_interrupt *state = opaque;
+
+            if (state->budget >= 0 && state->budget-- == 0) {
+                state->budget = 0;
+                state->interrupted = _QUIKCJS_CFFI_INTERRUPT_BUDGET;
+                return 1;
+            }
+
+            if (state->deadline > 0 && _quikcjs_cffi_monotonic() >= state->deadline) {
+                state->interrupted = _QUIKCJS_CFFI_INTERRUPT_DEADLINE;
+                return 1;
+            }
+
+            return 0;
+        }
+
+        /* NULL state removes handler, so there is no overhead without deadline */
+        void _quikcjs_cffi_set_interrupt(JSRuntime *rt, _quikcjs_cffi_interrupt *state) {
+            JS_SetInterruptHandler(rt, state ? _quikcjs_cffi_interrupt_handler : NULL, state);
+        }
+
+        /* kind of object wrapper, 0 is object, 1 is function, 2 is array and 3 is iterator,
+           iterator_ctor is function with %IteratorPrototype% as prototype, or undefined */
+        int _quikcjs_cffi_get_object_kind(JSContext *ctx, JSValueConst val, JSValueConst iterator_ctor) {
+            if (JS_IsFunction(ctx, val))
+                return 1;
+
+            /* NOTE: revoked proxy throws, it is wrapped as object */
+            switch (JS_IsArray(ctx, val)) {
+            case 1:
+                return 2;
+            case -1:
+                JS_FreeValue(ctx, JS_GetException(ctx));
+                return 0;
+            }
+
+            if (JS_IsUndefined(iterator_ctor))
+                return 0;
+
+            switch (JS_IsInstanceOf(ctx, val, iterator_ctor)) {
+            case 1:
+                return 3;
+            case -1:
+                JS_FreeValue(ctx, JS_GetException(ctx));
+                /* fall through */
+            default:
+                return 0;
+            }
+        }
+
+        /* calls iter.next(), returns -1 on exception, 0 if iterator is done or 1 with next value in pvalue */
+        int _quikcjs_cffi_iterator_next(JSContext *ctx, JSValueConst iter, JSValue *pvalue) {
+            JSValue next, result, done;
+            int ret;
+
+            next = JS_GetPropertyStr(ctx, iter, "next");
+
+            if (JS_IsException(next))
+                return -1;
+
+            result = JS_Call(ctx, next, iter, 0, NULL);
+            JS_FreeValue(ctx, next);
+
+            if (JS_IsException(result))
+                return -1;
+
+            if (!JS_IsObject(result)) {
+                JS_FreeValue(ctx, result);
+                JS_ThrowTypeError(ctx, "iterator result is not an object");
+                return -1;
+            }
+
+            done = JS_GetPropertyStr(ctx, result, "done");
+
+            if (JS_IsException(done)) {
+                JS_FreeValue(ctx, result);
+                return -1;
+            }
+
+            ret = JS_ToBool(ctx, done);
+            JS_FreeValue(ctx, done);
+
+            if (ret) {
+                JS_FreeValue(ctx, result);
+                return ret < 0 ? -1 : 0;
+            }
+
+            *pvalue = JS_GetPropertyStr(ctx, result, "value");
+            JS_FreeValue(ctx, result);
+            return JS_IsException(*pvalue) ? -1 : 1;
+        }
+
         ''' + _inline_static_source,
         libraries=['m', 'dl', 'pthread'],
         extra_objects=[
@@ -0,0 +1,29 @@
+from quickjs import JSRuntime, primitive_args
+from quickjs.quickjs import JSUndefined
+
+
+def test_missing_args_are_undefined():
+    ctx = JSRuntime().new_context()
+    call_with_one_arg = ctx.eval('(f) => f(1)')
+    a, b, c = call_with_one_arg(lambda a, b, c=5: [a, b, c]).to_py()
+    assert (a, c) == (1, 5)
+    assert b is None or isinstance(b, JSUndefined)
+
+
+def test_missing_args_are_none_with_primitive_args():
+    ctx = JSRuntime().new_context()
+    call_with_one_arg = ctx.eval('(f) => f("x")')
+    args: list = []
+
+    @primitive_args
+    def func(a, b, c):
+        args.extend([a, b, c])
+
+    call_with_one_arg(func)
+    assert args == ['x', None, None]
+
+
+def test_primitive_args_builtin_keeps_arity():
+    ctx = JSRuntime().new_context()
+    map_strings = ctx.eval('(f) => ["a", "b"].map(f)')
+    assert map_strings(primitive_args(str.upper)).to_py() == ['A', 'B']
@@ -0,0 +1,20 @@
+import pytest
+
+from quickjs import JSRuntime
+
+
+def test_map():
+    ctx = JSRuntime().new_context()
+    double = ctx.eval('(x) => x * 2')
+    assert list(double.map(range(5), chunk_size=2)) == [0, 2, 4, 6, 8]
+
+
+def test_map_rejects_chunk_size_below_one():
+    ctx = JSRuntime().new_context()
+    double = ctx.eval('(x) => x * 2')
+
+    with pytest.raises(ValueError):
+        double.map([1, 2], chunk_size=0)
+
+    with pytest.raises(ValueError):
+        double.starmap([(1,)], chunk_size=-1)
@@ -0,0 +1,37 @@
+import pytest
+
+from quickjs import JSProcessPool, JSRemoteError
+
+
+_PRELOAD_CODE = '''
+globalThis.add = (a, b) => a + b;
+globalThis.fail = (value) => { throw value; };
+globalThis.failNull = () => { throw null; };
+globalThis.failUndefined = () => { throw undefined; };
+'''
+
+
+@pytest.fixture(scope='module')
+def pool(tmp_path_factory):
+    path = tmp_path_factory.mktemp('process_pool') / 'preload.js'
+    path.write_text(_PRELOAD_CODE)
+
+    with JSProcessPool(preload=[str(path)], max_workers=1) as pool:
+        yield pool
+
+
+def test_call(pool):
+    assert pool.submit('add', 1, 2).result() == 3
+
+
+def test_error(pool):
+    with pytest.raises(JSRemoteError, match='boom'):
+        pool.submit('fail', 'boom').result()
+
+
+@pytest.mark.parametrize('function_path, message', [('failNull', 'null'), ('failUndefined', 'undefined')])
+def test_non_error_value_thrown(pool, function_path, message):
+    with pytest.raises(JSRemoteError) as exc_info:
+        pool.submit(function_path).result()
+
+    assert str(exc_info.value) == message
@@ -0,0 +1,28 @@
+from quickjs import JSRuntime, lazy_proxy
+
+
+class Config:
+    def __init__(self):
+        self.title = 'config'
+        self.rows = [1, 2, 3]
+
+
+    def clear(self):
+        self.rows.clear()
+
+
+def test_lazy_proxy_hides_methods():
+    ctx = JSRuntime().new_context()
+    config = Config()
+    read = ctx.eval('(c) => [c.title, typeof c.clear, Object.keys(c).join(",")]')
+    assert read(lazy_proxy(config)).to_py() == ['config', 'undefined', 'title,rows']
+
+    ctx.eval('(c) => { try { c.clear() } catch (e) {} }')(lazy_proxy(config))
+    assert config.rows == [1, 2, 3]
+
+
+def test_lazy_proxy_exposes_methods_when_enabled():
+    ctx = JSRuntime().new_context()
+    config = Config()
+    ctx.eval('(c) => c.clear()')(lazy_proxy(config, methods=True))
+    assert config.rows == []
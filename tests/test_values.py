@@ -0,0 +1,18 @@
+from quickjs import JSRuntime
+
+
+def test_regexp_match_array_index():
+    ctx = JSRuntime().new_context()
+    match = ctx.eval('"xabc".match(/b/)')
+    assert match.index == 2
+    assert str(match[0]) == 'b'
+
+
+def test_array_sequence_methods():
+    ctx = JSRuntime().new_context()
+    arr = ctx.eval('[1, 2, 2, 3]')
+    assert arr.index(2) == 1
+    assert arr.count(2) == 2
+
+    arr = ctx.eval('const a = [1, 2]; a.count = 7; a')
+    assert arr.count == 7